@@ -0,0 +1,3 @@
+from .brick_image import create_brick_image
+from .benchmarks import run_benchmarks, compare_results, DEFAULT_SIZES, DEFAULT_REPETITIONS, DEFAULT_NUM_CRACKS, \
+    DEFAULT_TOLERANCE
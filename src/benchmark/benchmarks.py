@@ -0,0 +1,194 @@
+import platform
+import time
+import tracemalloc
+from datetime import datetime
+from typing import Any, Callable
+
+import cv2
+import numpy as np
+
+from crack_generation import CrackGenerator, create_surface_from_image, create_procedural_surface, parameters_key
+from crack_generation.model.parameters import CrackGenerationParameters
+from crack_generation.path_functions import generate_pivot_trajectory, generate_path, remove_non_increasing_points, \
+    smooth_path_gaussian, smooth_path_moving_average, shrink_path_end, create_height_map_from_path
+from .brick_image import create_brick_image
+
+DEFAULT_SIZES = [1024, 2048, 4096, 8192, 16384]
+DEFAULT_REPETITIONS = 20
+DEFAULT_NUM_CRACKS = 50
+DEFAULT_TOLERANCE = 0.2  # Relative change of a metric that counts as a regression
+BENCHMARK_SEED = 0
+
+# Brick layout of the synthetic surfaces, as fractions of the surface size
+BRICK_WIDTH_FRACTION = 16
+BRICK_HEIGHT_FRACTION = 40
+MORTAR_WIDTH_FRACTION = 128
+
+# Whether lower (1) or higher (-1) values of a metric are better
+METRIC_DIRECTIONS = {
+    'seconds': 1,
+    'peak_memory_bytes': 1,
+    'cracks_per_second': -1,
+}
+
+
+def measure_seconds(function: Callable[[Any], Any], inputs: list) -> float:
+    """Measure the mean time in seconds of calling a function on each of the inputs."""
+    total = 0.
+    for value in inputs:
+        start_time = time.perf_counter()
+        function(value)
+        total += time.perf_counter() - start_time
+    return total / max(len(inputs), 1)
+
+
+def measure_peak_memory(function: Callable[[], Any]) -> tuple[Any, int]:
+    """Call a function and measure the peak memory in bytes that it allocated through Python and NumPy."""
+    tracemalloc.start()
+    try:
+        result = function()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return result, peak
+
+
+def benchmark_surface_size(
+    size: int,
+    parameters: CrackGenerationParameters,
+    repetitions: int,
+    num_cracks: int,
+    procedural: bool = False
+) -> dict[str, dict[str, float]]:
+    """
+    Benchmark all stages of crack generation on a synthetic square brick surface of the given size.
+    The cracks are generated on the analysed brick image, or on the procedural surface with the same layout.
+    """
+    mortar_width = size // MORTAR_WIDTH_FRACTION
+    results = {}
+
+    # Surface creation makes few large allocations, so tracing its memory barely affects its time
+    start_time = time.perf_counter()
+    surface, peak_memory = measure_peak_memory(lambda: create_procedural_surface(
+        size,
+        size,
+        size // BRICK_WIDTH_FRACTION - mortar_width,
+        size // BRICK_HEIGHT_FRACTION - mortar_width,
+        mortar_width,
+        seed=BENCHMARK_SEED
+    ))
+    results['create_procedural_surface'] = {'seconds': time.perf_counter() - start_time, 'peak_memory_bytes': peak_memory}
+
+    if not procedural:
+        del surface
+        image = create_brick_image(
+            size,
+            size,
+            size // BRICK_WIDTH_FRACTION,
+            size // BRICK_HEIGHT_FRACTION,
+            mortar_width,
+            BENCHMARK_SEED
+        )
+        start_time = time.perf_counter()
+        surface, peak_memory = measure_peak_memory(lambda: create_surface_from_image(image))
+        results['create_surface_from_image'] = {
+            'seconds': time.perf_counter() - start_time,
+            'peak_memory_bytes': peak_memory
+        }
+
+    rng = np.random.default_rng(BENCHMARK_SEED)
+    generator = CrackGenerator(parameters)
+    path_parameters = parameters.path_parameters
+    results['generate_pivot_trajectory'] = {'seconds': measure_seconds(
+        lambda _: generate_pivot_trajectory(surface, parameters, rng),
+        range(repetitions)
+    )}
+
+    # The inputs of the later stages are generated outside of the timed calls
+    trajectories = [generate_pivot_trajectory(surface, parameters, rng) for _ in range(repetitions)]
+    results['generate_path'] = {'seconds': measure_seconds(
+        lambda trajectory: generate_path(trajectory[0], trajectory[1][0], surface, path_parameters, rng),
+        trajectories
+    )}
+
+    # Post processing changes paths in place, so every stage gets its own copies
+    raw_paths = [generator.generate_crack_path(start, pivot_points, surface, rng) for start, pivot_points in trajectories]
+    results['remove_non_increasing_points'] = {'seconds': measure_seconds(
+        lambda path: remove_non_increasing_points(path, path_parameters.distance_improvement_threshold),
+        [path.copy() for path in raw_paths]
+    )}
+    results['smooth_path_gaussian'] = {'seconds': measure_seconds(
+        lambda path: smooth_path_gaussian(path, path_parameters.smoothing),
+        [path.copy() for path in raw_paths]
+    )}
+    results['smooth_path_moving_average'] = {'seconds': measure_seconds(
+        lambda path: smooth_path_moving_average(path, path_parameters.smoothing),
+        [path.copy() for path in raw_paths if len(path) > 1]
+    )}
+    results['shrink_path_end'] = {'seconds': measure_seconds(
+        lambda path: shrink_path_end(path, path_parameters.min_width, path_parameters.max_width_grow, rng),
+        [path.copy() for path in raw_paths]
+    )}
+    processed_paths = [generator.postprocess_path(path.copy(), surface, rng) for path in raw_paths]
+    results['create_height_map_from_path'] = {'seconds': measure_seconds(
+        lambda path: create_height_map_from_path(path, surface, parameters.dimension_parameters),
+        processed_paths
+    )}
+
+    # Generating cracks makes many small allocations, so its memory is traced in a separate run
+    start_time = time.perf_counter()
+    for seed in range(num_cracks):
+        generator(surface, seed)
+    cracks_per_second = num_cracks / (time.perf_counter() - start_time)
+    _, peak_memory = measure_peak_memory(lambda: [generator(surface, seed) for seed in range(num_cracks)])
+    results['crack_generator'] = {'cracks_per_second': cracks_per_second, 'peak_memory_bytes': peak_memory}
+
+    return results
+
+
+def run_benchmarks(
+    parameters: CrackGenerationParameters,
+    sizes: list[int],
+    repetitions: int = DEFAULT_REPETITIONS,
+    num_cracks: int = DEFAULT_NUM_CRACKS,
+    procedural: bool = False,
+    report: Callable[[str], None] = print
+) -> dict:
+    """Run the benchmarks for all surface sizes. Returns the results together with a description of the environment."""
+    results = {}
+    for size in sizes:
+        report(f'-- Benchmarking a {size}x{size} surface... --')
+        results[str(size)] = benchmark_surface_size(size, parameters, repetitions, num_cracks, procedural)
+
+    return {
+        'metadata': {
+            'created': datetime.now().isoformat(timespec='seconds'),
+            'platform': platform.platform(),
+            'python': platform.python_version(),
+            'numpy': np.__version__,
+            'opencv': cv2.__version__,
+            'parameters_key': parameters_key(parameters),
+            'repetitions': repetitions,
+            'num_cracks': num_cracks,
+            'procedural': procedural,
+        },
+        'results': results,
+    }
+
+
+def compare_results(results: dict, baseline: dict, tolerance: float = DEFAULT_TOLERANCE) -> list[str]:
+    """Compare benchmark results to a baseline. Returns a description of every metric that regressed beyond the tolerance."""
+    regressions = []
+    for size, benchmarks in results['results'].items():
+        for benchmark, metrics in benchmarks.items():
+            baseline_metrics = baseline['results'].get(size, {}).get(benchmark, {})
+            for metric, value in metrics.items():
+                if metric not in baseline_metrics or baseline_metrics[metric] == 0:
+                    continue
+                change = (value - baseline_metrics[metric]) / baseline_metrics[metric] * METRIC_DIRECTIONS[metric]
+                if change > tolerance:
+                    regressions.append(
+                        f'{size} {benchmark} {metric}: {baseline_metrics[metric]:.6g} -> {value:.6g} '
+                        f'({round(change * 100)}% worse)'
+                    )
+    return regressions
@@ -0,0 +1,41 @@
+import cv2
+import numpy as np
+
+MORTAR_INTENSITY = 40
+BRICK_INTENSITY_RANGE = (170, 230)
+NOISE_AMPLITUDE = 15
+BLUR_SIZE = 5
+
+
+def create_brick_image(
+    height: int,
+    width: int,
+    brick_width: int,
+    brick_height: int,
+    mortar_width: int,
+    seed: int = 0
+) -> np.array:
+    """
+    Create a synthetic grayscale height map of a running bond brick wall, with dark mortar joints between bright bricks.
+    Brick sizes, positions and intensities are jittered slightly and noise is added, such that it resembles a real texture.
+    """
+    rng = np.random.default_rng(seed)
+    image = np.full((height, width), MORTAR_INTENSITY, dtype=np.uint8)
+
+    y, row = 0, 0
+    while y < height:
+        row_height = brick_height + int(rng.integers(-brick_height // 12, brick_height // 12 + 1))
+        x = -(row % 2) * brick_width // 2 + int(rng.integers(0, max(brick_width // 12, 1)))
+        while x < width:
+            column_width = brick_width + int(rng.integers(-brick_width // 15, brick_width // 15 + 1))
+            min_x, max_x = max(x + mortar_width // 2, 0), min(x + column_width - mortar_width // 2, width)
+            min_y, max_y = y + mortar_width // 2, min(y + row_height - mortar_width // 2, height)
+            if max_x > min_x and max_y > min_y:
+                image[min_y:max_y, min_x:max_x] = rng.integers(*BRICK_INTENSITY_RANGE)
+            x += column_width
+        y += row_height
+        row += 1
+
+    noise = rng.integers(-NOISE_AMPLITUDE, NOISE_AMPLITUDE, image.shape, dtype=np.int16)
+    image = np.clip(image.astype(np.int16) + noise, 0, 255).astype(np.uint8)
+    return cv2.GaussianBlur(image, (BLUR_SIZE, BLUR_SIZE), 0)
@@ -0,0 +1,73 @@
+import json
+import sys
+from argparse import ArgumentParser
+
+import yaml
+
+from benchmark import run_benchmarks, compare_results, DEFAULT_SIZES, DEFAULT_REPETITIONS, DEFAULT_NUM_CRACKS, \
+    DEFAULT_TOLERANCE
+from crack_generation.parameter_loading import load_crack_parameters
+
+
+def main():
+    """Benchmark the crack generation stages on synthetic brick surfaces and optionally compare them to a baseline."""
+    parser = ArgumentParser()
+    parser.add_argument(
+        '-o', '--output', type=str, required=False, default='benchmark_results.json',
+        help='Path of the JSON file to write the results to.'
+    )
+    parser.add_argument(
+        '-c', '--config', type=str, required=False, default='resources/configuration.yaml',
+        help='The path to the configuration file with the crack generation parameters.'
+    )
+    parser.add_argument(
+        '-s', '--sizes', type=int, nargs='+', required=False, default=DEFAULT_SIZES,
+        help='Widths and heights of the synthetic surfaces.'
+    )
+    parser.add_argument(
+        '-r', '--repetitions', type=int, required=False, default=DEFAULT_REPETITIONS,
+        help='Number of calls to average every stage over.'
+    )
+    parser.add_argument(
+        '-n', '--num-cracks', type=int, required=False, default=DEFAULT_NUM_CRACKS,
+        help='Number of full cracks to generate per surface.'
+    )
+    parser.add_argument(
+        '-p', '--procedural', action='store_true',
+        help='Generate the cracks on procedural surfaces instead of analysed brick images, which is faster at large sizes.'
+    )
+    parser.add_argument('-b', '--baseline', type=str, required=False, help='Results JSON file to compare against.')
+    parser.add_argument(
+        '-t', '--tolerance', type=float, required=False, default=DEFAULT_TOLERANCE,
+        help='Relative change of a metric that counts as a regression.'
+    )
+    args = parser.parse_args()
+
+    with open(args.config, 'r') as yaml_file:
+        parameters = load_crack_parameters(yaml.safe_load(yaml_file)['crack_generation'])
+
+    results = run_benchmarks(parameters, args.sizes, args.repetitions, args.num_cracks, args.procedural)
+    with open(args.output, 'w') as output_file:
+        json.dump(results, output_file, indent=2)
+
+    for size, benchmarks in results['results'].items():
+        for benchmark, metrics in benchmarks.items():
+            print(f'{size:>6} {benchmark:<30} ' + ', '.join(f'{metric}={value:.6g}' for metric, value in metrics.items()))
+    print(f'-- Wrote results to {args.output} --')
+
+    if args.baseline is not None:
+        with open(args.baseline, 'r') as baseline_file:
+            baseline = json.load(baseline_file)
+        if baseline['metadata']['parameters_key'] != results['metadata']['parameters_key']:
+            print('-- Warning: the baseline was created with different crack generation parameters --')
+
+        regressions = compare_results(results, baseline, args.tolerance)
+        for regression in regressions:
+            print(f'Regression: {regression}')
+        if len(regressions) > 0:
+            sys.exit(1)
+        print('-- No regressions compared to the baseline --')
+
+
+if __name__ == "__main__":
+    main()
@@ -41,9 +41,30 @@ parser.add_argument(
     "-o", "--output", dest="output_dir", type=str, required=False, default='',
     help="The output directory for the new dataset.",
 )
+parser.add_argument(
+    "-b", "--bank", dest="crack_bank", type=str, required=False, default=None,
+    help="The crack bank directory to draw precomputed cracks from, instead of generating them.",
+)
+parser.add_argument(
+    "-i", "--start-index", dest="start_index", type=int, required=False, default=0,
+    help="The index of the first image, to render a part of a dataset.",
+)
+parser.add_argument(
+    "-t", "--threads", dest="threads", type=int, required=False, default=None,
+    help="The number of threads to use for rendering and image processing. Uses all cores by default.",
+)
+parser.add_argument(
+    "-q", "--queue", dest="queue", type=str, required=False, default=None,
+    help="The work queue database shared with other workers to lease iterations from, created if it does not exist.",
+)
+parser.add_argument(
+    "--resume", dest="resume", action="store_true",
+    help="Continue the dataset in the output directory after its last completed iteration.",
+)
 parser.add_argument(
     "--cycles-device", dest="cycles_device", type=str, required=False, default='CPU',
     help="The rendering device for Cycles to use.",
 )
 args = parser.parse_args(argv)
-generate_dataset.run(args.size, args.max_retries, args.config, args.output_dir)
+generate_dataset.run(args.size, args.max_retries, args.config, args.output_dir, args.crack_bank, args.resume,
+                     args.start_index, args.threads, args.queue)
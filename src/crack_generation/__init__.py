@@ -1,2 +1,6 @@
-from .crack_generator import CrackGenerator
+from .crack_generator import CrackGenerator, parameters_key
 from .surface_generation import create_surface_from_image
+from .procedural_surface import create_procedural_surface
+from .surface_cache import load_or_create_surface
+from .surface_pyramid import create_surface_pyramid
+from .crack_producer import produce_cracks, SharedSurface
@@ -0,0 +1,218 @@
+import json
+import os
+import shutil
+import tempfile
+import uuid
+from typing import Iterable, Union
+
+import numpy as np
+
+from crack_generation.model import Crack, CrackPath, CrackHeightMap
+
+CRACK_BANK_VERSION = 1
+CRACK_BANK_METADATA_FILE = 'bank.json'
+SHARD_INDEX_FILE = 'index.npy'
+SHARD_PREFIX = 'shard-'
+DEFAULT_SHARD_SIZE = 256
+NO_SEED = -1  # Seed stored for cracks that cannot be regenerated on their own
+
+# One entry per crack in a shard. The start and count fields point into the concatenated arrays of the shard.
+CRACK_INDEX_DTYPE = np.dtype([
+    ('seed', np.int64),
+    ('pixel_start', np.int64),
+    ('pixel_count', np.int64),
+    ('path_start', np.int64),
+    ('path_count', np.int64),
+    ('trajectory_start', np.int64),
+    ('trajectory_count', np.int64),
+    ('bbox', np.int32, (4,)),  # min x, min y, max x, max y (exclusive) of the crack height map region of interest
+    ('height_sum', np.float64),  # sum of the height values, as used for the minimum active pixels of the labels
+    ('coverage', np.float64),  # fraction of the surface pixels covered by the crack
+])
+
+
+def crack_bank_directory(bank_directory: str, surface_key: str, parameters_key: str) -> str:
+    """Get the directory of the cracks of one surface, generated with one set of parameters, within a bank."""
+    return os.path.join(bank_directory, surface_key, parameters_key)
+
+
+def write_crack_shard(cracks: list[Crack], directory: str) -> str:
+    """
+    Write cracks to a new shard in a directory and return its path. Height maps are stored sparsely, as the flat
+    indices and values of the non-zero pixels within their region of interest.
+    The shard is written to a temporary directory first, such that readers never see a partially written shard.
+    """
+    index = np.zeros(len(cracks), dtype=CRACK_INDEX_DTYPE)
+    pixels, values, paths, trajectories = [], [], [], []
+    pixel_start = path_start = trajectory_start = 0
+    for crack_idx, crack in enumerate(cracks):
+        height_map = crack.crack_height_map
+        crack_pixels = np.flatnonzero(height_map.values)
+        trajectory = np.array(crack.trajectory, dtype=np.int32).reshape(-1, 2)
+        height, width = height_map.values.shape
+        min_x, min_y = height_map.offset
+
+        entry = index[crack_idx]
+        entry['seed'] = NO_SEED if crack.seed is None else crack.seed
+        entry['pixel_start'], entry['pixel_count'] = pixel_start, crack_pixels.shape[0]
+        entry['path_start'], entry['path_count'] = path_start, len(crack.path)
+        entry['trajectory_start'], entry['trajectory_count'] = trajectory_start, trajectory.shape[0]
+        entry['bbox'] = (min_x, min_y, min_x + width, min_y + height)
+        entry['height_sum'] = height_map.sum()
+        entry['coverage'] = crack_pixels.shape[0] / (height_map.shape[0] * height_map.shape[1])
+
+        pixels.append(crack_pixels)
+        values.append(height_map.values.ravel()[crack_pixels].astype(np.float32))
+        paths.append(crack.path)
+        trajectories.append(trajectory)
+        pixel_start += crack_pixels.shape[0]
+        path_start += len(crack.path)
+        trajectory_start += trajectory.shape[0]
+
+    path = CrackPath.concatenate(paths)
+    arrays = {
+        'pixels': np.concatenate(pixels).astype(np.int64),
+        'values': np.concatenate(values),
+        'path_x': path.x,
+        'path_y': path.y,
+        'path_angle': path.angle,
+        'path_width': path.width,
+        'trajectory': np.concatenate(trajectories),
+    }
+
+    temporary_directory = tempfile.mkdtemp(prefix=f'.{SHARD_PREFIX}', dir=directory)
+    try:
+        for name, array in arrays.items():
+            np.save(os.path.join(temporary_directory, f'{name}.npy'), array)
+        np.save(os.path.join(temporary_directory, SHARD_INDEX_FILE), index)
+
+        shard_directory = os.path.join(directory, f'{SHARD_PREFIX}{uuid.uuid4().hex}')
+        os.rename(temporary_directory, shard_directory)
+    except OSError:
+        shutil.rmtree(temporary_directory, ignore_errors=True)
+        raise
+
+    return shard_directory
+
+
+def fill_crack_bank(
+    cracks: Iterable[Crack],
+    directory: str,
+    surface_shape: tuple[int, int],
+    shard_size: int = DEFAULT_SHARD_SIZE
+) -> int:
+    """
+    Add cracks of one surface to a bank directory, writing a shard for every shard_size cracks.
+    Multiple processes can fill the same directory at once. Returns the number of written cracks.
+    """
+    os.makedirs(directory, exist_ok=True)
+    metadata_path = os.path.join(directory, CRACK_BANK_METADATA_FILE)
+    if not os.path.isfile(metadata_path):
+        with open(metadata_path, 'w') as metadata_file:
+            json.dump({'version': CRACK_BANK_VERSION, 'shape': list(surface_shape)}, metadata_file)
+
+    num_written = 0
+    shard = []
+    for crack in cracks:
+        shard.append(crack)
+        if len(shard) == shard_size:
+            write_crack_shard(shard, directory)
+            num_written += len(shard)
+            shard = []
+
+    if len(shard) > 0:
+        write_crack_shard(shard, directory)
+        num_written += len(shard)
+    return num_written
+
+
+class CrackBank:
+    """
+    Read access to the precomputed cracks of one surface in a bank directory.
+    The indices of all shards are loaded at once, while the crack data itself is memory mapped on demand.
+    """
+
+    directory: str
+    shape: tuple[int, int]  # (height, width) of the surface
+    index: np.array  # Index entries of all cracks, see CRACK_INDEX_DTYPE
+
+    def __init__(self, directory: str):
+        metadata_path = os.path.join(directory, CRACK_BANK_METADATA_FILE)
+        if not os.path.isfile(metadata_path):
+            raise FileNotFoundError(f'No crack bank found in {directory}')
+        with open(metadata_path, 'r') as metadata_file:
+            metadata = json.load(metadata_file)
+        if metadata['version'] != CRACK_BANK_VERSION:
+            raise ValueError(f'Crack bank in {directory} has version {metadata["version"]}, expected {CRACK_BANK_VERSION}')
+
+        self.directory = directory
+        self.shape = tuple(metadata['shape'])
+        self._shard_directories = sorted(
+            os.path.join(directory, name) for name in os.listdir(directory) if name.startswith(SHARD_PREFIX)
+        )
+        self._shards = {}
+
+        indices = [np.load(os.path.join(shard, SHARD_INDEX_FILE)) for shard in self._shard_directories]
+        self.index = np.concatenate(indices) if len(indices) > 0 else np.zeros(0, dtype=CRACK_INDEX_DTYPE)
+        self._shard_ids = np.repeat(np.arange(len(indices)), [index.shape[0] for index in indices])
+
+    def select(self, min_height_sum: float = 0., min_coverage: float = 0., max_coverage: float = 1.) -> np.array:
+        """Get the indices of the cracks with a minimum height sum and a coverage within the given bounds."""
+        return np.flatnonzero(
+            (self.index['height_sum'] >= min_height_sum) &
+            (self.index['coverage'] >= min_coverage) &
+            (self.index['coverage'] <= max_coverage)
+        )
+
+    def sample(
+        self,
+        min_height_sum: float = 0.,
+        min_coverage: float = 0.,
+        max_coverage: float = 1.,
+        rng: Union[np.random.Generator, None] = None
+    ) -> Crack:
+        """Draw a random crack that satisfies the filters. Without a generator, the global NumPy random state is used."""
+        candidates = self.select(min_height_sum, min_coverage, max_coverage)
+        if candidates.shape[0] == 0:
+            raise ValueError(f'No cracks in {self.directory} satisfy the filters')
+
+        rank = np.random.randint(candidates.shape[0]) if rng is None else rng.integers(candidates.shape[0])
+        return self[int(candidates[rank])]
+
+    def _load_shard(self, shard_id: int) -> dict[str, np.array]:
+        """Memory map the arrays of a shard."""
+        if shard_id not in self._shards:
+            shard_directory = self._shard_directories[shard_id]
+            self._shards[shard_id] = {
+                os.path.splitext(name)[0]: np.load(os.path.join(shard_directory, name), mmap_mode='r')
+                for name in os.listdir(shard_directory) if name != SHARD_INDEX_FILE
+            }
+        return self._shards[shard_id]
+
+    def __len__(self) -> int:
+        return self.index.shape[0]
+
+    def __getitem__(self, idx: int) -> Crack:
+        """Load a crack from the bank."""
+        entry = self.index[idx]
+        shard = self._load_shard(int(self._shard_ids[idx]))
+        min_x, min_y, max_x, max_y = (int(value) for value in entry['bbox'])
+
+        pixels = slice(entry['pixel_start'], entry['pixel_start'] + entry['pixel_count'])
+        values = np.zeros((max_y - min_y, max_x - min_x), dtype=np.float64)
+        values.ravel()[shard['pixels'][pixels]] = shard['values'][pixels]
+
+        path = slice(entry['path_start'], entry['path_start'] + entry['path_count'])
+        trajectory = slice(entry['trajectory_start'], entry['trajectory_start'] + entry['trajectory_count'])
+
+        return Crack(
+            CrackPath(
+                np.array(shard['path_x'][path]),
+                np.array(shard['path_y'][path]),
+                np.array(shard['path_angle'][path]),
+                np.array(shard['path_width'][path])
+            ),
+            [(int(x), int(y)) for x, y in shard['trajectory'][trajectory]],
+            CrackHeightMap(values, (min_x, min_y), self.shape),
+            None if entry['seed'] == NO_SEED else int(entry['seed'])
+        )
@@ -1,46 +1,425 @@
-from crack_generation.model import Surface, Crack
+import hashlib
+import json
+from contextlib import contextmanager, nullcontext
+from dataclasses import asdict, replace
+from typing import ContextManager, Iterator, Union
+
+import numpy as np
+
+from crack_generation.model import Surface, SurfacePyramid, Crack, CrackPath, Point, WorkBudget, BudgetExceeded, \
+    GenerationStats
+from crack_generation.crack_layout import place_cracks
 from crack_generation.model.parameters import CrackGenerationParameters
-from crack_generation.path_functions import generate_pivot_trajectory, generate_path, remove_non_increasing_points, \
-    smooth_path_gaussian, smooth_path_moving_average, on_edge, shrink_path_end, create_height_map_from_path
+from crack_generation.path_functions import generate_pivot_trajectory, extend_pivot_trajectory, generate_path, \
+    generate_path_fast, generate_paths_batch, generate_branch_trajectory, RandomBlock, lift_path, lift_position, \
+    remove_non_increasing_points, smooth_path_gaussian, smooth_path_moving_average, on_edge, within_surface, \
+    shrink_path_end, estimate_crack_area, max_crack_height_sum, create_height_map_from_path
+
+MAX_TRAJECTORY_EXTENSIONS = 32  # Maximum number of pivot points added to a single trajectory in targeted mode
+
+
+def parameters_key(parameters: CrackGenerationParameters) -> str:
+    """
+    Create a hash of the generation parameters. Together with the surface and a seed, it identifies a crack.
+    The layout parameters only determine how single cracks are combined, so they are left out.
+    """
+    values = asdict(parameters)
+    del values['layout_parameters']
+    return hashlib.sha256(json.dumps(values, sort_keys=True).encode()).hexdigest()
+
+
+def create_rng(seed: Union[int, np.random.Generator, None]) -> tuple[Union[int, None], np.random.Generator]:
+    """
+    Create the random generator for a crack, returning the seed it was created from as well.
+    Without a seed, one is drawn from the global NumPy random state. A given generator is used as is, without a seed.
+    """
+    if isinstance(seed, np.random.Generator):
+        return None, seed
+    if seed is None:
+        seed = int(np.random.randint(np.iinfo(np.int64).max, dtype=np.int64))
+    return seed, np.random.default_rng(seed)
+
+
+def record_stage(stats: Union[GenerationStats, None], name: str) -> ContextManager:
+    """Record a stage of generation in the stats, if given."""
+    return stats.stage(name) if stats is not None else nullcontext()
+
+
+@contextmanager
+def record_crack(stats: Union[GenerationStats, None]) -> Iterator[Union[GenerationStats, None]]:
+    """
+    Record the generation of a single crack in fresh stats, if aggregate stats are given. The stats of the crack are
+    added to the aggregate once done, also when generation fails or runs out of its budget.
+    """
+    if stats is None:
+        yield None
+        return
+    crack_stats = GenerationStats(trace_memory=stats.trace_memory)
+    try:
+        yield crack_stats
+    finally:
+        stats.add(crack_stats)
 
 
 class CrackGenerator:
-    """Callable generator class for generating cracks in surfaces."""
+    """
+    Callable generator class for generating cracks in surfaces.
+    All randomness is drawn from an explicit random generator per crack, so generators can be used from multiple
+    threads.
+    Generation can be limited by a work budget, in which case a BudgetExceeded result is returned when it runs out.
+    Passing a stats object aggregates the time spent in every stage, while every crack gets the stats of its own.
+    """
 
     parameters: CrackGenerationParameters
 
     def __init__(self, parameters: CrackGenerationParameters):
         self.parameters = parameters
 
-    def __call__(self, surface: Surface) -> Crack:
-        """Generate a crack for the provided surface with the set parameters."""
-        start_point, pivot_points = generate_pivot_trajectory(surface, self.parameters)
-        all_points = [start_point]
+    def __call__(
+        self,
+        surface: Surface,
+        seed: Union[int, np.random.Generator, None] = None,
+        budget: Union[WorkBudget, None] = None,
+        stats: Union[GenerationStats, None] = None
+    ) -> Union[Crack, BudgetExceeded]:
+        """Generate a crack for the provided surface with the set parameters, drawing all randomness from the seed."""
+        seed, rng = create_rng(seed)
+        with record_crack(stats) as crack_stats:
+            if budget is not None:
+                budget.attempts += 1
+            with record_stage(crack_stats, 'trajectory'):
+                start_point, pivot_points = generate_pivot_trajectory(surface, self.parameters, rng)
+            path = self.generate_crack_path(start_point, pivot_points, surface, rng, budget, crack_stats)
+            if budget is not None and budget.exceeded():
+                return BudgetExceeded.from_budget(budget)
+
+            crack = self.create_crack(path, pivot_points, surface, rng, crack_stats)
+            crack.seed = seed
+            if crack_stats is not None:
+                crack_stats.cracks += 1
+            return crack
+
+    def generate_with_coverage(
+        self,
+        surface: Surface,
+        min_height_sum: float,
+        targeted: bool = False,
+        seed: Union[int, np.random.Generator, None] = None,
+        budget: Union[WorkBudget, None] = None,
+        stats: Union[GenerationStats, None] = None
+    ) -> Union[Crack, BudgetExceeded]:
+        """
+        Generate a crack of which the height map sums to at least min_height_sum, retrying until one does.
+        Paths that cannot reach the target, even when all pixels around them are as deep as the depth profile allows,
+        are rejected before their height map is rasterized.
+        Without targeting, the accepted crack is the same as calling the generator with its seed. In targeted mode, the
+        trajectory of a crack that falls short is extended with new pivot points instead, and the crack has no seed.
+        The height sum per area of a crack that fell short is then used to predict when to rasterize it again.
+        The stats of the crack include its rejected attempts.
+        """
+        _, rng = create_rng(seed)
+        with record_crack(stats) as crack_stats:
+            return self._generate_with_coverage(surface, min_height_sum, targeted, rng, budget, crack_stats)
+
+    def _generate_with_coverage(
+        self,
+        surface: Surface,
+        min_height_sum: float,
+        targeted: bool,
+        rng: np.random.Generator,
+        budget: Union[WorkBudget, None],
+        stats: Union[GenerationStats, None]
+    ) -> Union[Crack, BudgetExceeded]:
+        """Generate a crack that reaches the height sum, recording all attempts in the stats of the crack."""
+        while True:
+            crack_seed, crack_rng = create_rng(int(rng.integers(np.iinfo(np.int64).max)))
+            if budget is not None:
+                budget.attempts += 1
+            with record_stage(stats, 'trajectory'):
+                start_point, pivot_points = generate_pivot_trajectory(surface, self.parameters, crack_rng)
+            raw_path = self.generate_crack_path(start_point, pivot_points, surface, crack_rng, budget, stats)
+            height_sum_per_area = None  # Measured once a crack of the trajectory is rasterized
+
+            for _ in range(MAX_TRAJECTORY_EXTENSIONS + 1):
+                if budget is not None and budget.exceeded():
+                    return BudgetExceeded.from_budget(budget)
+
+                path = self.postprocess_path(raw_path.copy() if targeted else raw_path, surface, crack_rng, stats)
+                area = estimate_crack_area(path)
+                if height_sum_per_area is None:
+                    reachable_height_sum = max_crack_height_sum(path, self.parameters.dimension_parameters)
+                else:
+                    reachable_height_sum = area * height_sum_per_area
+                if reachable_height_sum >= min_height_sum:
+                    with record_stage(stats, 'rasterization'):
+                        height_map = create_height_map_from_path(path, surface, self.parameters.dimension_parameters)
+                    if height_map.sum() >= min_height_sum:
+                        if stats is not None:
+                            stats.cracks += 1
+                        return Crack(path, pivot_points, height_map, None if targeted else crack_seed, stats)
+                    height_sum_per_area = height_map.sum() / area
+
+                # Extend the trajectory, unless it already left the surface or the crack stopped growing
+                left_surface = len(pivot_points) > 0 and not within_surface(Point(0, 0, pivot_points[-1]), surface)
+                if not targeted or left_surface:
+                    break
+                with record_stage(stats, 'trajectory'):
+                    pivot_point = extend_pivot_trajectory(
+                        start_point, pivot_points, surface, self.parameters, crack_rng
+                    )
+                extension = self.generate_crack_path(raw_path[-1], [pivot_point], surface, crack_rng, budget, stats)[1:]
+                if len(extension) == 0:
+                    break
+                pivot_points = pivot_points + [pivot_point]
+                raw_path = CrackPath.concatenate([raw_path, extension])
+
+    def generate_layout(
+        self,
+        surface: Surface,
+        min_height_sum: float = 0.,
+        seed: Union[int, np.random.Generator, None] = None,
+        budget: Union[WorkBudget, None] = None,
+        stats: Union[GenerationStats, None] = None
+    ) -> Union[Crack, BudgetExceeded]:
+        """
+        Place multiple cracks that do not overlap, each with optional branches, on the surface following the layout
+        parameters, merged into a single crack. Every crack on its own reaches the minimum height sum.
+        With the default layout of one crack without branches, this is the same as generate_with_coverage.
+        The merged crack gets the stats of the placed cracks and their branches.
+        """
+        _, rng = create_rng(seed)
+
+        def generate_crack_with_branches() -> Union[Crack, BudgetExceeded]:
+            crack = self.generate_with_coverage(
+                surface,
+                min_height_sum,
+                seed=int(rng.integers(np.iinfo(np.int64).max)),
+                budget=budget,
+                stats=stats
+            )
+            if isinstance(crack, BudgetExceeded):
+                return crack
+            return self.add_branches(crack, surface, rng, budget, stats)
+
+        return place_cracks(generate_crack_with_branches, surface.height_map.shape, self.parameters.layout_parameters)
+
+    def add_branches(
+        self,
+        crack: Crack,
+        surface: Surface,
+        rng: np.random.Generator,
+        budget: Union[WorkBudget, None] = None,
+        stats: Union[GenerationStats, None] = None
+    ) -> Union[Crack, BudgetExceeded]:
+        """
+        Randomly add branches to a crack following the layout parameters. Returns the crack as is without branches.
+        Every branch gets stats of its own, which are merged into those of the crack.
+        """
+        layout_parameters = self.parameters.layout_parameters
+        branches = []
+        for _ in range(layout_parameters.max_branches):
+            if len(crack.path) < 2 or rng.random() >= layout_parameters.branch_chance:
+                continue
+            with record_crack(stats) as branch_stats:
+                with record_stage(branch_stats, 'trajectory'):
+                    start_point, pivot_points = generate_branch_trajectory(crack.path, surface, layout_parameters, rng)
+                path = self.generate_crack_path(start_point, pivot_points, surface, rng, budget, branch_stats)
+                if budget is not None and budget.exceeded():
+                    return BudgetExceeded.from_budget(budget)
+                if len(path) > 1:
+                    branches.append(self.create_crack(path, pivot_points, surface, rng, branch_stats))
+
+        return Crack.merge([crack] + branches)
+
+    def generate_crack_path(
+        self,
+        start_point: Point,
+        pivot_points: list[tuple[int, int]],
+        surface: Surface,
+        rng: np.random.Generator,
+        budget: Union[WorkBudget, None] = None,
+        stats: Union[GenerationStats, None] = None
+    ) -> CrackPath:
+        """
+        Generate the raw path of a crack that starts at the start point and follows the pivot points.
+        When the work budget is exceeded, the path generated so far is returned.
+        """
+        current_point = start_point
+        paths = [CrackPath.from_points([start_point])]
+        random_block = RandomBlock(rng)
+        path_parameters = self.parameters.path_parameters
 
         # Generate a path from pivot point to pivot point
         for pivot_point in pivot_points:
-            all_points += generate_path(all_points[-1], pivot_point, surface, self.parameters.path_parameters)
+            with record_stage(stats, 'path'):
+                if path_parameters.engine == 'fast':
+                    path = generate_path_fast(
+                        current_point, pivot_point, surface, path_parameters, random_block, budget, stats
+                    )
+                else:
+                    path = generate_path(current_point, pivot_point, surface, path_parameters, rng, budget, stats)
+            paths.append(path)
+            current_point = path[-1] if len(path) > 0 else current_point
 
-        # Post process the crack
-        all_points = remove_non_increasing_points(
-            all_points,
-            self.parameters.path_parameters.distance_improvement_threshold
-        )
+            if budget is not None:
+                budget.paths += 1
+                if budget.exceeded():
+                    break
+
+        return CrackPath.concatenate(paths)
+
+    def generate_from_pyramid(
+        self,
+        pyramid: SurfacePyramid,
+        level: int = -1,
+        refine: bool = True,
+        seed: Union[int, np.random.Generator, None] = None,
+        budget: Union[WorkBudget, None] = None,
+        stats: Union[GenerationStats, None] = None
+    ) -> Union[Crack, BudgetExceeded]:
+        """
+        Generate a crack for the full resolution surface of a pyramid by planning its trajectory and path on a coarser
+        level. The path is lifted to full resolution and optionally refined to stay in the mortar, before post
+        processing.
+        """
+        seed, rng = create_rng(seed)
+        with record_crack(stats) as crack_stats:
+            return self._generate_from_pyramid(pyramid, level, refine, seed, rng, budget, crack_stats)
 
-        if self.parameters.path_parameters.smoothing_type == 'gaussian':
-            all_points = smooth_path_gaussian(all_points, self.parameters.path_parameters.smoothing)
-        if self.parameters.path_parameters.smoothing_type == 'moving_average':
-            all_points = smooth_path_moving_average(all_points, self.parameters.path_parameters.smoothing)
+    def _generate_from_pyramid(
+        self,
+        pyramid: SurfacePyramid,
+        level: int,
+        refine: bool,
+        seed: Union[int, None],
+        rng: np.random.Generator,
+        budget: Union[WorkBudget, None],
+        stats: Union[GenerationStats, None]
+    ) -> Union[Crack, BudgetExceeded]:
+        """Generate a crack on a coarser level of the pyramid, recording it in the stats of the crack."""
+        surface = pyramid.levels[0]
+        coarse_surface = pyramid.levels[level]
+        scale = coarse_surface.height_map.shape[1] / surface.height_map.shape[1]
+        coarse_generator = CrackGenerator(self.scaled_parameters(scale))
 
-        if not on_edge(all_points[-1], surface) and all_points[-1].width > self.parameters.path_parameters.min_width:
-            all_points = shrink_path_end(
-                all_points,
-                self.parameters.path_parameters.min_width,
-                self.parameters.path_parameters.max_width_grow
+        if budget is not None:
+            budget.attempts += 1
+        with record_stage(stats, 'trajectory'):
+            start_point, pivot_points = generate_pivot_trajectory(coarse_surface, coarse_generator.parameters, rng)
+        path = coarse_generator.generate_crack_path(start_point, pivot_points, coarse_surface, rng, budget, stats)
+        if budget is not None and budget.exceeded():
+            return BudgetExceeded.from_budget(budget)
+
+        with record_stage(stats, 'snapping'):
+            path = lift_path(path, coarse_surface, surface, refine)
+        crack = self.create_crack(
+            path,
+            [lift_position(pivot_point, coarse_surface, surface) for pivot_point in pivot_points],
+            surface,
+            rng,
+            stats
+        )
+        crack.seed = seed
+        if stats is not None:
+            stats.cracks += 1
+        return crack
+
+    def scaled_parameters(self, scale: float) -> CrackGenerationParameters:
+        """Get the parameters with all pixel sizes scaled, for generating on a surface of a different resolution."""
+        path_parameters = self.parameters.path_parameters
+        return replace(
+            self.parameters,
+            dimension_parameters=replace(
+                self.parameters.dimension_parameters,
+                width=self.parameters.dimension_parameters.width * scale
+            ),
+            path_parameters=replace(
+                path_parameters,
+                step_size=path_parameters.step_size * scale,
+                min_distance=path_parameters.min_distance * scale,
+                min_width=path_parameters.min_width * scale,
+                max_width_grow=path_parameters.max_width_grow * scale
             )
+        )
 
-        return Crack(
-            all_points,
-            pivot_points,
-            create_height_map_from_path(all_points, surface, self.parameters.dimension_parameters)
+    def generate_batch(
+        self,
+        surface: Surface,
+        num_cracks: int,
+        seed: Union[int, np.random.Generator, None] = None,
+        budget: Union[WorkBudget, None] = None
+    ) -> Union[list[Crack], BudgetExceeded]:
+        """
+        Generate multiple cracks for the provided surface with the set parameters.
+        The paths of all cracks are generated at the same time, which is much faster than generating them one by one.
+        All cracks share one random generator, so they can only be regenerated together and have no seed of their own.
+        """
+        _, rng = create_rng(seed)
+        if budget is not None:
+            budget.attempts += num_cracks
+        trajectories = [generate_pivot_trajectory(surface, self.parameters, rng) for _ in range(num_cracks)]
+        start_points = [start_point for start_point, _ in trajectories]
+        paths = generate_paths_batch(
+            start_points,
+            [pivot_points for _, pivot_points in trajectories],
+            surface,
+            self.parameters.path_parameters,
+            rng,
+            budget
         )
+        if budget is not None and budget.exceeded():
+            return BudgetExceeded.from_budget(budget)
+
+        return [
+            self.create_crack(
+                CrackPath.concatenate([CrackPath.from_points([start_point]), path]),
+                pivot_points,
+                surface,
+                rng
+            )
+            for (start_point, pivot_points), path in zip(trajectories, paths)
+        ]
+
+    def create_crack(
+        self,
+        path: CrackPath,
+        pivot_points: list[tuple[int, int]],
+        surface: Surface,
+        rng: np.random.Generator,
+        stats: Union[GenerationStats, None] = None
+    ) -> Crack:
+        """Post process a generated path and apply it to the surface. The stats are attached to the crack."""
+        path = self.postprocess_path(path, surface, rng, stats)
+        with record_stage(stats, 'rasterization'):
+            height_map = create_height_map_from_path(path, surface, self.parameters.dimension_parameters)
+        return Crack(path, pivot_points, height_map, stats=stats)
+
+    def postprocess_path(
+        self,
+        path: CrackPath,
+        surface: Surface,
+        rng: np.random.Generator,
+        stats: Union[GenerationStats, None] = None
+    ) -> CrackPath:
+        """Filter, smooth and shrink a generated path. This can change the path in place."""
+        with record_stage(stats, 'filtering'):
+            path = remove_non_increasing_points(
+                path,
+                self.parameters.path_parameters.distance_improvement_threshold
+            )
+
+        with record_stage(stats, 'smoothing'):
+            if self.parameters.path_parameters.smoothing_type == 'gaussian':
+                path = smooth_path_gaussian(path, self.parameters.path_parameters.smoothing)
+            if self.parameters.path_parameters.smoothing_type == 'moving_average':
+                path = smooth_path_moving_average(path, self.parameters.path_parameters.smoothing)
+
+        with record_stage(stats, 'shrinking'):
+            if not on_edge(path[-1], surface) and path[-1].width > self.parameters.path_parameters.min_width:
+                path = shrink_path_end(
+                    path,
+                    self.parameters.path_parameters.min_width,
+                    self.parameters.path_parameters.max_width_grow,
+                    rng
+                )
+        return path
@@ -0,0 +1,55 @@
+from typing import Callable, Union
+
+import cv2
+import numpy as np
+
+from crack_generation.model import Crack, CrackHeightMap, BudgetExceeded
+from crack_generation.model.parameters import CrackLayoutParameters
+
+
+def spaced_crack_region(height_map: CrackHeightMap, spacing: int) -> tuple[tuple[slice, slice], np.array]:
+    """
+    Get the region of a crack within the surface, grown by the spacing, and the mask of the crack pixels within it
+    dilated by the spacing.
+    """
+    surface_height, surface_width = height_map.shape
+    x, y = height_map.offset
+    height, width = height_map.values.shape
+    min_x, min_y = max(x - spacing, 0), max(y - spacing, 0)
+    max_x, max_y = min(x + width + spacing, surface_width), min(y + height + spacing, surface_height)
+
+    mask = np.zeros((max_y - min_y, max_x - min_x), dtype=np.uint8)
+    mask[y - min_y:y - min_y + height, x - min_x:x - min_x + width] = height_map.values > 0
+    if spacing > 0:
+        mask = cv2.dilate(mask, cv2.getStructuringElement(cv2.MORPH_ELLIPSE, (2 * spacing + 1, 2 * spacing + 1)))
+    return (slice(min_y, max_y), slice(min_x, max_x)), mask > 0
+
+
+def place_cracks(
+    generate_crack: Callable[[], Union[Crack, BudgetExceeded]],
+    shape: tuple[int, int],
+    parameters: CrackLayoutParameters
+) -> Union[Crack, BudgetExceeded]:
+    """
+    Place up to num_cracks cracks on a surface of the given shape, keeping them at least min_crack_spacing apart, and
+    merge them into one crack. An occupancy map of the placed cracks is used to reject cracks that come too close.
+    A crack that cannot be placed within max_placement_attempts is skipped. When crack generation runs out of its
+    budget, placing stops and the exceeded budget is returned, like for single cracks.
+    """
+    occupancy = np.zeros(shape, dtype=bool)
+    cracks = []
+    for _ in range(parameters.num_cracks):
+        for _ in range(parameters.max_placement_attempts):
+            crack = generate_crack()
+            if isinstance(crack, BudgetExceeded):
+                return crack
+
+            # The occupancy holds the crack pixels themselves, so only the new crack has to be grown by the spacing
+            region, mask = spaced_crack_region(crack.crack_height_map, parameters.min_crack_spacing)
+            if not np.any(occupancy[region] & mask):
+                crack_region, crack_mask = spaced_crack_region(crack.crack_height_map, 0)
+                occupancy[crack_region] |= crack_mask
+                cracks.append(crack)
+                break
+
+    return Crack.merge(cracks)
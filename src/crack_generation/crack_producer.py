@@ -0,0 +1,122 @@
+import mmap
+import os
+from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, wait
+from dataclasses import fields
+from multiprocessing import shared_memory
+from typing import Iterator, Union
+
+import numpy as np
+
+from crack_generation.crack_generator import CrackGenerator, create_rng
+from crack_generation.model import Crack, Surface
+from crack_generation.model.parameters import CrackGenerationParameters
+
+IN_FLIGHT_PER_WORKER = 2  # Default number of cracks that are queued per worker, to keep workers busy between results
+
+# State of a worker process, set once by the pool initializer
+_worker_generator: Union[CrackGenerator, None] = None
+_worker_surface: Union[Surface, None] = None
+_worker_blocks: list[shared_memory.SharedMemory] = []
+
+
+class SharedSurface:
+    """
+    A surface of which the arrays are placed in shared memory once, such that worker processes can attach to them
+    without copying. Memory mapped arrays, such as those of cached surfaces, are shared through their files instead.
+    Use it as a context manager to release the shared memory afterwards.
+    """
+
+    spec: dict[str, tuple]  # Picklable description of every surface field, used to attach to the surface
+
+    def __init__(self, surface: Surface):
+        self.spec = {}
+        self._blocks = []
+        for field in fields(Surface):
+            value = getattr(surface, field.name)
+            if isinstance(value, np.memmap) and isinstance(value.base, mmap.mmap):
+                self.spec[field.name] = ('memmap', value.filename, value.offset, value.shape, value.dtype.str)
+            elif isinstance(value, np.ndarray):
+                block = shared_memory.SharedMemory(create=True, size=max(value.nbytes, 1))
+                np.ndarray(value.shape, dtype=value.dtype, buffer=block.buf)[...] = value
+                self._blocks.append(block)
+                self.spec[field.name] = ('shared_memory', block.name, value.shape, value.dtype.str)
+            else:
+                self.spec[field.name] = ('value', value)
+
+    def close(self) -> None:
+        """Release the shared memory. Processes that are still attached keep their mapping until they detach."""
+        for block in self._blocks:
+            block.close()
+            block.unlink()
+        self._blocks = []
+
+    def __enter__(self) -> 'SharedSurface':
+        return self
+
+    def __exit__(self, *args) -> None:
+        self.close()
+
+
+def attach_surface(spec: dict[str, tuple]) -> tuple[Surface, list[shared_memory.SharedMemory]]:
+    """Attach to a shared surface from its spec. The returned shared memory blocks must be kept open while in use."""
+    values, blocks = {}, []
+    for name, (kind, *description) in spec.items():
+        if kind == 'memmap':
+            filename, offset, shape, dtype = description
+            values[name] = np.memmap(filename, dtype=np.dtype(dtype), mode='r', offset=offset, shape=shape)
+        elif kind == 'shared_memory':
+            block_name, shape, dtype = description
+            block = shared_memory.SharedMemory(name=block_name)
+            blocks.append(block)
+            values[name] = np.ndarray(shape, dtype=np.dtype(dtype), buffer=block.buf)
+        else:
+            values[name] = description[0]
+
+    return Surface(**values), blocks
+
+
+def _initialize_worker(spec: dict[str, tuple], parameters: CrackGenerationParameters) -> None:
+    """Attach a worker process to the shared surface and create its crack generator."""
+    global _worker_generator, _worker_surface, _worker_blocks
+    _worker_surface, _worker_blocks = attach_surface(spec)
+    _worker_generator = CrackGenerator(parameters)
+
+
+def _generate_crack(seed: int) -> Crack:
+    """Generate a crack in a worker process."""
+    return _worker_generator(_worker_surface, seed)
+
+
+def produce_cracks(
+    surface: Surface,
+    parameters: CrackGenerationParameters,
+    num_cracks: Union[int, None] = None,
+    num_workers: Union[int, None] = None,
+    max_in_flight: Union[int, None] = None,
+    seed: Union[int, np.random.Generator, None] = None
+) -> Iterator[Crack]:
+    """
+    Generate cracks for a surface on a pool of worker processes, yielding them in order of completion.
+    Every crack gets its own seed drawn from the given seed, so the produced cracks can be regenerated one by one.
+    At most max_in_flight cracks are queued at a time. Without a number of cracks, cracks are produced until the
+    iterator is closed.
+    """
+    _, rng = create_rng(seed)
+    num_workers = os.cpu_count() if num_workers is None else num_workers
+    max_in_flight = IN_FLIGHT_PER_WORKER * num_workers if max_in_flight is None else max_in_flight
+
+    with SharedSurface(surface) as shared_surface:
+        executor = ProcessPoolExecutor(num_workers, initializer=_initialize_worker, initargs=(shared_surface.spec, parameters))
+        try:
+            pending = set()
+            num_submitted = 0
+            while num_cracks is None or num_submitted < num_cracks or pending:
+                while (num_cracks is None or num_submitted < num_cracks) and len(pending) < max_in_flight:
+                    pending.add(executor.submit(_generate_crack, int(rng.integers(np.iinfo(np.int64).max))))
+                    num_submitted += 1
+
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    yield future.result()
+        finally:
+            executor.shutdown(wait=True, cancel_futures=True)
@@ -1,3 +1,9 @@
 from .surface import Surface
+from .surface_pyramid import SurfacePyramid
 from .crack import Crack
+from .crack_path import CrackPath
+from .crack_height_map import CrackHeightMap
 from .point import Point
+from .work_budget import WorkBudget
+from .budget_exceeded import BudgetExceeded
+from .generation_stats import GenerationStats
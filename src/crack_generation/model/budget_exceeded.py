@@ -0,0 +1,20 @@
+from dataclasses import dataclass
+
+from .work_budget import WorkBudget
+
+
+@dataclass
+class BudgetExceeded:
+    """
+    Result of a crack generation that ran out of its work budget, with the counters of how far it got.
+    """
+
+    steps: int
+    paths: int
+    attempts: int
+    elapsed_seconds: float
+
+    @classmethod
+    def from_budget(cls, budget: WorkBudget) -> 'BudgetExceeded':
+        """Create the result from the counters of an exceeded budget."""
+        return cls(budget.steps, budget.paths, budget.attempts, budget.elapsed_seconds())
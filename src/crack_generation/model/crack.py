@@ -1,16 +1,43 @@
-import numpy as np
-
 from dataclasses import dataclass
-from .point import Point
+from typing import Union
+
+from .crack_height_map import CrackHeightMap
+from .crack_path import CrackPath
+from .generation_stats import GenerationStats
 
 
 @dataclass
 class Crack:
     """
     A generated crack, consisting of its 2D path and its path applied to the surface.
+    Together with the surface and the generation parameters, the seed fully identifies the crack when it is set.
+    The stats are only set when the crack was generated with instrumentation.
     """
 
-    path: list[Point]
+    path: CrackPath
     trajectory: list[tuple[int, int]]
-    crack_height_map: np.array
+    crack_height_map: CrackHeightMap
+    seed: Union[int, None] = None
+    stats: Union[GenerationStats, None] = None
+
+    @classmethod
+    def merge(cls, cracks: list['Crack']) -> 'Crack':
+        """
+        Merge cracks of the same surface into one crack with all their paths, height maps and stats.
+        The merged crack cannot be regenerated from a single seed, so it has none. A single crack is returned as is.
+        """
+        if len(cracks) == 1:
+            return cracks[0]
+        stats = None
+        if any(crack.stats is not None for crack in cracks):
+            stats = GenerationStats(trace_memory=any(crack.stats.trace_memory for crack in cracks if crack.stats))
+            for crack in cracks:
+                if crack.stats is not None:
+                    stats.add(crack.stats)
+        return cls(
+            CrackPath.concatenate([crack.path for crack in cracks]),
+            [pivot_point for crack in cracks for pivot_point in crack.trajectory],
+            CrackHeightMap.merge([crack.crack_height_map for crack in cracks]),
+            stats=stats
+        )
 
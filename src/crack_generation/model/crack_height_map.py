@@ -0,0 +1,46 @@
+from dataclasses import dataclass
+
+import numpy as np
+
+
+@dataclass
+class CrackHeightMap:
+    """
+    Height map of a crack, stored as the region of interest around the crack and its position within the surface.
+    The full size height map is only created on demand.
+    """
+
+    values: np.array  # Height values within the region of interest
+    offset: tuple[int, int]  # (x, y) position of the region of interest within the surface
+    shape: tuple[int, int]  # (height, width) of the surface
+
+    @classmethod
+    def merge(cls, height_maps: list['CrackHeightMap']) -> 'CrackHeightMap':
+        """Merge height maps of the same surface into one, taking the maximum where they overlap."""
+        min_x = min(height_map.offset[0] for height_map in height_maps)
+        min_y = min(height_map.offset[1] for height_map in height_maps)
+        max_x = max(height_map.offset[0] + height_map.values.shape[1] for height_map in height_maps)
+        max_y = max(height_map.offset[1] + height_map.values.shape[0] for height_map in height_maps)
+
+        values = np.zeros((max_y - min_y, max_x - min_x), dtype=height_maps[0].values.dtype)
+        for height_map in height_maps:
+            x, y = height_map.offset[0] - min_x, height_map.offset[1] - min_y
+            height, width = height_map.values.shape
+            np.maximum(values[y:y + height, x:x + width], height_map.values, out=values[y:y + height, x:x + width])
+        return cls(values, (min_x, min_y), height_maps[0].shape)
+
+    def to_dense(self) -> np.array:
+        """Create the height map of the full surface."""
+        dense = np.zeros(self.shape, dtype=self.values.dtype)
+        x, y = self.offset
+        height, width = self.values.shape
+        dense[y:y + height, x:x + width] = self.values
+        return dense
+
+    def sum(self) -> float:
+        """Sum of all height values."""
+        return float(np.sum(self.values))
+
+    def __array__(self, dtype=None, copy=None) -> np.array:
+        dense = self.to_dense()
+        return dense if dtype is None else dense.astype(dtype)
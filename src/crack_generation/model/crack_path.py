@@ -0,0 +1,65 @@
+from dataclasses import dataclass
+from typing import Iterator, Union
+
+import numpy as np
+
+from .point import Point
+
+
+@dataclass
+class CrackPath:
+    """
+    The path of a crack, stored as contiguous columns with one entry per point on the crack.
+    Points are only created on demand when indexing or iterating and are copies, so changing them does not alter the path.
+    """
+
+    x: np.array  # int32 x coordinates of the point centers
+    y: np.array  # int32 y coordinates of the point centers
+    angle: np.array  # float64 angles of the points
+    width: np.array  # float64 widths of the points
+
+    @classmethod
+    def from_points(cls, points: list[Point]) -> 'CrackPath':
+        """Create a path from a list of points."""
+        return cls(
+            np.array([point.center[0] for point in points], dtype=np.int32),
+            np.array([point.center[1] for point in points], dtype=np.int32),
+            np.array([point.angle for point in points], dtype=np.float64),
+            np.array([point.width for point in points], dtype=np.float64)
+        )
+
+    @classmethod
+    def concatenate(cls, paths: list['CrackPath']) -> 'CrackPath':
+        """Concatenate multiple paths into one path."""
+        return cls(
+            np.concatenate([path.x for path in paths]),
+            np.concatenate([path.y for path in paths]),
+            np.concatenate([path.angle for path in paths]),
+            np.concatenate([path.width for path in paths])
+        )
+
+    @property
+    def centers(self) -> np.array:
+        """The point centers as a (N, 2) array of x and y coordinates."""
+        return np.stack([self.x, self.y], axis=1)
+
+    def copy(self) -> 'CrackPath':
+        """Create a copy of the path that does not share its columns."""
+        return CrackPath(self.x.copy(), self.y.copy(), self.angle.copy(), self.width.copy())
+
+    def to_points(self) -> list[Point]:
+        """Create a list of points from the path."""
+        return list(self)
+
+    def __len__(self) -> int:
+        return self.x.shape[0]
+
+    def __getitem__(self, key: Union[int, slice, np.array]) -> Union[Point, 'CrackPath']:
+        """Index a single point or select a sub path using a slice, index array or boolean mask."""
+        if isinstance(key, (int, np.integer)):
+            return Point(float(self.angle[key]), float(self.width[key]), (int(self.x[key]), int(self.y[key])))
+        return CrackPath(self.x[key], self.y[key], self.angle[key], self.width[key])
+
+    def __iter__(self) -> Iterator[Point]:
+        for idx in range(len(self)):
+            yield self[idx]
@@ -0,0 +1,88 @@
+import time
+import tracemalloc
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from typing import Iterator
+
+
+@dataclass
+class GenerationStats:
+    """
+    Opt-in instrumentation of crack generation, recording the wall time of every stage and counters of the path loops.
+    The peak allocation of every stage is only recorded when tracing memory, as tracing slows down generation a lot.
+    Stats of multiple cracks can be added together into an aggregate.
+    """
+
+    trace_memory: bool = False
+    cracks: int = 0  # Number of generated cracks
+
+    seconds: dict[str, list[float]] = field(default_factory=dict)  # Wall time of every run of each stage
+    peak_memory_bytes: dict[str, int] = field(default_factory=dict)  # Largest peak allocation of each stage
+
+    # Counters of the path generation loops
+    segment_steps: list[int] = field(default_factory=list)  # Number of steps of every path between two pivot points
+    breakthroughs: int = 0  # Number of times the gradient was ignored by chance
+    edge_clips: int = 0  # Number of steps that were clipped to the edge of the surface
+    width_updates: int = 0  # Number of times the width of the crack changed
+
+    @contextmanager
+    def stage(self, name: str) -> Iterator[None]:
+        """Record the wall time and optionally the peak allocation of a stage, which runs within the context."""
+        started_tracing = self.trace_memory and not tracemalloc.is_tracing()
+        if started_tracing:
+            tracemalloc.start()
+        if self.trace_memory:
+            tracemalloc.reset_peak()
+            start_memory, _ = tracemalloc.get_traced_memory()
+
+        start_time = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.seconds.setdefault(name, []).append(time.perf_counter() - start_time)
+            if self.trace_memory:
+                _, peak_memory = tracemalloc.get_traced_memory()
+                self.peak_memory_bytes[name] = max(self.peak_memory_bytes.get(name, 0), peak_memory - start_memory)
+            if started_tracing:
+                tracemalloc.stop()
+
+    def count_path(self, steps: int, breakthroughs: int, edge_clips: int, width_updates: int) -> None:
+        """Add the counters of a generated path between two pivot points."""
+        self.segment_steps.append(steps)
+        self.breakthroughs += breakthroughs
+        self.edge_clips += edge_clips
+        self.width_updates += width_updates
+
+    def add(self, other: 'GenerationStats') -> None:
+        """Add the stats of other cracks to these stats."""
+        self.cracks += other.cracks
+        for name, seconds in other.seconds.items():
+            self.seconds.setdefault(name, []).extend(seconds)
+        for name, peak_memory in other.peak_memory_bytes.items():
+            self.peak_memory_bytes[name] = max(self.peak_memory_bytes.get(name, 0), peak_memory)
+        self.segment_steps.extend(other.segment_steps)
+        self.breakthroughs += other.breakthroughs
+        self.edge_clips += other.edge_clips
+        self.width_updates += other.width_updates
+
+    def to_dict(self) -> dict:
+        """Summarize the stats per stage, such that they can be exported as JSON."""
+        return {
+            'cracks': self.cracks,
+            'stages': {
+                name: {
+                    'runs': len(seconds),
+                    'total_seconds': sum(seconds),
+                    'mean_seconds': sum(seconds) / len(seconds),
+                    'max_seconds': max(seconds),
+                    **({'peak_memory_bytes': self.peak_memory_bytes[name]} if name in self.peak_memory_bytes else {}),
+                }
+                for name, seconds in self.seconds.items()
+            },
+            'segments': len(self.segment_steps),
+            'steps': sum(self.segment_steps),
+            'max_segment_steps': max(self.segment_steps, default=0),
+            'breakthroughs': self.breakthroughs,
+            'edge_clips': self.edge_clips,
+            'width_updates': self.width_updates,
+        }
@@ -1,4 +1,5 @@
 from .crack_dimension_parameters import CrackDimensionParameters
 from .crack_generation_parameters import CrackGenerationParameters
+from .crack_layout_parameters import CrackLayoutParameters
 from .crack_path_parameters import CrackPathParameters
 from .crack_trajectory_parameters import CrackTrajectoryParameters
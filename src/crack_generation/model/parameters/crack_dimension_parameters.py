@@ -12,3 +12,5 @@ class CrackDimensionParameters:
 
     sigma: float  # standard deviation of the normal distribution
     width_stds_offset: float  # number of standard deviations away from the mean the width points are placed at
+
+    rasterizer: str = 'distance_transform'  # either 'distance_transform' for polygon distance transforms or 'capsule' for analytic capsule distances
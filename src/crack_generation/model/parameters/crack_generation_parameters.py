@@ -1,6 +1,7 @@
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 
 from .crack_dimension_parameters import CrackDimensionParameters
+from .crack_layout_parameters import CrackLayoutParameters
 from .crack_path_parameters import CrackPathParameters
 from .crack_trajectory_parameters import CrackTrajectoryParameters
 
@@ -15,3 +16,4 @@ class CrackGenerationParameters:
     dimension_parameters: CrackDimensionParameters
     path_parameters: CrackPathParameters
     trajectory_parameters: CrackTrajectoryParameters
+    layout_parameters: CrackLayoutParameters = field(default_factory=CrackLayoutParameters)
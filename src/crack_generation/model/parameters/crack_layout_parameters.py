@@ -0,0 +1,18 @@
+from dataclasses import dataclass
+
+
+@dataclass
+class CrackLayoutParameters:
+    """
+    Parameters used to place multiple cracks, optionally with branches, on the same surface.
+    These only determine how cracks are combined, so they have defaults that place a single crack without branches.
+    """
+
+    num_cracks: int = 1  # number of cracks to place on a surface
+    min_crack_spacing: int = 20  # minimum distance in pixels between the height maps of two cracks
+    max_placement_attempts: int = 10  # number of overlapping cracks after which placing another crack is given up
+
+    branch_chance: float = 0.  # chance to add a branch, which is tried max_branches times per crack
+    max_branches: int = 2  # maximum number of branches of a single crack
+    branch_width_factor: float = 0.6  # width of a branch relative to the width of the crack at its start
+    branch_length_brick_widths: float = 2.  # maximum length of a branch in brick widths
@@ -27,3 +27,8 @@ class CrackPathParameters:
     smoothing_type: str  # either 'gaussian' for 1D Gaussian smoothing or 'moving_average' for moving average smoothing
     smoothing: int  # Gaussian kernel size for 1D smoothing
     distance_improvement_threshold: float  # minimum value the distance to the start has to increase per step to not be filtered out
+
+    ##
+    # Implementation parameters - These affect how the path is generated, but not the resulting distribution of paths
+    ##
+    engine: str = 'reference'  # either 'reference' for the reference implementation or 'fast' for the faster scalar implementation
@@ -10,7 +10,14 @@ class Surface:
     height_map: np.array  # Grayscale image detailing the relative height of the surface at each point.
     distance_transform: np.array  # Distance transform of the inverse height map
     gradient_angles: np.array  # Gradient angles of the above distance transform
+    gradient_vectors: np.array  # Unit vectors (cos, sin) of the gradient angles as float32, shape (height, width, 2)
 
     # Average 'physical' dimensions in pixels. Useful for navigating the height map.
     brick_width: int
     brick_height: int
+
+    # Mortar lookup index. Useful for snapping points to the mortar and selecting start points.
+    nearest_mortar: np.array  # Flat index of the nearest mortar pixel for each pixel
+    left_edge_candidates: np.array  # Rows of the left column, sorted on descending distance transform
+    right_edge_candidates: np.array  # Rows of the right column, sorted on descending distance transform
+    top_edge_candidates: np.array  # Columns of the top row, sorted on descending distance transform
@@ -0,0 +1,13 @@
+from dataclasses import dataclass
+
+from .surface import Surface
+
+
+@dataclass
+class SurfacePyramid:
+    """
+    A surface at multiple resolutions. The first level is the full resolution surface and every next level halves the
+    resolution of the previous level.
+    """
+
+    levels: list[Surface]
@@ -0,0 +1,33 @@
+import time
+from dataclasses import dataclass, field
+from typing import Union
+
+
+@dataclass
+class WorkBudget:
+    """
+    A budget of work for generating cracks, which the generation loops check cooperatively.
+    Either limit can be left out. The counters keep track of how far the generation got.
+    """
+
+    max_steps: Union[int, None] = None  # Maximum number of path steps
+    max_seconds: Union[float, None] = None  # Maximum time in seconds since the budget was created
+
+    steps: int = 0  # Number of path steps taken
+    paths: int = 0  # Number of paths generated between two pivot points
+    attempts: int = 0  # Number of cracks started
+    start_time: float = field(default_factory=time.perf_counter)
+
+    def elapsed_seconds(self) -> float:
+        """Time in seconds since the budget was created."""
+        return time.perf_counter() - self.start_time
+
+    def exceeded(self) -> bool:
+        """Check if any of the limits of the budget has been reached."""
+        return (self.max_steps is not None and self.steps >= self.max_steps) or \
+            (self.max_seconds is not None and self.elapsed_seconds() >= self.max_seconds)
+
+    def spend(self, steps: int = 1) -> bool:
+        """Count path steps and check if the budget has been exceeded."""
+        self.steps += steps
+        return self.exceeded()
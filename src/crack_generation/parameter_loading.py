@@ -0,0 +1,12 @@
+from crack_generation.model.parameters import CrackGenerationParameters, CrackDimensionParameters, CrackPathParameters, \
+    CrackTrajectoryParameters, CrackLayoutParameters
+
+
+def load_crack_parameters(crack_parameters_dict: dict) -> CrackGenerationParameters:
+    """Load the crack parameters from a dict. These values can be directly injected. The layout section is optional."""
+    return CrackGenerationParameters(
+        dimension_parameters=CrackDimensionParameters(**crack_parameters_dict['dimensions']),
+        path_parameters=CrackPathParameters(**crack_parameters_dict['path']),
+        trajectory_parameters=CrackTrajectoryParameters(**crack_parameters_dict['trajectory']),
+        layout_parameters=CrackLayoutParameters(**crack_parameters_dict.get('layout', {}))
+    )
@@ -1,6 +1,11 @@
 from .collision import *
+from .random_block import *
 from .pivot_point import *
 from .point import *
 from .trajectory import *
 from .path import *
+from .batch_path import *
+from .coverage import *
+from .branch import *
+from .lift import *
 from .postprocess import *
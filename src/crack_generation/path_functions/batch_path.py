@@ -0,0 +1,123 @@
+from typing import Union
+
+import numpy as np
+
+from crack_generation.model import CrackPath, Point, Surface, WorkBudget
+from crack_generation.model.parameters import CrackPathParameters
+
+
+def generate_paths_batch(
+    initial_points: list[Point],
+    pivot_points: list[list[tuple[int, int]]],
+    surface: Surface,
+    parameters: CrackPathParameters,
+    rng: np.random.Generator,
+    budget: Union[WorkBudget, None] = None
+) -> list[CrackPath]:
+    """
+    Generate the paths of multiple cracks at once by advancing all crack walkers in lockstep.
+    Each walker follows its own pivot points, which is equivalent to chaining generate_path over the pivot points.
+    The final paths do not include the initial points. All walkers stop early when the work budget is exceeded, which
+    counts the pivot points the walkers reached as generated paths.
+    """
+    num_walkers = len(initial_points)
+    surface_height, surface_width = surface.height_map.shape
+
+    # Pad the pivot points of all walkers into one array, indexed by walker and segment
+    num_segments = np.array([len(points) for points in pivot_points], dtype=np.int32)
+    end_positions = np.zeros((num_walkers, max(np.max(num_segments, initial=0), 1), 2), dtype=np.float64)
+    for walker_idx, points in enumerate(pivot_points):
+        end_positions[walker_idx, :len(points)] = points
+
+    positions = np.array([point.center for point in initial_points], dtype=np.int32).reshape(-1, 2)
+    widths = np.array([point.width for point in initial_points], dtype=np.float64)
+    segments = np.zeros(num_walkers, dtype=np.int32)
+    breaking_gradient = np.ones(num_walkers, dtype=bool)  # Start at true to help progression
+
+    # A walker stops when the crack becomes too small, leaves the surface or reaches its last pivot point
+    active = (num_segments > 0) & (widths >= parameters.min_width) & \
+        (positions[:, 0] >= 0) & (positions[:, 0] < surface_width) & \
+        (positions[:, 1] >= 0) & (positions[:, 1] < surface_height)
+
+    # Recorded steps, starting with empty arrays so walkers that never moved are handled the same
+    walker_steps = [np.zeros(0, dtype=np.int64)]
+    x_steps, y_steps = [np.zeros(0, dtype=np.int32)], [np.zeros(0, dtype=np.int32)]
+    angle_steps, width_steps = [np.zeros(0, dtype=np.float64)], [np.zeros(0, dtype=np.float64)]
+    while True:
+        # Move walkers that reached their current pivot point on to the next one. This can skip multiple pivot points.
+        while True:
+            walker_idx = np.flatnonzero(active)
+            end_position = end_positions[walker_idx, segments[walker_idx]]
+            reached = np.linalg.norm(end_position - positions[walker_idx], axis=1) <= parameters.min_distance
+            if not np.any(reached):
+                break
+
+            reached_idx = walker_idx[reached]
+            if budget is not None:
+                budget.paths += reached_idx.size
+            segments[reached_idx] += 1
+            breaking_gradient[reached_idx] = True
+            active[reached_idx] = segments[reached_idx] < num_segments[reached_idx]
+
+        if walker_idx.size == 0:
+            break
+
+        current_x, current_y = positions[walker_idx, 0], positions[walker_idx, 1]
+        gradient_vector = surface.gradient_vectors[current_y, current_x]
+
+        end_point_angle = np.arctan2(end_position[:, 1] - current_y, end_position[:, 0] - current_x)
+        end_point_vector = np.stack([np.cos(end_point_angle), np.sin(end_point_angle)], axis=1)
+
+        # Blend the gradient and direction factor. We have a small chance to ignore the gradient.
+        breaking = breaking_gradient[walker_idx] | (rng.random(walker_idx.size) < parameters.breakthrough_chance)
+        factor = np.where(breaking, 0., parameters.gradient_influence)[:, np.newaxis]
+
+        direction_vector = factor * gradient_vector + (1 - factor) * end_point_vector
+        direction_vector /= np.linalg.norm(direction_vector, axis=1, keepdims=True)
+
+        # Calculate the new points and next values. Walkers that go outside the surface are clipped to the edge and
+        # their current segment ends there.
+        centers = (positions[walker_idx] + parameters.step_size * direction_vector).astype(np.int32)
+        outside = (centers[:, 0] < 0) | (centers[:, 0] >= surface_width) | \
+            (centers[:, 1] < 0) | (centers[:, 1] >= surface_height)
+        centers[:, 0] = np.clip(centers[:, 0], 0, surface_width - 1)
+        centers[:, 1] = np.clip(centers[:, 1], 0, surface_height - 1)
+        end_positions[walker_idx[outside], segments[walker_idx[outside]]] = centers[outside]
+
+        angles = np.arctan2(direction_vector[:, 1], direction_vector[:, 0])
+        current_widths = widths[walker_idx]
+        may_grow = (current_widths < surface.distance_transform[centers[:, 1], centers[:, 0]]) | breaking
+        width_increments = np.where(
+            may_grow,
+            rng.uniform(-1., 1., walker_idx.size) * parameters.max_width_grow,
+            -rng.random(walker_idx.size)
+        )
+        update_width = rng.random(walker_idx.size) < parameters.width_update_chance
+        new_widths = np.where(update_width, current_widths + width_increments, current_widths)
+        breaking_gradient[walker_idx] = surface.distance_transform[current_y, current_x] == 0
+
+        positions[walker_idx] = centers
+        widths[walker_idx] = new_widths
+        active[walker_idx] = new_widths >= parameters.min_width
+
+        walker_steps.append(walker_idx)
+        x_steps.append(centers[:, 0])
+        y_steps.append(centers[:, 1])
+        angle_steps.append(angles)
+        width_steps.append(new_widths)
+
+        if budget is not None and budget.spend(walker_idx.size):
+            break
+
+    # Group the recorded steps per walker while keeping them in order of generation
+    walkers = np.concatenate(walker_steps)
+    order = np.argsort(walkers, kind='stable')
+    steps = CrackPath(
+        np.concatenate(x_steps)[order],
+        np.concatenate(y_steps)[order],
+        np.concatenate(angle_steps)[order],
+        np.concatenate(width_steps)[order]
+    )
+    bounds = np.searchsorted(walkers[order], np.arange(num_walkers + 1))
+
+    return [steps[bounds[walker_idx]:bounds[walker_idx + 1]] for walker_idx in range(num_walkers)]
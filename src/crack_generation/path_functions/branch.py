@@ -0,0 +1,30 @@
+import numpy as np
+
+from crack_generation.model import CrackPath, Point, Surface
+from crack_generation.model.parameters import CrackLayoutParameters
+
+BRANCH_MIN_ANGLE = np.pi / 6  # Minimum angle between a branch and its crack
+BRANCH_MAX_ANGLE = np.pi / 3  # Maximum angle between a branch and its crack
+BRANCH_START_RANGE = (0.2, 0.8)  # Part of the crack path along which branches can start
+
+
+def generate_branch_trajectory(
+    path: CrackPath,
+    surface: Surface,
+    parameters: CrackLayoutParameters,
+    rng: np.random.Generator
+) -> tuple[Point, list[tuple[int, int]]]:
+    """
+    Generate the start point and pivot point of a branch of a crack. The branch starts at a random point along the
+    middle of the crack path, is thinner than the crack at that point and leaves it at an angle to either side.
+    """
+    start_idx = int(rng.integers(int(len(path) * BRANCH_START_RANGE[0]), max(int(len(path) * BRANCH_START_RANGE[1]), 1)))
+    point = path[start_idx]
+    angle = point.angle + rng.choice([-1, 1]) * rng.uniform(BRANCH_MIN_ANGLE, BRANCH_MAX_ANGLE)
+    length = rng.uniform(0.5, 1.) * parameters.branch_length_brick_widths * surface.brick_width
+
+    pivot_point = (
+        int(point.center[0] + np.cos(angle) * length),
+        int(point.center[1] + np.sin(angle) * length)
+    )
+    return Point(angle, point.width * parameters.branch_width_factor, point.center), [pivot_point]
@@ -1,5 +1,3 @@
-import numpy as np
-
 from crack_generation.model import Point, Surface
 
 
@@ -25,12 +23,8 @@ def in_object(point: Point, surface: Surface) -> bool:
 
 def move_to_nearest_mortar(point: Point, surface: Surface) -> Point:
     """Move a point to the nearest point in the mortar."""
-    max_step = np.max(surface.distance_transform)
-    while within_surface(point, surface) and in_object(point, surface):
-        angle = surface.gradient_angles[point.center[1], point.center[0]]
-        step_size = max_step - surface.distance_transform[point.center[1], point.center[0]]
-        update = np.rint(step_size * np.array([np.cos(angle), np.sin(angle)])).astype(int)
-        point.center[0] += update[0]
-        point.center[1] += update[1]
+    if within_surface(point, surface) and in_object(point, surface):
+        y, x = divmod(int(surface.nearest_mortar[point.center[1], point.center[0]]), surface.height_map.shape[1])
+        point.center = (x, y)
 
     return point
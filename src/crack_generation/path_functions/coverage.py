@@ -0,0 +1,42 @@
+import numpy as np
+
+from crack_generation.model import CrackPath
+from crack_generation.model.parameters import CrackDimensionParameters
+from crack_generation.path_functions.postprocess import gaussian_depth_table
+
+# Distance in pixels by which rasterized pixels can lie outside the crack, due to rounding the polygon to whole pixels
+# and filling the pixels on its edges
+RASTERIZATION_MARGIN = 2.
+
+
+def estimate_crack_area(path: CrackPath) -> float:
+    """Estimate the area of a crack in pixels from its path, as its segment lengths times their mean width."""
+    if len(path) < 2:
+        return 0.
+    segment_lengths = np.hypot(np.diff(path.x), np.diff(path.y))
+    return float(np.sum(segment_lengths * (path.width[1:] + path.width[:-1]) / 2.))
+
+
+def max_crack_depth(parameters: CrackDimensionParameters) -> float:
+    """
+    Largest value of the rasterized height map of a crack, at the deepest point of its Gaussian depth profile. The depth
+    parameter only scales the displacement in Blender, so it does not affect the height map.
+    """
+    return float(np.max(gaussian_depth_table(parameters.sigma, parameters.width_stds_offset)))
+
+
+def max_crack_height_sum(path: CrackPath, parameters: CrackDimensionParameters) -> float:
+    """
+    Upper bound of the height sum of the rasterized crack of a path. Every segment of the crack lies within a capsule
+    of its largest radius, so the pixels of the crack lie within these capsules grown by the rasterization margin, and
+    none of them is deeper than the maximum depth.
+    """
+    if len(path) == 0:
+        return 0.
+    radii = path.width / 2. + RASTERIZATION_MARGIN
+    if len(path) == 1:
+        return max_crack_depth(parameters) * float(np.pi * radii[0] ** 2)
+    segment_lengths = np.hypot(np.diff(path.x), np.diff(path.y))
+    segment_radii = np.maximum(radii[1:], radii[:-1])
+    capsule_areas = segment_lengths * 2. * segment_radii + np.pi * segment_radii ** 2
+    return max_crack_depth(parameters) * float(np.sum(capsule_areas))
@@ -0,0 +1,37 @@
+import numpy as np
+
+from crack_generation.model import CrackPath, Surface
+
+
+def lift_scale(coarse_surface: Surface, surface: Surface) -> tuple[float, float]:
+    """Get the x and y scale factors that map coordinates of a coarse surface onto a finer surface."""
+    coarse_height, coarse_width = coarse_surface.height_map.shape
+    height, width = surface.height_map.shape
+    return (width - 1) / max(coarse_width - 1, 1), (height - 1) / max(coarse_height - 1, 1)
+
+
+def lift_position(position: tuple[int, int], coarse_surface: Surface, surface: Surface) -> tuple[int, int]:
+    """Map a position on a coarse surface onto a finer surface."""
+    scale_x, scale_y = lift_scale(coarse_surface, surface)
+    return int(round(position[0] * scale_x)), int(round(position[1] * scale_y))
+
+
+def lift_path(path: CrackPath, coarse_surface: Surface, surface: Surface, refine: bool = True) -> CrackPath:
+    """
+    Map a path generated on a coarse surface onto a finer surface, scaling the widths along with the coordinates.
+    When refining, points that ended up inside a brick are moved to the nearest mortar if it lies within one coarse pixel.
+    """
+    height, width = surface.height_map.shape
+    scale_x, scale_y = lift_scale(coarse_surface, surface)
+
+    x = np.clip(np.rint(path.x * scale_x), 0, width - 1).astype(np.int32)
+    y = np.clip(np.rint(path.y * scale_y), 0, height - 1).astype(np.int32)
+
+    if refine and len(path) > 0:
+        inside = np.flatnonzero(surface.distance_transform[y, x] == 0)
+        mortar_y, mortar_x = np.divmod(surface.nearest_mortar[y[inside], x[inside]].astype(np.int64), width)
+        close = np.hypot(mortar_x - x[inside], mortar_y - y[inside]) <= max(scale_x, scale_y)
+        x[inside[close]] = mortar_x[close]
+        y[inside[close]] = mortar_y[close]
+
+    return CrackPath(x, y, path.angle.copy(), path.width * (scale_x + scale_y) / 2)
@@ -1,25 +1,34 @@
+import math
+from typing import Union
+
 import numpy as np
 
-from crack_generation.model import Point, Surface
+from crack_generation.model import CrackPath, Point, Surface, WorkBudget, GenerationStats
 from crack_generation.model.parameters import CrackPathParameters
 from .collision import within_surface, in_object
+from .random_block import RandomBlock
 
 
 def generate_path(
     initial_point: Point,
     end_position: tuple[int, int],
     surface: Surface,
-    parameters: CrackPathParameters
-) -> list[Point]:
+    parameters: CrackPathParameters,
+    rng: np.random.Generator,
+    budget: Union[WorkBudget, None] = None,
+    stats: Union[GenerationStats, None] = None
+) -> CrackPath:
     """
     Generate a path given a starting point and end position based on a surface and parameters.
-    The final path does not include the initial point.
+    The final path does not include the initial point. Generation stops early when the work budget is exceeded.
+    The counters of the loop are added to the stats, if given.
     """
-    path_points = []
+    path_x, path_y, path_angles, path_widths = [], [], [], []
     current_point = initial_point
     end_x, end_y = end_position
     surface_height, surface_width = surface.height_map.shape
     breaking_gradient = True  # Start at true to help progression
+    breakthroughs = edge_clips = width_updates = 0
 
     # Keep going until the crack becomes to small, reaches the boundary or reaches the end point
     while current_point.width >= parameters.min_width and \
@@ -34,8 +43,9 @@ def generate_path(
         end_point_vector = np.array([np.cos(end_point_angle), np.sin(end_point_angle)])
 
         # Blend the gradient and direction factor. We have a small chance to ignore the gradient.
-        if not breaking_gradient and np.random.random_sample() < parameters.breakthrough_chance:
+        if not breaking_gradient and rng.random() < parameters.breakthrough_chance:
             breaking_gradient = True
+            breakthroughs += 1
         factor = parameters.gradient_influence if not breaking_gradient else 0.
 
         direction_vector = factor * gradient_vector + (1 - factor) * end_point_vector
@@ -49,14 +59,112 @@ def generate_path(
                 np.clip(center[1], 0, surface_height - 1, dtype=np.int32)
             )
             end_position = center
+            edge_clips += 1
 
         angle = np.arctan2(direction_vector[1], direction_vector[0])
-        width_increment = np.random.uniform(-1., 1) * parameters.max_width_grow if current_point.width < surface.distance_transform[center[1], center[0]] or breaking_gradient else -np.random.rand()
-        width = current_point.width + width_increment if np.random.rand() < parameters.width_update_chance else current_point.width
+        width_increment = rng.uniform(-1., 1) * parameters.max_width_grow if current_point.width < surface.distance_transform[center[1], center[0]] or breaking_gradient else -rng.random()
+        width = current_point.width
+        if rng.random() < parameters.width_update_chance:
+            width += width_increment
+            width_updates += 1
         breaking_gradient = in_object(current_point, surface)
 
-        new_point = Point(angle, width, center)
-        current_point = new_point
-        path_points.append(new_point)
+        current_point = Point(angle, width, center)
+        path_x.append(center[0])
+        path_y.append(center[1])
+        path_angles.append(angle)
+        path_widths.append(width)
+
+        if budget is not None and budget.spend():
+            break
+
+    if stats is not None:
+        stats.count_path(len(path_x), breakthroughs, edge_clips, width_updates)
+    return CrackPath(
+        np.array(path_x, dtype=np.int32),
+        np.array(path_y, dtype=np.int32),
+        np.array(path_angles, dtype=np.float64),
+        np.array(path_widths, dtype=np.float64)
+    )
+
+
+def generate_path_fast(
+    initial_point: Point,
+    end_position: tuple[int, int],
+    surface: Surface,
+    parameters: CrackPathParameters,
+    random_block: RandomBlock,
+    budget: Union[WorkBudget, None] = None,
+    stats: Union[GenerationStats, None] = None
+) -> CrackPath:
+    """
+    Faster variant of generate_path, producing statistically equivalent paths.
+    It works on Python scalars, uses the precomputed gradient vectors of the surface and draws its random numbers in blocks.
+    The final path does not include the initial point. Generation stops early when the work budget is exceeded.
+    The counters of the loop are added to the stats, if given.
+    """
+    gradient_vectors = surface.gradient_vectors
+    distance_transform = surface.distance_transform
+    surface_height, surface_width = surface.height_map.shape
+
+    path_x, path_y, path_angles, path_widths = [], [], [], []
+    current_x, current_y = int(initial_point.center[0]), int(initial_point.center[1])
+    width = float(initial_point.width)
+    end_x, end_y = float(end_position[0]), float(end_position[1])
+    breaking_gradient = True  # Start at true to help progression
+    breakthroughs = edge_clips = width_updates = 0
+
+    # Keep going until the crack becomes to small, reaches the boundary or reaches the end point
+    while width >= parameters.min_width and \
+            0 <= current_x < surface_width and 0 <= current_y < surface_height and \
+            math.hypot(end_x - current_x, end_y - current_y) > parameters.min_distance:
+
+        end_distance = math.hypot(end_x - current_x, end_y - current_y)
+        end_vector_x, end_vector_y = ((end_x - current_x) / end_distance, (end_y - current_y) / end_distance) \
+            if end_distance > 0 else (1., 0.)
+
+        # Blend the gradient and direction factor. We have a small chance to ignore the gradient.
+        if not breaking_gradient and random_block.sample() < parameters.breakthrough_chance:
+            breaking_gradient = True
+            breakthroughs += 1
+        factor = parameters.gradient_influence if not breaking_gradient else 0.
+
+        direction_x = factor * gradient_vectors.item(current_y, current_x, 0) + (1 - factor) * end_vector_x
+        direction_y = factor * gradient_vectors.item(current_y, current_x, 1) + (1 - factor) * end_vector_y
+        direction_norm = math.hypot(direction_x, direction_y) or 1.
+        direction_x, direction_y = direction_x / direction_norm, direction_y / direction_norm
+
+        # Calculate the new point and next values. If we go outside the surface, clip to the edge and then stop
+        new_x = int(current_x + parameters.step_size * direction_x)
+        new_y = int(current_y + parameters.step_size * direction_y)
+        if 0 > new_x or new_x >= surface_width or 0 > new_y or new_y >= surface_height:
+            new_x = min(max(new_x, 0), surface_width - 1)
+            new_y = min(max(new_y, 0), surface_height - 1)
+            end_x, end_y = new_x, new_y
+            edge_clips += 1
+
+        if random_block.sample() < parameters.width_update_chance:
+            width_updates += 1
+            if width < distance_transform.item(new_y, new_x) or breaking_gradient:
+                width += (2. * random_block.sample() - 1.) * parameters.max_width_grow
+            else:
+                width -= random_block.sample()
+        breaking_gradient = distance_transform.item(current_y, current_x) == 0
+
+        current_x, current_y = new_x, new_y
+        path_x.append(new_x)
+        path_y.append(new_y)
+        path_angles.append(math.atan2(direction_y, direction_x))
+        path_widths.append(width)
+
+        if budget is not None and budget.spend():
+            break
 
-    return path_points
+    if stats is not None:
+        stats.count_path(len(path_x), breakthroughs, edge_clips, width_updates)
+    return CrackPath(
+        np.array(path_x, dtype=np.int32),
+        np.array(path_y, dtype=np.int32),
+        np.array(path_angles, dtype=np.float64),
+        np.array(path_widths, dtype=np.float64)
+    )
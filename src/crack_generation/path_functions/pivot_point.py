@@ -13,7 +13,8 @@ def generate_pivot_point(
     surface: Surface,
     parameters: CrackTrajectoryParameters,
     pivot_direction: int,
-    force_inwards: bool
+    force_inwards: bool,
+    rng: np.random.Generator
 ) -> tuple[int, int]:
     """Determine the next pivot point as seen from the current position."""
 
@@ -25,8 +26,8 @@ def generate_pivot_point(
     )
     unit_size = np.array(
         [
-            np.random.randint(1, parameters.max_pivot_brick_widths),
-            np.random.randint(1, parameters.max_pivot_brick_heights)
+            rng.integers(1, parameters.max_pivot_brick_widths),
+            rng.integers(1, parameters.max_pivot_brick_heights)
         ], dtype=np.int32
     ) * brick_projected_size
 
@@ -43,9 +44,9 @@ def generate_pivot_point(
         probs[0 if is_roof else 1] += probs[2 if is_roof else 0]
         probs[2 if is_roof else 0] = 0
 
-    distribution_parameters_idx = np.random.choice(np.arange(3), p=probs)
+    distribution_parameters_idx = rng.choice(np.arange(3), p=probs)
 
-    displacement = np.rint(np.random.triangular(*distribution_parameters[distribution_parameters_idx]))
+    displacement = np.rint(rng.triangular(*distribution_parameters[distribution_parameters_idx]))
     displacement_vector = [min(displacement, unit_size[0]), unit_size[1] - max(displacement - unit_size[0], 0)]
     displacement_vector = np.rint(displacement_vector / brick_projected_size) * brick_projected_size
     new_position = np.array(previous_point) + np.array([pivot_direction, 1]) * displacement_vector.astype(int)
@@ -57,7 +58,8 @@ def determine_start_point(
     surface: Surface,
     parameters: CrackTrajectoryParameters,
     pivot_direction: int,
-    initial_width: float
+    initial_width: float,
+    rng: np.random.Generator
 ) -> Point:
     """
     Determine the starting point on the grid. This should be somewhere along the top.
@@ -70,17 +72,25 @@ def determine_start_point(
     if pivot_direction == PIVOT_DIRECTION_RIGHT:
         min_width, max_width = 0, int(np.rint(width * parameters.column_search_space_percent))
 
-    # Pair all edge points and sort them based on height value.
-    side_edge_points = zip(
-        [min_width if pivot_direction == PIVOT_DIRECTION_RIGHT else max_width] * (max_height - min_height),
-        range(min_height, max_height)
-    )
-    top_edge_points = zip(range(min_width, max_width), [min_height] * (max_width - min_width))
-    all_points = list(side_edge_points) + list(top_edge_points)
-    all_points.sort(key=lambda point: -surface.distance_transform[point[1], point[0]])
+    # Take the edge points within the search space from the presorted edge candidates, keeping their order.
+    side_x = min_width if pivot_direction == PIVOT_DIRECTION_RIGHT else max_width
+    side_ys = surface.left_edge_candidates if pivot_direction == PIVOT_DIRECTION_RIGHT else surface.right_edge_candidates
+    side_ys = side_ys[(side_ys >= min_height) & (side_ys < max_height)]
+    top_xs = surface.top_edge_candidates
+    top_xs = top_xs[(top_xs >= min_width) & (top_xs < max_width)]
+
+    # Merge the ranks of both candidate lists as if they were sorted together on height value, side points first.
+    side_keys = -surface.distance_transform[side_ys, side_x]
+    top_keys = -surface.distance_transform[min_height, top_xs]
+    side_ranks = np.arange(side_ys.shape[0]) + np.searchsorted(top_keys, side_keys, side='left')
 
     # Choose one of the 50% lowest points
-    center = all_points[np.random.randint(int(len(all_points) * 0.5))]
+    rank = rng.integers(int((side_ys.shape[0] + top_xs.shape[0]) * 0.5))
+    side_idx = np.searchsorted(side_ranks, rank)
+    if side_idx < side_ranks.shape[0] and side_ranks[side_idx] == rank:
+        center = (side_x, int(side_ys[side_idx]))
+    else:
+        center = (int(top_xs[rank - side_idx]), min_height)
     angle = (0 if pivot_direction == PIVOT_DIRECTION_RIGHT else np.pi) if center[1] > 0 else np.pi / 2.
 
     return Point(angle, min(initial_width, surface.distance_transform[center[1], center[0]]), center)
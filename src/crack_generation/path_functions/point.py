@@ -1,5 +1,5 @@
 import numpy as np
-from crack_generation.model import Point
+from crack_generation.model import CrackPath, Point
 
 
 def point_to_coords(point: Point) -> tuple[tuple[int, int], tuple[int, int]]:
@@ -7,3 +7,10 @@ def point_to_coords(point: Point) -> tuple[tuple[int, int], tuple[int, int]]:
     offset = point.width / 2. * np.array([-np.sin(point.angle), np.cos(point.angle)])
     center = np.array(point.center)
     return tuple(np.rint(center + offset).astype(np.int32)), tuple(np.rint(center - offset).astype(np.int32))
+
+
+def path_to_coords(path: CrackPath) -> tuple[np.array, np.array]:
+    """Transform all points of a path to their top and bottom coordinates, as two (N, 2) arrays."""
+    offsets = (path.width / 2.)[:, np.newaxis] * np.stack([-np.sin(path.angle), np.cos(path.angle)], axis=1)
+    centers = path.centers
+    return np.rint(centers + offsets).astype(np.int32), np.rint(centers - offsets).astype(np.int32)
@@ -1,16 +1,22 @@
+import functools
+
 import cv2
 import numpy as np
 from scipy.ndimage import gaussian_filter1d
 from scipy.stats import norm
 
-from crack_generation.model import Point, Surface
+from crack_generation.model import CrackHeightMap, CrackPath, Surface
 from crack_generation.model.parameters import CrackDimensionParameters
-from crack_generation.path_functions import point_to_coords
+from crack_generation.path_functions import path_to_coords
+
+HEIGHT_MAP_PADDING = 1  # Padding around the crack, such that the distance transform sees the edge of the crack
+CAPSULE_TILE_SIZE = 32  # Size of the square tiles in which the capsule distances are computed
+DEPTH_TABLE_RESOLUTION = 0.01  # Distance in pixels between two entries of the Gaussian depth lookup table
 
 
-def smooth_path_moving_average(path: list[Point], smoothing: int) -> list[Point]:
+def smooth_path_moving_average(path: CrackPath, smoothing: int) -> CrackPath:
     """Smooth a crack path using a moving average filter."""
-    coords = np.array([point.center for point in path], dtype=np.int32)
+    coords = path.centers
     padded = np.concatenate(
         [
             np.repeat([coords[0, :]], smoothing - 1, 0),
@@ -22,62 +28,74 @@ def smooth_path_moving_average(path: list[Point], smoothing: int) -> list[Point]
     cumsum = np.cumsum(padded, 0)
     coords[1:-1] = np.rint((cumsum[2 * smoothing:, :] - cumsum[:-2 * smoothing, :]) / (2 * smoothing))
 
-    new_path = path
-    for idx in range(0, len(new_path)):
-        new_path[idx].center = coords[idx, 0], coords[idx, 1]
-    return new_path
+    path.x[:], path.y[:] = coords[:, 0], coords[:, 1]
+    return path
 
 
-def smooth_path_gaussian(path: list[Point], smoothing: int) -> list[Point]:
+def smooth_path_gaussian(path: CrackPath, smoothing: int) -> CrackPath:
     """Smooth a crack path using a 1D Gaussian filter."""
-    coords = np.array([point.center for point in path], dtype=np.int32)
-    coords[:, 0] = gaussian_filter1d(coords[:, 0], 1., mode='nearest', radius=smoothing)
-    coords[:, 1] = gaussian_filter1d(coords[:, 1], 1., mode='nearest', radius=smoothing)
+    path.x[:] = gaussian_filter1d(path.x, 1., mode='nearest', radius=smoothing)
+    path.y[:] = gaussian_filter1d(path.y, 1., mode='nearest', radius=smoothing)
+    return path
 
-    new_path = path
-    for idx in range(0, len(new_path)):
-        new_path[idx].center = coords[idx, 0], coords[idx, 1]
-    return new_path
 
-
-def shrink_path_end(path: list[Point], min_width: float, max_width_grow: float) -> list[Point]:
+def shrink_path_end(
+    path: CrackPath,
+    min_width: float,
+    max_width_grow: float,
+    rng: np.random.Generator
+) -> CrackPath:
     """Adjust the width at the end of the path such that it ends in the min width with increments of max_width_grow."""
-    new_path = path
-    idx = len(new_path) - 1
-    new_path[idx].width = min_width if new_path[idx].width > min_width else new_path[idx].width
-
-    while idx > 0:
-        diff = abs(new_path[idx - 1].width - new_path[idx].width)
-        if diff <= max_width_grow:
-            break
+    widths = path.width
+    last_idx = len(widths) - 1
+    widths[last_idx] = min_width if widths[last_idx] > min_width else widths[last_idx]
 
-        new_path[idx - 1].width = new_path[idx].width + np.random.uniform(0.5, 1.) * max_width_grow
-        idx -= 1
+    # Candidate widths when walking back from the end. We stop at the first point that is already close enough.
+    shrunk_widths = widths[last_idx] + np.concatenate(
+        [[0.], np.cumsum(rng.uniform(0.5, 1., last_idx) * max_width_grow)]
+    )
+    close_enough = np.abs(widths[:last_idx][::-1] - shrunk_widths[:-1]) <= max_width_grow
+    num_shrunk = np.argmax(close_enough) if np.any(close_enough) else last_idx
 
-    return new_path
+    widths[last_idx - num_shrunk:last_idx] = shrunk_widths[1:num_shrunk + 1][::-1]
+    return path
 
 
-def remove_non_increasing_points(path: list[Point], threshold: float) -> list[Point]:
+def remove_non_increasing_points(path: CrackPath, threshold: float) -> CrackPath:
     """Remove non-increasing points compared to the starting point based on the derivative."""
     # Ignore very small paths
     if len(path) < 5:
         return path
 
-    coords = np.array([point.center for point in path], dtype=np.int32)
+    coords = path.centers
     distances = np.linalg.norm(coords[:, :] - coords[0, :], axis=1)
     gradient_distances = np.gradient(distances)
 
-    filter_mask = gradient_distances > threshold
-    return list([point for idx, point in enumerate(path) if filter_mask[idx]])
+    return path[gradient_distances > threshold]
+
+
+def crack_region_of_interest(polygon: np.array, surface: Surface) -> tuple[int, int, int, int]:
+    """Determine the (min x, min y, max x, max y) bounding box of a crack polygon, padded and clipped to the surface."""
+    surface_height, surface_width = surface.height_map.shape
+    min_x, min_y = np.maximum(np.min(polygon, axis=0) - HEIGHT_MAP_PADDING, 0)
+    max_x, max_y = np.minimum(np.max(polygon, axis=0) + HEIGHT_MAP_PADDING + 1, [surface_width, surface_height])
+    return int(min_x), int(min_y), int(max(max_x, min_x + 1)), int(max(max_y, min_y + 1))
+
 
+def create_height_map_from_path(path: CrackPath, surface: Surface, parameters: CrackDimensionParameters) -> CrackHeightMap:
+    """
+    Create a height map representing the given path. This map can be used in combination with the surface.
+    Only the bounding box of the crack is rasterized, so the costs depend on the crack size instead of the surface size.
+    """
+    if parameters.rasterizer == 'capsule':
+        return create_height_map_from_capsules(path, surface, parameters)
 
-def create_height_map_from_path(path: list[Point], surface: Surface, parameters: CrackDimensionParameters) -> np.array:
-    """Create a height map representing the given path. This map can be used in combination with the surface."""
-    height_map = np.zeros_like(surface.height_map, dtype=np.uint8)
-    coords = np.array([point_to_coords(point) for point in path], dtype=np.int32)
-    flattened = np.concatenate([coords[:, 0, :], np.flip(coords[:, 1, :], axis=0)], axis=0)
+    top_coords, bottom_coords = path_to_coords(path)
+    flattened = np.concatenate([top_coords, np.flip(bottom_coords, axis=0)], axis=0)
+    min_x, min_y, max_x, max_y = crack_region_of_interest(flattened, surface)
+    height_map = np.zeros((max_y - min_y, max_x - min_x), dtype=np.uint8)
 
-    inverse_crack = cv2.fillPoly(height_map, [flattened], color=255)
+    inverse_crack = cv2.fillPoly(height_map, [(flattened - [min_x, min_y]).astype(np.int32)], color=255)
     distance_transform = cv2.distanceTransform(inverse_crack, cv2.DIST_L2, cv2.DIST_MASK_5).astype(np.float64)
     mask = distance_transform > 0
 
@@ -89,4 +107,91 @@ def create_height_map_from_path(path: list[Point], surface: Surface, parameters:
     distance_transform[mask] = distance_transform[mask] / np.max(distance_transform[mask])  # Normalize
     distance_transform[mask] = np.clip(distance_transform[mask], 1. / 255., 1.) # Bump min to at least a visible value
 
-    return distance_transform
+    return CrackHeightMap(distance_transform, (min_x, min_y), surface.height_map.shape)
+
+
+@functools.lru_cache(maxsize=16)
+def gaussian_depth_table(sigma: float, width_stds_offset: float) -> np.array:
+    """
+    Lookup table of the normalized Gaussian depth by distance to the deepest point of the crack, with entries every
+    DEPTH_TABLE_RESOLUTION pixels until the depth reaches the minimum visible value.
+    """
+    max_distance = np.sqrt(2. * np.log(255.)) * sigma / width_stds_offset
+    distances = np.arange(0., max_distance + 2 * DEPTH_TABLE_RESOLUTION, DEPTH_TABLE_RESOLUTION)
+    depths = norm.pdf(distances * sigma * width_stds_offset, scale=sigma ** 2) / norm.pdf(0., scale=sigma ** 2)
+    return np.clip(depths, 1. / 255., 1.)
+
+
+def capsule_distances(
+    xs: np.array,
+    ys: np.array,
+    starts: np.array,
+    ends: np.array,
+    start_radii: np.array,
+    end_radii: np.array
+) -> np.array:
+    """Signed distances of pixels to the union of capsules with a linearly varying radius along each segment."""
+    segment_x, segment_y = ends[:, 0] - starts[:, 0], ends[:, 1] - starts[:, 1]
+    inverse_lengths = 1. / np.maximum(segment_x ** 2 + segment_y ** 2, 1e-12)
+    offset_x = xs[:, np.newaxis] - starts[:, 0]
+    offset_y = ys[:, np.newaxis] - starts[:, 1]
+    projections = np.clip((offset_x * segment_x + offset_y * segment_y) * inverse_lengths, 0., 1.)
+
+    offset_x -= projections * segment_x
+    offset_y -= projections * segment_y
+    distances = np.sqrt(offset_x ** 2 + offset_y ** 2) - (start_radii + projections * (end_radii - start_radii))
+    return np.min(distances, axis=1)
+
+
+def create_height_map_from_capsules(path: CrackPath, surface: Surface, parameters: CrackDimensionParameters) -> CrackHeightMap:
+    """
+    Create a height map representing the given path using the signed distances to capsules around each path segment.
+    This computes the distance to the crack edge directly in tiles near the path and maps it to depth using a lookup table.
+    """
+    centers = path.centers.astype(np.float64)
+    radii = path.width / 2.
+    starts, ends = (centers[:-1], centers[1:]) if len(path) > 1 else (centers, centers)
+    start_radii, end_radii = (radii[:-1], radii[1:]) if len(path) > 1 else (radii, radii)
+
+    extents = np.concatenate([centers - radii[:, np.newaxis], centers + radii[:, np.newaxis]], axis=0)
+    min_x, min_y, max_x, max_y = crack_region_of_interest(np.rint(extents).astype(np.int32), surface)
+    signed_distances = np.full((max_y - min_y, max_x - min_x), np.inf)
+
+    # Only consider the tiles and segments of which the bounding boxes overlap
+    max_radii = np.maximum(start_radii, end_radii)[:, np.newaxis]
+    segment_mins = np.minimum(starts, ends) - max_radii
+    segment_maxs = np.maximum(starts, ends) + max_radii
+    tile_xs, tile_ys = np.meshgrid(np.arange(min_x, max_x, CAPSULE_TILE_SIZE), np.arange(min_y, max_y, CAPSULE_TILE_SIZE))
+    tile_xs, tile_ys = tile_xs.ravel(), tile_ys.ravel()
+    tile_max_xs = np.minimum(tile_xs + CAPSULE_TILE_SIZE, max_x)
+    tile_max_ys = np.minimum(tile_ys + CAPSULE_TILE_SIZE, max_y)
+    overlapping = (segment_mins[np.newaxis, :, 0] < tile_max_xs[:, np.newaxis]) & \
+        (segment_maxs[np.newaxis, :, 0] >= tile_xs[:, np.newaxis]) & \
+        (segment_mins[np.newaxis, :, 1] < tile_max_ys[:, np.newaxis]) & \
+        (segment_maxs[np.newaxis, :, 1] >= tile_ys[:, np.newaxis])
+
+    for tile_idx in np.flatnonzero(np.any(overlapping, axis=1)):
+        tile_x, tile_y = tile_xs[tile_idx], tile_ys[tile_idx]
+        tile_max_x, tile_max_y = tile_max_xs[tile_idx], tile_max_ys[tile_idx]
+        tile_shape = (tile_max_y - tile_y, tile_max_x - tile_x)
+        segments = overlapping[tile_idx]
+        distances = capsule_distances(
+            np.broadcast_to(np.arange(tile_x, tile_max_x, dtype=np.float64), tile_shape).ravel(),
+            np.broadcast_to(np.arange(tile_y, tile_max_y, dtype=np.float64)[:, np.newaxis], tile_shape).ravel(),
+            starts[segments],
+            ends[segments],
+            start_radii[segments],
+            end_radii[segments]
+        )
+        signed_distances[tile_y - min_y:tile_max_y - min_y, tile_x - min_x:tile_max_x - min_x] = distances.reshape(tile_shape)
+
+    # Pixels inside the crack are at least one pixel away from the edge, similar to a distance transform
+    height_map = np.zeros(signed_distances.shape, dtype=np.float64)
+    mask = signed_distances <= 0
+    if np.any(mask):
+        edge_distances = 1. - signed_distances[mask]
+        depth_table = gaussian_depth_table(parameters.sigma, parameters.width_stds_offset)
+        table_indices = np.rint((np.max(edge_distances) - edge_distances) / DEPTH_TABLE_RESOLUTION).astype(np.int64)
+        height_map[mask] = depth_table[np.minimum(table_indices, depth_table.shape[0] - 1)]
+
+    return CrackHeightMap(height_map, (min_x, min_y), surface.height_map.shape)
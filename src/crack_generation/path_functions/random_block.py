@@ -0,0 +1,26 @@
+import numpy as np
+
+DEFAULT_BLOCK_SIZE = 1024
+
+
+class RandomBlock:
+    """Source of uniform random numbers in [0, 1) which are drawn from a generator in blocks instead of one by one."""
+
+    rng: np.random.Generator
+    block_size: int
+
+    def __init__(self, rng: np.random.Generator, block_size: int = DEFAULT_BLOCK_SIZE):
+        self.rng = rng
+        self.block_size = block_size
+        self._values = []
+        self._idx = 0
+
+    def sample(self) -> float:
+        """Return the next random number, drawing a new block when the current one is used up."""
+        if self._idx >= len(self._values):
+            self._values = self.rng.random(self.block_size).tolist()
+            self._idx = 0
+
+        value = self._values[self._idx]
+        self._idx += 1
+        return value
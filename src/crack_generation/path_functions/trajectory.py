@@ -6,16 +6,21 @@ from .collision import within_surface
 from .pivot_point import PIVOT_DIRECTION_LEFT, PIVOT_DIRECTION_RIGHT, determine_start_point, generate_pivot_point
 
 
-def generate_pivot_trajectory(surface: Surface, parameters: CrackGenerationParameters) -> tuple[Point, list[tuple[int, int]]]:
+def generate_pivot_trajectory(
+    surface: Surface,
+    parameters: CrackGenerationParameters,
+    rng: np.random.Generator
+) -> tuple[Point, list[tuple[int, int]]]:
     """Generate a list of pivot points and a starting point, detailing the crack trajectory."""
-    pivot_direction = np.random.choice([PIVOT_DIRECTION_LEFT, PIVOT_DIRECTION_RIGHT])
+    pivot_direction = rng.choice([PIVOT_DIRECTION_LEFT, PIVOT_DIRECTION_RIGHT])
     start_point = determine_start_point(
         surface,
         parameters.trajectory_parameters,
         pivot_direction,
-        parameters.dimension_parameters.width
+        parameters.dimension_parameters.width,
+        rng
     )
-    num_pivot_points = np.random.randint(1, parameters.trajectory_parameters.max_pivot_points)
+    num_pivot_points = rng.integers(1, parameters.trajectory_parameters.max_pivot_points)
 
     pivot_points = [start_point.center]
     for idx in range(1, num_pivot_points + 1):
@@ -24,7 +29,8 @@ def generate_pivot_trajectory(surface: Surface, parameters: CrackGenerationParam
             surface,
             parameters.trajectory_parameters,
             pivot_direction,
-            idx == 1
+            idx == 1,
+            rng
         )
         pivot_points.append(next_pivot_point)
 
@@ -33,3 +39,26 @@ def generate_pivot_trajectory(surface: Surface, parameters: CrackGenerationParam
             break
 
     return start_point, pivot_points[1:]
+
+
+def extend_pivot_trajectory(
+    start_point: Point,
+    pivot_points: list[tuple[int, int]],
+    surface: Surface,
+    parameters: CrackGenerationParameters,
+    rng: np.random.Generator
+) -> tuple[int, int]:
+    """
+    Generate the next pivot point of an existing trajectory.
+    The pivot direction follows from the start point, which lies on the side of the surface the trajectory moves away from.
+    """
+    pivot_direction = PIVOT_DIRECTION_RIGHT if start_point.center[0] < surface.height_map.shape[1] / 2 \
+        else PIVOT_DIRECTION_LEFT
+    return generate_pivot_point(
+        pivot_points[-1] if len(pivot_points) > 0 else start_point.center,
+        surface,
+        parameters.trajectory_parameters,
+        pivot_direction,
+        len(pivot_points) == 0,
+        rng
+    )
@@ -0,0 +1,197 @@
+from typing import Union
+
+import numpy as np
+
+from crack_generation.model import Surface
+
+MORTAR_INTENSITY = 40  # Height map value of the mortar
+BRICK_INTENSITY = 200  # Height map value of the bricks
+
+
+def create_brick_row(
+    width: int,
+    brick_width: int,
+    mortar_width: int,
+    offset: int,
+    jitter: float,
+    rng: np.random.Generator
+) -> tuple[np.array, np.array]:
+    """
+    Create the start and end columns of the bricks in a row that covers [0, width), with the first brick shifted left
+    by the offset. The widths of the bricks vary by up to the jitter times the brick width.
+    """
+    min_pitch = int(brick_width * (1 - jitter)) + mortar_width
+    num_bricks = (width + offset) // max(min_pitch, 1) + 3
+    widths = np.rint(brick_width * (1 + rng.uniform(-jitter, jitter, num_bricks))).astype(np.int64)
+    widths = np.maximum(widths, 1)
+    starts = np.concatenate([[0], np.cumsum(widths[:-1] + mortar_width)]) - offset - brick_width - mortar_width
+    return starts, starts + widths
+
+
+def nearest_brick_columns(x: np.array, starts: np.array, ends: np.array) -> tuple[np.array, np.array, np.array]:
+    """
+    For each column, find the brick in a row that is horizontally nearest. Returns its clipped start and end columns
+    and the signed horizontal offset from it. Bricks that lie fully outside the surface are never nearest.
+    """
+    width = x.shape[0]
+    visible = (ends > 0) & (starts < width)
+    starts, ends = np.clip(starts[visible], 0, width), np.clip(ends[visible], 0, width)
+
+    # The brick starting at or before the column, or the one after it when the column is in the following joint
+    before = np.clip(np.searchsorted(starts, x, side='right') - 1, 0, starts.shape[0] - 1)
+    after = np.minimum(before + 1, starts.shape[0] - 1)
+    distance_before = np.maximum(np.maximum(starts[before] - x, x - (ends[before] - 1)), 0)
+    distance_after = np.where(after > before, np.maximum(starts[after] - x, 0), np.iinfo(np.int64).max)
+    nearest = np.where(distance_after < distance_before, after, before)
+    starts, ends = starts[nearest], ends[nearest]
+    return starts, ends, (x - np.clip(x, starts, ends - 1)).astype(np.float32)
+
+
+def fill_joint_rows(
+    y0: int,
+    y1: int,
+    rows: list[tuple[np.array, np.array, np.array]],
+    row_starts: np.array,
+    row_ends: np.array,
+    distance_transform: np.array,
+    gradient_vectors: np.array,
+    nearest_mortar: np.array
+) -> None:
+    """
+    Fill the maps for pixel rows [y0, y1) within a horizontal joint. These are all mortar, so their nearest brick
+    pixel is in one of the two brick rows on either side of the joint.
+    """
+    width = distance_transform.shape[1]
+    y = np.arange(y0, y1)[:, np.newaxis]
+
+    distance = offset_x = offset_y = None
+    for (_, _, row_offset_x), row_start, row_end in zip(rows, row_starts, row_ends):
+        row_offset_y = (y - np.clip(y, row_start, row_end - 1)).astype(np.float32)
+        row_distance = np.hypot(row_offset_x, row_offset_y)
+        if distance is None:
+            distance, offset_x, offset_y = row_distance, row_offset_x, row_offset_y
+        else:
+            closer = row_distance < distance
+            distance = np.where(closer, row_distance, distance)
+            offset_x = np.where(closer, row_offset_x, offset_x)
+            offset_y = np.where(closer, row_offset_y, offset_y)
+
+    distance_transform[y0:y1] = distance
+    gradient_vectors[y0:y1, :, 0] = offset_x / distance
+    gradient_vectors[y0:y1, :, 1] = offset_y / distance
+    nearest_mortar[y0:y1] = y * width + np.arange(width, dtype=nearest_mortar.dtype)
+
+
+def fill_brick_rows(
+    y0: int,
+    y1: int,
+    row: tuple[np.array, np.array, np.array],
+    distance_transform: np.array,
+    gradient_vectors: np.array,
+    nearest_mortar: np.array
+) -> None:
+    """
+    Fill the maps for the pixel rows [y0, y1) of a row of bricks. Bricks in other rows are always further away than
+    the bricks next to a vertical joint, so every pixel row is the same in the mortar.
+    """
+    height, width = distance_transform.shape
+    starts, ends, offset_x = row
+    x = np.arange(width, dtype=nearest_mortar.dtype)
+    y = np.arange(y0, y1, dtype=nearest_mortar.dtype)[:, np.newaxis]
+    in_mortar = offset_x != 0
+
+    # Inside a brick, move out through the nearest edge that borders mortar within the surface. Every pixel row is
+    # filled as if moving out horizontally first, after which the pixels nearer to the top or bottom are corrected.
+    left_distance = np.where(starts > 0, x - starts + 1, np.inf)
+    right_distance = np.where(ends < width, ends - x, np.inf)
+    exit_left = left_distance < right_distance
+    horizontal_distance = np.where(in_mortar, 0, np.minimum(left_distance, right_distance))
+    mortar_x = np.where(in_mortar | np.isinf(horizontal_distance), x, np.where(exit_left, starts - 1, ends))
+
+    distance_transform[y0:y1] = np.abs(offset_x)
+    gradient_vectors[y0:y1, :, 0] = np.where(in_mortar, np.sign(offset_x), np.where(exit_left, -1, 1))
+    gradient_vectors[y0:y1, :, 1] = 0
+    nearest_mortar[y0:y1] = y * width + mortar_x
+
+    top_distance = np.where(y0 > 0, y - y0 + 1, np.inf)
+    bottom_distance = np.where(y1 < height, y1 - y, np.inf)
+    exit_top = top_distance < bottom_distance
+    exit_vertically = np.minimum(top_distance, bottom_distance) < horizontal_distance
+    np.copyto(gradient_vectors[y0:y1, :, 0], 0, where=exit_vertically)
+    np.copyto(gradient_vectors[y0:y1, :, 1], np.where(exit_top, -1, 1).astype(np.float32), where=exit_vertically)
+    np.copyto(nearest_mortar[y0:y1], np.where(exit_top, y0 - 1, y1) * width + x, where=exit_vertically)
+
+
+def create_procedural_surface(
+    height: int,
+    width: int,
+    brick_width: int,
+    brick_height: int,
+    mortar_width: int,
+    bond_offset: float = 0.5,
+    jitter: float = 0.,
+    seed: Union[int, np.random.Generator, None] = 0
+) -> Surface:
+    """
+    Create a surface of a brick wall directly from its layout, without analysing an image.
+    Every row of bricks is shifted by the bond offset times the brick pitch relative to the row above, such that 0.5
+    gives a running bond and 0 a stack bond. Brick widths and heights vary randomly by up to the jitter times their
+    size. The brick dims exclude the mortar, like those estimated from images, and are exact.
+    The distance transform is the exact euclidean distance to the nearest brick pixel. Its gradient points away from the
+    nearest brick pixel in the mortar and towards the nearest mortar pixel inside the bricks.
+    """
+    if not 0 <= jitter < 0.5:
+        raise ValueError(f'Jitter should be in [0, 0.5), got {jitter}')
+    rng = np.random.default_rng(seed)
+    pitch = brick_width + mortar_width
+
+    # Rows of bricks, starting above the surface such that the top is covered
+    row_heights = np.maximum(np.rint(brick_height * (1 + rng.uniform(
+        -jitter, jitter, height // max(int(brick_height * (1 - jitter)) + mortar_width, 1) + 3
+    ))).astype(np.int64), 1)
+    row_starts = np.concatenate([[0], np.cumsum(row_heights[:-1] + mortar_width)]) - brick_height - mortar_width // 2
+    row_ends = row_starts + row_heights
+    visible = (row_ends > 0) & (row_starts < height)
+    row_starts, row_ends = np.clip(row_starts[visible], 0, height), np.clip(row_ends[visible], 0, height)
+    first_row = int(np.flatnonzero(visible)[0])
+
+    x = np.arange(width)
+    rows = []
+    for row in range(row_starts.shape[0]):
+        offset = int(round(((first_row + row) * bond_offset % 1) * pitch))
+        rows.append(nearest_brick_columns(x, *create_brick_row(width, brick_width, mortar_width, offset, jitter, rng)))
+
+    distance_transform = np.empty((height, width), dtype=np.float32)
+    gradient_angles = np.empty((height, width), dtype=np.float64)
+    gradient_vectors = np.empty((height, width, 2), dtype=np.float32)
+    nearest_mortar = np.empty((height, width), dtype=np.int32 if height * width < np.iinfo(np.int32).max else np.int64)
+
+    # Every pixel row is handled together with the brick row nearest to it
+    row_bounds = np.concatenate([[0], (row_ends[:-1] + row_starts[1:]) // 2, [height]])
+    for row in range(row_starts.shape[0]):
+        for y0, y1 in ((row_bounds[row], row_starts[row]), (row_ends[row], row_bounds[row + 1])):
+            if y1 > y0:
+                # The joint above a row borders the row before it, the joint below borders the row after it
+                neighbours = slice(max(row - 1, 0), row + 1) if y1 <= row_starts[row] else slice(row, row + 2)
+                fill_joint_rows(
+                    y0, y1, rows[neighbours], row_starts[neighbours], row_ends[neighbours],
+                    distance_transform, gradient_vectors, nearest_mortar
+                )
+        fill_brick_rows(row_starts[row], row_ends[row], rows[row], distance_transform, gradient_vectors, nearest_mortar)
+
+        block = slice(row_bounds[row], row_bounds[row + 1])
+        gradient_angles[block] = np.arctan2(gradient_vectors[block, :, 1], gradient_vectors[block, :, 0])
+
+    height_map = np.where(distance_transform > 0, MORTAR_INTENSITY, BRICK_INTENSITY).astype(np.uint8)
+    return Surface(
+        height_map=height_map,
+        distance_transform=distance_transform,
+        gradient_angles=gradient_angles,
+        gradient_vectors=gradient_vectors,
+        brick_width=brick_width,
+        brick_height=brick_height,
+        nearest_mortar=nearest_mortar,
+        left_edge_candidates=np.argsort(-distance_transform[:, 0], kind='stable'),
+        right_edge_candidates=np.argsort(-distance_transform[:, -1], kind='stable'),
+        top_edge_candidates=np.argsort(-distance_transform[0, :], kind='stable')
+    )
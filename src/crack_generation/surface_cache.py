@@ -0,0 +1,120 @@
+import dataclasses
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+from typing import Union
+
+import numpy as np
+
+from crack_generation.model import Surface
+from crack_generation.surface_generation import create_surface_from_image, SURFACE_ANALYSIS_SETTINGS
+from crack_generation.surface_tiling import create_surface_arrays_tiled, TILE_OVERLAP
+
+SURFACE_CACHE_VERSION = 2
+SURFACE_METADATA_FILE = 'surface.json'
+
+
+def surface_cache_key(image: np.array, tile_size: Union[int, None] = None) -> str:
+    """Create the content address of a surface texture, combined with the settings used to analyse it."""
+    digest = hashlib.sha256()
+    digest.update(json.dumps({
+        'version': SURFACE_CACHE_VERSION,
+        'shape': image.shape,
+        'dtype': str(image.dtype),
+        'settings': SURFACE_ANALYSIS_SETTINGS,
+        'tiling': None if tile_size is None else {'tile_size': tile_size, 'tile_overlap': TILE_OVERLAP},
+    }, sort_keys=True).encode())
+    digest.update(np.ascontiguousarray(image).data)
+    return digest.hexdigest()
+
+
+def save_surface(surface: Surface, directory: str) -> None:
+    """
+    Save the analysis results of a surface to a directory, one .npy file per array and a metadata file for the rest.
+    The height map is stored as well, such that the surface can be used without access to its texture source.
+    """
+    os.makedirs(directory, exist_ok=True)
+    metadata = {}
+    for field in dataclasses.fields(Surface):
+        value = getattr(surface, field.name)
+        if isinstance(value, np.ndarray):
+            np.save(os.path.join(directory, f'{field.name}.npy'), value)
+        else:
+            metadata[field.name] = value
+
+    with open(os.path.join(directory, SURFACE_METADATA_FILE), 'w') as metadata_file:
+        json.dump(metadata, metadata_file)
+
+
+def load_surface(image: Union[np.array, None], directory: str) -> Surface:
+    """
+    Load the analysis results of a surface from a directory. The arrays are memory mapped in read-only mode.
+    Without an image, the stored height map is used.
+    """
+    with open(os.path.join(directory, SURFACE_METADATA_FILE), 'r') as metadata_file:
+        metadata = json.load(metadata_file)
+
+    arrays = {
+        field.name: np.load(os.path.join(directory, f'{field.name}.npy'), mmap_mode='r')
+        for field in dataclasses.fields(Surface) if field.name not in metadata
+    }
+    if image is not None:
+        arrays['height_map'] = image
+    return Surface(**arrays, **metadata)
+
+
+def cached_surface_keys(cache_directory: str) -> list[str]:
+    """List the keys of all surfaces in a cache directory."""
+    if not os.path.isdir(cache_directory):
+        return []
+    return sorted(
+        key for key in os.listdir(cache_directory)
+        if not key.startswith('.') and os.path.isfile(os.path.join(cache_directory, key, SURFACE_METADATA_FILE))
+    )
+
+
+def save_surface_tiled(image: np.array, directory: str, tile_size: int) -> None:
+    """Analyse an image tile by tile and save the results to a directory, in the same layout as save_surface."""
+    brick_width, brick_height = create_surface_arrays_tiled(image, directory, tile_size)
+    np.save(os.path.join(directory, 'height_map.npy'), image)
+    with open(os.path.join(directory, SURFACE_METADATA_FILE), 'w') as metadata_file:
+        json.dump({'brick_width': brick_width, 'brick_height': brick_height}, metadata_file)
+
+
+def load_or_create_surface(
+    image: np.array,
+    cache_directory: Union[str, None],
+    tile_size: Union[int, None] = None
+) -> Surface:
+    """
+    Create a surface from an image, reusing earlier analysis results from the cache directory when available.
+    Without a cache directory, this is the same as create_surface_from_image.
+    With a tile size, the image is analysed tile by tile straight into the cache, which bounds the memory usage for
+    images that do not fit in memory. The image can then be memory mapped as well.
+    """
+    if cache_directory is None:
+        if tile_size is not None:
+            raise ValueError('Tiled surface analysis requires a cache directory to store the results in')
+        return create_surface_from_image(image)
+
+    surface_directory = os.path.join(cache_directory, surface_cache_key(image, tile_size))
+    if os.path.isfile(os.path.join(surface_directory, SURFACE_METADATA_FILE)):
+        return load_surface(image, surface_directory)
+
+    # Write to a temporary directory first, such that other processes never see a partially written surface
+    os.makedirs(cache_directory, exist_ok=True)
+    temporary_directory = tempfile.mkdtemp(prefix='.surface-', dir=cache_directory)
+    try:
+        if tile_size is None:
+            save_surface(create_surface_from_image(image), temporary_directory)
+        else:
+            save_surface_tiled(image, temporary_directory, tile_size)
+        os.rename(temporary_directory, surface_directory)
+    except OSError:
+        shutil.rmtree(temporary_directory, ignore_errors=True)
+        if not os.path.isfile(os.path.join(surface_directory, SURFACE_METADATA_FILE)):
+            raise
+
+    return load_surface(image, surface_directory)
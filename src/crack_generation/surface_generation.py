@@ -4,6 +4,19 @@ from scipy.signal import find_peaks
 
 from crack_generation.model import Surface
 
+MEDIAN_BLUR_SIZE = 15
+THRESHOLD_WINDOW_FRACTION = 20  # The adaptive threshold window is 1 / fraction of the smallest image dimension
+THRESHOLD_OFFSET = 2
+SOBEL_KERNEL_SIZE = 5
+
+# All settings that influence the analysis of a surface, used to identify cached surfaces.
+SURFACE_ANALYSIS_SETTINGS = {
+    'median_blur_size': MEDIAN_BLUR_SIZE,
+    'threshold_window_fraction': THRESHOLD_WINDOW_FRACTION,
+    'threshold_offset': THRESHOLD_OFFSET,
+    'sobel_kernel_size': SOBEL_KERNEL_SIZE,
+}
+
 
 def find_brick_dims(thresholded: np.array) -> tuple[int, int]:
     """Approximate brick dims using the thresholded image. We take the last peak of the histogram as the width and height."""
@@ -22,6 +35,11 @@ def find_brick_dims(thresholded: np.array) -> tuple[int, int]:
             widths.append(width)
             heights.append(height)
 
+    return estimate_brick_dims(np.array(widths), np.array(heights))
+
+
+def estimate_brick_dims(widths: np.array, heights: np.array) -> tuple[int, int]:
+    """Estimate brick dims from the bounding box sizes of the bricks. We take the last peak of the histogram as the dims."""
     counts_w, bins_w = np.histogram(widths)
     counts_h, bins_h = np.histogram(heights)
     width_peaks, _ = find_peaks(counts_w, height=0)
@@ -30,19 +48,88 @@ def find_brick_dims(thresholded: np.array) -> tuple[int, int]:
     return int(bins_w[width_peaks[-1]]), int(bins_h[height_peaks[-1]])
 
 
+def create_mortar_index(distance_transform: np.array) -> tuple[np.array, np.array, np.array, np.array]:
+    """
+    Create the mortar lookup index of a distance transform: a map with the flat index of the nearest mortar pixel for
+    each pixel, and the left column, right column and top row edge candidates sorted on descending distance transform.
+    """
+    mortar = distance_transform > 0
+    if not np.any(mortar):
+        nearest_mortar = np.arange(mortar.size).reshape(mortar.shape)
+    else:
+        # Every mortar pixel gets its own label, which we map back to its flat index
+        _, labels = cv2.distanceTransformWithLabels(
+            (~mortar).astype(np.uint8),
+            cv2.DIST_L2,
+            cv2.DIST_MASK_5,
+            labelType=cv2.DIST_LABEL_PIXEL
+        )
+        mortar_indices = np.flatnonzero(mortar)
+        label_indices = np.zeros(np.max(labels) + 1, dtype=np.int64)
+        label_indices[labels.ravel()[mortar_indices]] = mortar_indices
+        nearest_mortar = label_indices[labels]
+
+    nearest_mortar = nearest_mortar.astype(np.int32 if mortar.size < np.iinfo(np.int32).max else np.int64)
+    return (
+        nearest_mortar,
+        np.argsort(-distance_transform[:, 0], kind='stable'),
+        np.argsort(-distance_transform[:, -1], kind='stable'),
+        np.argsort(-distance_transform[0, :], kind='stable')
+    )
+
+
+def threshold_window_size(shape: tuple[int, int]) -> int:
+    """Get the adaptive threshold window size for an image of the given shape."""
+    kernel_size = np.min(shape) // THRESHOLD_WINDOW_FRACTION  # Consider a 5% window
+    kernel_size += 1 - kernel_size % 2  # Make uneven if necessary
+    return int(kernel_size)
+
+
 def create_surface_from_image(image: np.array) -> Surface:
     """Create a surface from an image through thresholding."""
-    blurred = cv2.medianBlur(image, 15)
-    kernel_size = np.min(image.shape) // 20  # Consider a 5% window
-    kernel_size += 1 - kernel_size % 2  # Make uneven if necessary
-    thresholded = cv2.adaptiveThreshold(blurred, 255, cv2.ADAPTIVE_THRESH_MEAN_C, cv2.THRESH_BINARY, kernel_size, 2)
+    blurred = cv2.medianBlur(image, MEDIAN_BLUR_SIZE)
+    kernel_size = threshold_window_size(image.shape)
+    thresholded = cv2.adaptiveThreshold(
+        blurred,
+        255,
+        cv2.ADAPTIVE_THRESH_MEAN_C,
+        cv2.THRESH_BINARY,
+        kernel_size,
+        THRESHOLD_OFFSET
+    )
 
     inverse_thresholded = 255 - thresholded
     distance_transform = cv2.distanceTransform(inverse_thresholded, cv2.DIST_L2, cv2.DIST_MASK_5)
 
-    grad_x = cv2.Sobel(distance_transform, cv2.CV_64F, 1, 0, ksize=5)
-    grad_y = cv2.Sobel(distance_transform, cv2.CV_64F, 0, 1, ksize=5)
+    brick_width, brick_height = find_brick_dims(thresholded)
+    return create_surface_from_distance_transform(image, distance_transform, brick_width, brick_height)
+
+
+def create_surface_from_distance_transform(
+    height_map: np.array,
+    distance_transform: np.array,
+    brick_width: int,
+    brick_height: int
+) -> Surface:
+    """Create a surface from its height map, mortar distance transform and brick dims by deriving the other maps."""
+    grad_x = cv2.Sobel(distance_transform, cv2.CV_64F, 1, 0, ksize=SOBEL_KERNEL_SIZE)
+    grad_y = cv2.Sobel(distance_transform, cv2.CV_64F, 0, 1, ksize=SOBEL_KERNEL_SIZE)
     angles = np.arctan2(grad_y, grad_x)
+    vectors = np.stack([np.cos(angles), np.sin(angles)], axis=-1).astype(np.float32)
 
-    brick_width, brick_height = find_brick_dims(thresholded)
-    return Surface(image, distance_transform, angles, brick_width, brick_height)
+    nearest_mortar, left_edge_candidates, right_edge_candidates, top_edge_candidates = create_mortar_index(
+        distance_transform
+    )
+
+    return Surface(
+        height_map=height_map,
+        distance_transform=distance_transform,
+        gradient_angles=angles,
+        gradient_vectors=vectors,
+        brick_width=brick_width,
+        brick_height=brick_height,
+        nearest_mortar=nearest_mortar,
+        left_edge_candidates=left_edge_candidates,
+        right_edge_candidates=right_edge_candidates,
+        top_edge_candidates=top_edge_candidates
+    )
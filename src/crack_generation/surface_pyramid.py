@@ -0,0 +1,41 @@
+from typing import Union
+
+import cv2
+import numpy as np
+
+from crack_generation.model import Surface, SurfacePyramid
+from crack_generation.surface_cache import load_or_create_surface
+from crack_generation.surface_generation import create_surface_from_distance_transform
+
+
+def downsample_surface(surface: Surface) -> Surface:
+    """
+    Create a surface at half the resolution of a surface by downsampling its analysis results.
+    A pixel of the new surface is part of the mortar if any of the pixels it covers is.
+    """
+    height, width = surface.height_map.shape
+    new_size = (max(width // 2, 1), max(height // 2, 1))
+    height_map = cv2.resize(np.asarray(surface.height_map), new_size, interpolation=cv2.INTER_AREA)
+    distance_transform = cv2.resize(
+        np.asarray(surface.distance_transform, dtype=np.float32),
+        new_size,
+        interpolation=cv2.INTER_AREA
+    ) / 2.
+
+    return create_surface_from_distance_transform(
+        height_map,
+        distance_transform,
+        max(surface.brick_width // 2, 1),
+        max(surface.brick_height // 2, 1)
+    )
+
+
+def create_surface_pyramid(image: np.array, num_levels: int, cache_directory: Union[str, None] = None) -> SurfacePyramid:
+    """
+    Create a pyramid of surfaces from an image. The image is analysed once at full resolution, which is optionally
+    cached, after which every coarser level halves the resolution of the previous level.
+    """
+    levels = [load_or_create_surface(image, cache_directory)]
+    for _ in range(1, num_levels):
+        levels.append(downsample_surface(levels[-1]))
+    return SurfacePyramid(levels)
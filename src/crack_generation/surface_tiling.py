@@ -0,0 +1,101 @@
+import os
+
+import cv2
+import numpy as np
+
+from crack_generation.surface_generation import MEDIAN_BLUR_SIZE, THRESHOLD_OFFSET, SOBEL_KERNEL_SIZE, \
+    threshold_window_size, estimate_brick_dims
+
+DEFAULT_TILE_SIZE = 4096
+TILE_OVERLAP = 256  # Distances to the mortar and brick dims are exact up to this many pixels beyond a tile
+MIN_BRICK_SIZE = 2  # Smaller components are considered noise when estimating the brick dims
+
+
+def create_surface_arrays_tiled(image: np.array, directory: str, tile_size: int = DEFAULT_TILE_SIZE) -> tuple[int, int]:
+    """
+    Analyse an image tile by tile and write the surface arrays to memory mapped .npy files in a directory.
+    Only one padded tile is kept in memory at a time, so the image itself can be memory mapped as well.
+    Returns the brick width and height, which are estimated from the bricks that are fully visible in a tile.
+    """
+    height, width = image.shape
+    kernel_size = threshold_window_size(image.shape)
+    padding = TILE_OVERLAP + kernel_size // 2 + MEDIAN_BLUR_SIZE // 2 + SOBEL_KERNEL_SIZE // 2
+
+    def create_array(name: str, shape: tuple, dtype: type) -> np.array:
+        return np.lib.format.open_memmap(os.path.join(directory, f'{name}.npy'), mode='w+', dtype=dtype, shape=shape)
+
+    os.makedirs(directory, exist_ok=True)
+    distance_transform = create_array('distance_transform', (height, width), np.float32)
+    gradient_angles = create_array('gradient_angles', (height, width), np.float64)
+    gradient_vectors = create_array('gradient_vectors', (height, width, 2), np.float32)
+    nearest_mortar = create_array(
+        'nearest_mortar',
+        (height, width),
+        np.int32 if image.size < np.iinfo(np.int32).max else np.int64
+    )
+
+    brick_widths, brick_heights = [], []
+    for y0 in range(0, height, tile_size):
+        for x0 in range(0, width, tile_size):
+            y1, x1 = min(y0 + tile_size, height), min(x0 + tile_size, width)
+            window_y0, window_y1 = max(y0 - padding, 0), min(y1 + padding, height)
+            window_x0, window_x1 = max(x0 - padding, 0), min(x1 + padding, width)
+            core = (slice(y0 - window_y0, y1 - window_y0), slice(x0 - window_x0, x1 - window_x0))
+
+            window = np.ascontiguousarray(image[window_y0:window_y1, window_x0:window_x1])
+            thresholded = cv2.adaptiveThreshold(
+                cv2.medianBlur(window, MEDIAN_BLUR_SIZE),
+                255,
+                cv2.ADAPTIVE_THRESH_MEAN_C,
+                cv2.THRESH_BINARY,
+                kernel_size,
+                THRESHOLD_OFFSET
+            )
+            window_distance_transform = cv2.distanceTransform(255 - thresholded, cv2.DIST_L2, cv2.DIST_MASK_5)
+
+            grad_x = cv2.Sobel(window_distance_transform, cv2.CV_64F, 1, 0, ksize=SOBEL_KERNEL_SIZE)[core]
+            grad_y = cv2.Sobel(window_distance_transform, cv2.CV_64F, 0, 1, ksize=SOBEL_KERNEL_SIZE)[core]
+            angles = np.arctan2(grad_y, grad_x)
+            distance_transform[y0:y1, x0:x1] = window_distance_transform[core]
+            gradient_angles[y0:y1, x0:x1] = angles
+            gradient_vectors[y0:y1, x0:x1] = np.stack([np.cos(angles), np.sin(angles)], axis=-1)
+
+            # Map the nearest mortar pixel within the window back to its index in the full image
+            mortar = window_distance_transform > 0
+            if np.any(mortar):
+                _, labels = cv2.distanceTransformWithLabels(
+                    (~mortar).astype(np.uint8),
+                    cv2.DIST_L2,
+                    cv2.DIST_MASK_5,
+                    labelType=cv2.DIST_LABEL_PIXEL
+                )
+                mortar_indices = np.flatnonzero(mortar)
+                label_indices = np.zeros(np.max(labels) + 1, dtype=np.int64)
+                label_indices[labels.ravel()[mortar_indices]] = mortar_indices
+                window_y, window_x = np.divmod(label_indices[labels[core]], window_x1 - window_x0)
+                nearest_mortar[y0:y1, x0:x1] = (window_y + window_y0) * width + window_x + window_x0
+            else:
+                nearest_mortar[y0:y1, x0:x1] = np.arange(y0, y1)[:, np.newaxis] * width + np.arange(x0, x1)
+
+            # Collect the bricks that are fully visible within the overlap and that start in this tile, such that
+            # every brick is counted exactly once
+            _, _, stats, _ = cv2.connectedComponentsWithStats(thresholded, connectivity=8)
+            left = stats[1:, cv2.CC_STAT_LEFT] + window_x0
+            top = stats[1:, cv2.CC_STAT_TOP] + window_y0
+            right = left + stats[1:, cv2.CC_STAT_WIDTH]
+            bottom = top + stats[1:, cv2.CC_STAT_HEIGHT]
+            complete = ((left > x0 - TILE_OVERLAP) | (left == 0)) & ((right < x1 + TILE_OVERLAP) | (right == width)) & \
+                ((top > y0 - TILE_OVERLAP) | (top == 0)) & ((bottom < y1 + TILE_OVERLAP) | (bottom == height))
+            owned = (left >= x0) & (left < x1) & (top >= y0) & (top < y1)
+            large = (stats[1:, cv2.CC_STAT_WIDTH] >= MIN_BRICK_SIZE) & (stats[1:, cv2.CC_STAT_HEIGHT] >= MIN_BRICK_SIZE)
+            selected = complete & owned & large
+            brick_widths.append(stats[1:, cv2.CC_STAT_WIDTH][selected])
+            brick_heights.append(stats[1:, cv2.CC_STAT_HEIGHT][selected])
+
+    np.save(os.path.join(directory, 'left_edge_candidates.npy'), np.argsort(-distance_transform[:, 0], kind='stable'))
+    np.save(os.path.join(directory, 'right_edge_candidates.npy'), np.argsort(-distance_transform[:, -1], kind='stable'))
+    np.save(os.path.join(directory, 'top_edge_candidates.npy'), np.argsort(-distance_transform[0, :], kind='stable'))
+    for array in (distance_transform, gradient_angles, gradient_vectors, nearest_mortar):
+        array.flush()
+
+    return estimate_brick_dims(np.concatenate(brick_widths), np.concatenate(brick_heights))
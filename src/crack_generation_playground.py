@@ -2,7 +2,7 @@ from argparse import ArgumentParser
 
 import cv2
 
-from crack_generation import create_surface_from_image
+from crack_generation import load_or_create_surface
 from util import PlaygroundInterface, DEFAULT_PARAMETERS
 
 
@@ -11,9 +11,10 @@ def main():
     parameters = DEFAULT_PARAMETERS
     parser = ArgumentParser()
     parser.add_argument('-f', '--file', type=str, required=True, help='Path to the surface height map to test on.')
-    filename = parser.parse_args().file
-    height_map = cv2.imread(filename, cv2.IMREAD_GRAYSCALE)
-    surface = create_surface_from_image(height_map)
+    parser.add_argument('-c', '--cache', type=str, required=False, help='Directory to cache surface analysis results in.')
+    args = parser.parse_args()
+    height_map = cv2.imread(args.file, cv2.IMREAD_GRAYSCALE)
+    surface = load_or_create_surface(height_map, args.cache)
 
     ui = PlaygroundInterface(surface, parameters)
     ui.start()
@@ -1,3 +1,6 @@
 from .prepare_scene import prepare_scene
-from .generate_render_iteration import generate_render_iteration
+from .generate_render_iteration import generate_render_iteration, ITERATION_SEED_LIMIT
 from .render_crack import render_crack
+from .pipeline_metrics import PipelineMetrics, METRICS_FILE
+from .patch_writer import PatchWriter
+from .dataset_manifest import DatasetManifest, MANIFEST_FILE
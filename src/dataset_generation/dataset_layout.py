@@ -0,0 +1,37 @@
+import json
+
+# Files and directories of a dataset within its output directory
+IMAGES_OUTPUT_DIR = 'images'
+LABELS_OUTPUT_DIR = 'labels'
+SHARDS_OUTPUT_DIR = 'shards'
+SHARD_INDEX_FILE = 'index.jsonl'  # Within the shards directory
+METRICS_FILE = 'metrics.jsonl'
+MANIFEST_FILE = 'manifest.jsonl'
+
+# Types of the manifest records
+RUN_RECORD = 'run'
+ITERATION_RECORD = 'iteration'
+
+
+def read_manifest(path: str) -> tuple[list[dict], list[dict], int]:
+    """
+    Read the run and iteration records of a manifest, along with the size of the file up to the last complete record.
+    A record that was only partially written when a run died is ignored.
+    """
+    runs, iterations = [], []
+    valid_size = 0
+    with open(path, 'rb') as manifest_file:
+        for line in manifest_file:
+            if not line.endswith(b'\n'):
+                break
+            try:
+                record = json.loads(line)
+            except ValueError:
+                break
+
+            valid_size += len(line)
+            if record['type'] == RUN_RECORD:
+                runs.append(record)
+            elif record['type'] == ITERATION_RECORD:
+                iterations.append(record)
+    return runs, iterations, valid_size
@@ -0,0 +1,79 @@
+import json
+import os
+import time
+
+from dataset_generation.model import RenderIteration
+from dataset_generation.model.parameters import LabelParameters
+from dataset_generation.dataset_layout import MANIFEST_FILE, RUN_RECORD, ITERATION_RECORD, read_manifest
+
+
+def label_settings(parameters: LabelParameters) -> dict:
+    """The label parameters that have to stay the same to continue a dataset."""
+    return {
+        'num_patches': parameters.num_patches,
+        'resolution': list(parameters.resolution),
+        'min_active_pixels': parameters.min_active_pixels,
+        'output_format': parameters.output_format,
+    }
+
+
+class DatasetManifest:
+    """
+    Append-only log of the completed iterations of a dataset, stored as JSONL in the output directory. Every iteration
+    records the dataset indices of its images and what it was rendered from, including its seed. Every run adds a
+    record of the parameters it used, such that a resumed run can check that it continues the same dataset.
+    Records are synced to disk as they are written, so a crash loses at most the iterations that were not stored yet.
+    """
+
+    path: str
+    next_index: int  # First dataset index that is not used by a completed iteration
+
+    def __init__(self, path: str, parameters_key: str, label_parameters: LabelParameters, resume: bool = False):
+        """
+        Start the manifest of a run. When resuming, the existing manifest is continued, which requires the parameters
+        to match. Otherwise, the manifest is started over.
+        """
+        self.path = path
+        self.next_index = 0
+        run_record = {
+            'type': RUN_RECORD,
+            'parameters_key': parameters_key,
+            'label': label_settings(label_parameters),
+        }
+
+        if resume and os.path.exists(path):
+            runs, iterations, valid_size = read_manifest(path)
+            if len(runs) > 0 and (runs[0]['parameters_key'], runs[0]['label']) != (parameters_key, run_record['label']):
+                raise ValueError(f'Cannot resume the dataset of {path}, it was generated with different parameters')
+            self.next_index = max((iteration['index'] + iteration['patches'] for iteration in iterations), default=0)
+            with open(path, 'r+b') as manifest_file:
+                manifest_file.truncate(valid_size)  # Drop a partially written record of a crashed run
+            self._file = open(path, 'a')
+        else:
+            self._file = open(path, 'w')
+
+        self._write({**run_record, 'start_index': self.next_index, 'time': time.time()})
+
+    def _write(self, record: dict) -> None:
+        """Append a record and sync it to disk."""
+        self._file.write(json.dumps(record) + '\n')
+        self._file.flush()
+        os.fsync(self._file.fileno())
+
+    def record(self, render_iteration: RenderIteration, num_patches: int) -> None:
+        """Record an iteration of which all images are stored."""
+        self._write({
+            'type': ITERATION_RECORD,
+            'index': render_iteration.index,
+            'patches': num_patches,
+            'seed': render_iteration.seed,
+            'wall': render_iteration.scene.wall.name,
+            'world_texture': render_iteration.world_texture.name,
+            'camera_translation': list(render_iteration.camera_translation),
+            'camera_rotation': list(render_iteration.camera_rotation),
+            'time': time.time(),
+        })
+
+    def close(self) -> None:
+        """Close the manifest file."""
+        self._file.close()
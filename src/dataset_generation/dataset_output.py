@@ -0,0 +1,155 @@
+import io
+import json
+import os
+import tarfile
+import threading
+from pathlib import Path
+from typing import Callable, Union
+
+from dataset_generation.model.parameters import LabelParameters, OUTPUT_DIRECTORY, OUTPUT_TAR
+from dataset_generation.dataset_layout import SHARDS_OUTPUT_DIR, SHARD_INDEX_FILE
+
+SHARD_FILE_FORMAT = 'shard-{:06d}.tar'
+UNFINISHED_SHARD_SUFFIX = '.tmp'
+BYTES_PER_MEGABYTE = 1024 * 1024
+
+
+class DirectoryOutput:
+    """Output writing every image and label as a file into the image and label output directories."""
+
+    def __init__(self, parameters: LabelParameters):
+        self.image_output_directory = parameters.image_output_directory
+        self.label_output_directory = parameters.label_output_directory
+        Path(self.image_output_directory).mkdir(exist_ok=True, parents=True)
+        Path(self.label_output_directory).mkdir(exist_ok=True, parents=True)
+
+    def write(self, name: str, image: bytes, label: bytes, on_stored: Callable[[], None]) -> None:
+        """
+        Write the encoded image and label of a sample and call on_stored once they are on disk. Safe to call from
+        multiple threads.
+        """
+        with open(os.path.join(self.image_output_directory, name), 'wb') as image_file:
+            image_file.write(image)
+        with open(os.path.join(self.label_output_directory, name), 'wb') as label_file:
+            label_file.write(label)
+        on_stored()
+
+    def flush(self) -> None:
+        """Nothing to store, all files are written directly."""
+        pass
+
+    def close(self) -> None:
+        """Nothing to finish, all files are written directly."""
+        pass
+
+
+class TarShardOutput:
+    """
+    Output appending samples to tar shards of a bounded size, which avoids millions of small files. The image and label
+    of a sample are stored next to each other as <name>.image.png and <name>.label.png. A shard is written under a
+    temporary name and only renamed once it is full, flushed or the output is closed, after which its samples are added
+    to a JSONL index with the offsets and sizes of their images and labels within the shard. Shards and index entries
+    therefore only ever appear complete, and samples only count as stored once their shard is finalized.
+    """
+
+    def __init__(self, parameters: LabelParameters):
+        self.directory = os.path.join(parameters.base_output_directory, SHARDS_OUTPUT_DIR)
+        self.max_shard_bytes = parameters.max_shard_megabytes * BYTES_PER_MEGABYTE
+        Path(self.directory).mkdir(exist_ok=True, parents=True)
+
+        self._lock = threading.Lock()
+        self._shard_index = len(self._finished_shards())
+        self._shard: Union[tarfile.TarFile, None] = None
+        self._entries = []
+        self._stored_callbacks = []
+
+    def _finished_shards(self) -> set[str]:
+        """
+        Names of the shards finished by earlier runs, both those in the directory and those in the index, as the
+        shards may have been moved elsewhere since.
+        """
+        shards = {name for name in os.listdir(self.directory) if name.endswith('.tar')}
+        index_path = os.path.join(self.directory, SHARD_INDEX_FILE)
+        if os.path.exists(index_path):
+            with open(index_path, 'r') as index_file:
+                shards.update(json.loads(line)['shard'] for line in index_file if line.endswith('\n'))
+        return shards
+
+    def _shard_path(self) -> str:
+        """Final path of the open shard."""
+        return os.path.join(self.directory, SHARD_FILE_FORMAT.format(self._shard_index))
+
+    def _add_member(self, name: str, data: bytes) -> tuple[int, int]:
+        """Append a file to the open shard and return the offset and size of its data."""
+        info = tarfile.TarInfo(name)
+        info.size = len(data)
+        self._shard.addfile(info, io.BytesIO(data))
+        padded_size = -(-info.size // tarfile.BLOCKSIZE) * tarfile.BLOCKSIZE  # Data is padded to whole blocks
+        return self._shard.offset - padded_size, info.size
+
+    def _finalize_shard(self) -> list[Callable[[], None]]:
+        """
+        Close the open shard, move it to its final name and add its samples to the index. Returns the stored callbacks
+        of its samples, which are called once the lock is released.
+        """
+        self._shard.close()
+        os.replace(self._shard_path() + UNFINISHED_SHARD_SUFFIX, self._shard_path())
+        with open(os.path.join(self.directory, SHARD_INDEX_FILE), 'a') as index_file:
+            index_file.writelines(json.dumps(entry) + '\n' for entry in self._entries)
+        stored_callbacks = self._stored_callbacks
+
+        self._shard = None
+        self._entries = []
+        self._stored_callbacks = []
+        self._shard_index += 1
+        return stored_callbacks
+
+    def write(self, name: str, image: bytes, label: bytes, on_stored: Callable[[], None]) -> None:
+        """
+        Append the encoded image and label of a sample to the open shard and call on_stored once the shard is
+        finalized. Safe to call from multiple threads.
+        """
+        stem, extension = os.path.splitext(name)
+        stored_callbacks = []
+        with self._lock:
+            if self._shard is None:
+                self._shard = tarfile.open(self._shard_path() + UNFINISHED_SHARD_SUFFIX, 'w')
+
+            image_offset, image_size = self._add_member(f'{stem}.image{extension}', image)
+            label_offset, label_size = self._add_member(f'{stem}.label{extension}', label)
+            self._entries.append({
+                'name': name,
+                'shard': os.path.basename(self._shard_path()),
+                'image_offset': image_offset,
+                'image_size': image_size,
+                'label_offset': label_offset,
+                'label_size': label_size,
+            })
+            self._stored_callbacks.append(on_stored)
+
+            if self._shard.offset >= self.max_shard_bytes:
+                stored_callbacks = self._finalize_shard()
+        for on_stored in stored_callbacks:
+            on_stored()
+
+    def flush(self) -> None:
+        """Finalize the open shard, if any, such that its samples are stored before it is full."""
+        stored_callbacks = []
+        with self._lock:
+            if self._shard is not None:
+                stored_callbacks = self._finalize_shard()
+        for on_stored in stored_callbacks:
+            on_stored()
+
+    def close(self) -> None:
+        """Finalize the last shard."""
+        self.flush()
+
+
+def create_dataset_output(parameters: LabelParameters) -> Union[DirectoryOutput, TarShardOutput]:
+    """Create the output of the dataset based on the configured output format."""
+    if parameters.output_format == OUTPUT_DIRECTORY:
+        return DirectoryOutput(parameters)
+    if parameters.output_format == OUTPUT_TAR:
+        return TarShardOutput(parameters)
+    raise ValueError(f'Unknown output format: {parameters.output_format}')
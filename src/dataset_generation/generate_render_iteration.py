@@ -1,53 +1,74 @@
-import functools
-import signal
+from typing import Union
 
 import numpy as np
 
 from crack_generation import CrackGenerator
-from crack_generation.model import Surface, Crack
+from crack_generation.crack_bank import CrackBank
+from crack_generation.crack_layout import place_cracks
+from crack_generation.model import Surface, Crack, WorkBudget, BudgetExceeded
 from dataset_generation.model import Configuration
-from dataset_generation.model import RenderIteration
+from dataset_generation.model import RenderIteration, IterationMetrics
 
-TIMEOUT_TIME = 10
+CRACK_GENERATION_SECONDS = 10  # Time budget for generating the cracks of a single render
+ITERATION_SEED_LIMIT = 2 ** 32  # Upper bound of the iteration seeds recorded in the manifest
 
 
-# Source: https://imzye.com/Python/python-func-timeout/
-def timeout(seconds):
-    def decorator(func):
-        def _handle_timeout(signum, frame):
-            raise TimeoutError(f'Function {func.__name__} timed out')
-
-        @functools.wraps(func)
-        def wrapper(*args, **kwargs):
-            signal.signal(signal.SIGALRM, _handle_timeout)
-            signal.alarm(seconds)
-            try:
-                result = func(*args, **kwargs)
-            finally:
-                signal.alarm(0)
-            return result
-
-        return wrapper
-
-    return decorator
+def generate_crack(
+    crack_generator: CrackGenerator,
+    surface: Surface,
+    min_pixels: int,
+    seed: Union[int, np.random.Generator, None] = None
+) -> Crack:
+    """
+    Generate the cracks for the surface given a minimum amount of active pixels per crack, following the layout
+    parameters of the generator, drawing all randomness from the seed.
+    """
+    result = crack_generator.generate_layout(
+        surface,
+        min_pixels,
+        seed=seed,
+        budget=WorkBudget(max_seconds=CRACK_GENERATION_SECONDS)
+    )
+    if isinstance(result, BudgetExceeded):
+        raise TimeoutError(
+            f'Crack generation timed out after {result.attempts} attempts and {result.steps} steps '
+            f'({round(result.elapsed_seconds, 2)} seconds)'
+        )
+    return result
 
 
-@timeout(TIMEOUT_TIME)
-def generate_crack(crack_generator: CrackGenerator, surface: Surface, min_pixels: int) -> Crack:
-    """Generate a crack for the surface given a minimum amount of active pixels."""
-    crack = crack_generator(surface)
-    while np.sum(crack.crack_height_map) < min_pixels:
-        crack = crack_generator(surface)
-    return crack
+def sample_crack(
+    crack_generator: CrackGenerator,
+    crack_bank: CrackBank,
+    surface: Surface,
+    min_pixels: int,
+    rng: np.random.Generator
+) -> Crack:
+    """
+    Draw the cracks for the surface from a crack bank given a minimum amount of active pixels per crack, following the
+    layout parameters of the generator. Branches are generated on top of the drawn cracks.
+    """
+    return place_cracks(
+        lambda: crack_generator.add_branches(crack_bank.sample(min_height_sum=min_pixels, rng=rng), surface, rng),
+        surface.height_map.shape,
+        crack_generator.parameters.layout_parameters
+    )
 
 
 def generate_render_iteration(
     config: Configuration,
     crack_generator: CrackGenerator,
-    iteration: int
+    iteration: int,
+    metrics: IterationMetrics,
+    seed: Union[int, None] = None
 ) -> RenderIteration:
-    """Generate a new random RenderIteration."""
-    random_state = np.random.random_sample(6)
+    """
+    Generate a new random RenderIteration. The time spent on getting its crack is added to the metrics.
+    Given a seed below ITERATION_SEED_LIMIT, the iteration is reproducible for the same configuration and assets.
+    All randomness is drawn from a generator of the seed, leaving the global NumPy random state untouched.
+    """
+    rng = np.random.default_rng(seed)
+    random_state = rng.random(6)
 
     camera_parameters = config.camera_parameters
     x_distance_diff = camera_parameters.translation_max[0] - camera_parameters.translation_min[0]
@@ -75,13 +96,26 @@ def generate_render_iteration(
     if camera_rotation[2] < 0 and camera_translation[0] < 0:
         camera_rotation[2] *= -1
 
-    scene = np.random.choice(config.asset_collection.scenes)
+    scene = config.asset_collection.scenes[rng.integers(len(config.asset_collection.scenes))]
+    world_texture = config.asset_collection.world_textures[rng.integers(len(config.asset_collection.world_textures))]
+    with metrics.stage('crack_generation'):
+        if scene.crack_bank is not None:
+            crack = sample_crack(
+                crack_generator,
+                scene.crack_bank,
+                scene.surface,
+                config.label_parameters.min_active_pixels,
+                rng
+            )
+        else:
+            crack = generate_crack(crack_generator, scene.surface, config.label_parameters.min_active_pixels, rng)
 
     return RenderIteration(
         index=iteration,
         scene=scene,
-        world_texture=np.random.choice(config.asset_collection.world_textures),
-        crack=generate_crack(crack_generator, scene.surface, config.label_parameters.min_active_pixels),
+        world_texture=world_texture,
+        crack=crack,
         camera_translation=tuple(camera_translation),
-        camera_rotation=tuple(camera_rotation)
+        camera_rotation=tuple(camera_rotation),
+        seed=seed
     )
@@ -1,7 +1,9 @@
+from typing import Union
+
 import bpy
 import numpy as np
 
-from crack_generation import create_surface_from_image
+from crack_generation import load_or_create_surface
 from dataset_generation.model import AssetCollection
 
 from dataset_generation.model.scene import Scene
@@ -78,9 +80,15 @@ def load_scene(
     scene_dict: dict,
     displacement_image: bpy.types.Image,
     displacement_mask: bpy.types.Image,
-    crack_depth: float
+    crack_depth: float,
+    surface_cache_directory: Union[str, None] = None,
+    surface_tile_size: Union[int, None] = None
 ) -> Scene:
-    """Load a scene from a dict. This generates a surface given a wall model and modifies the material."""
+    """
+    Load a scene from a dict. This generates a surface given a wall model and modifies the material.
+    The surface analysis is reused from the surface cache directory if one is given, and is done tile by tile if a
+    tile size is given.
+    """
     wall = bpy.data.objects[scene_dict['wall']]
     fix_object_normals(wall)
     material = wall.active_material
@@ -96,7 +104,7 @@ def load_scene(
     return Scene(
         wall=wall,
         material=material,
-        surface=create_surface_from_image(surface_tex),
+        surface=load_or_create_surface(surface_tex, surface_cache_directory, surface_tile_size),
         visible_objects=[bpy.data.objects[obj_name] for obj_name in scene_dict['other']],
     )
 
@@ -106,9 +114,21 @@ def load_asset_collection(asset_collection_data: dict, crack_depth: float) -> As
     crack_displacement_image = bpy.data.images.new('crack_displacement_image', 10, 10)
     crack_displacement_mask = bpy.data.images.new('crack_displacement_mask', 10, 10)
 
+    surface_cache_directory = asset_collection_data.get('surface_cache')
+    surface_tile_size = asset_collection_data.get('surface_tile_size')
+
     return AssetCollection(
-        scenes=[load_scene(scene_dict, crack_displacement_image, crack_displacement_mask, crack_depth) for scene_dict in
-            asset_collection_data["scenes"]],
+        scenes=[
+            load_scene(
+                scene_dict,
+                crack_displacement_image,
+                crack_displacement_mask,
+                crack_depth,
+                surface_cache_directory,
+                surface_tile_size
+            )
+            for scene_dict in asset_collection_data["scenes"]
+        ],
         world_textures=[bpy.data.images[hdri_name] for hdri_name in asset_collection_data['hdris']],
         crack_displacement_texture=crack_displacement_image,
         crack_displacement_mask=crack_displacement_mask
@@ -2,21 +2,12 @@ import os
 
 import bpy
 
-from crack_generation.model.parameters import CrackGenerationParameters, CrackDimensionParameters, CrackPathParameters, \
-    CrackTrajectoryParameters
+from crack_generation.parameter_loading import load_crack_parameters
 from dataset_generation.model.parameters import CameraParameters, LabelParameters
+from dataset_generation.dataset_layout import IMAGES_OUTPUT_DIR, LABELS_OUTPUT_DIR
 
-IMAGES_OUTPUT_DIR = 'images'
-LABELS_OUTPUT_DIR = 'labels'
-
-
-def load_crack_parameters(crack_parameters_dict: dict) -> CrackGenerationParameters:
-    """Load the crack parameters from a dict. These values can be directly injected."""
-    return CrackGenerationParameters(
-        dimension_parameters=CrackDimensionParameters(**crack_parameters_dict['dimensions']),
-        path_parameters=CrackPathParameters(**crack_parameters_dict['path']),
-        trajectory_parameters=CrackTrajectoryParameters(**crack_parameters_dict['trajectory'])
-    )
+OPTIONAL_LABEL_OPTIONS = ('png_compression', 'writer_threads', 'max_pending_patches', 'read_back', 'output_format',
+                          'max_shard_megabytes')
 
 
 def load_camera_parameters(camera_parameters_dict: dict) -> CameraParameters:
@@ -34,7 +25,10 @@ def load_camera_parameters(camera_parameters_dict: dict) -> CameraParameters:
 
 
 def load_label_parameters(label_parameters_dict: dict, output_directory: str) -> LabelParameters:
-    """Load the label parameters from a dict. These values can be directly injected alongside the output directory."""
+    """
+    Load the label parameters from a dict. These values can be directly injected alongside the output directory.
+    The patch writer, read back and output options are optional and use the defaults of the parameters when left out.
+    """
     threshold_data = label_parameters_dict['threshold']
     resolution_data = label_parameters_dict['resolution']
     base_output_directory = output_directory if output_directory.startswith(os.sep) \
@@ -48,5 +42,6 @@ def load_label_parameters(label_parameters_dict: dict, output_directory: str) ->
         ao_threshold=threshold_data['ao'],
         base_output_directory=base_output_directory,
         image_output_directory=os.path.join(base_output_directory, IMAGES_OUTPUT_DIR),
-        label_output_directory=os.path.join(base_output_directory, LABELS_OUTPUT_DIR)
+        label_output_directory=os.path.join(base_output_directory, LABELS_OUTPUT_DIR),
+        **{name: label_parameters_dict[name] for name in OPTIONAL_LABEL_OPTIONS if name in label_parameters_dict}
     )
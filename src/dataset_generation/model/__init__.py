@@ -2,3 +2,4 @@ from .asset_collection import AssetCollection
 from .configuration import Configuration
 from .scene import Scene
 from .render_iteration import RenderIteration
+from .iteration_metrics import IterationMetrics
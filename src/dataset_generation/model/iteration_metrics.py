@@ -0,0 +1,32 @@
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from typing import Iterator, Union
+
+
+@dataclass
+class IterationMetrics:
+    """Measurements of a single iteration of the rendering pipeline, successful or not."""
+
+    index: int  # Dataset index the iteration started at
+    attempt: int  # Number of retries before this iteration
+    start_time: float = field(default_factory=time.time)  # Unix time at which the iteration started
+
+    seconds: dict[str, float] = field(default_factory=dict)  # Wall time of each stage of the iteration
+    retry_reason: Union[str, None] = None  # Why the iteration has to be retried, None when it succeeded
+    patches_kept: int = 0
+    patches_discarded: int = 0
+    rss_bytes: Union[int, None] = None  # Resident memory of the process after the iteration, if it can be measured
+
+    @contextmanager
+    def stage(self, name: str) -> Iterator[None]:
+        """Add the wall time of a stage, which runs within the context."""
+        start_time = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.seconds[name] = self.seconds.get(name, 0.) + time.perf_counter() - start_time
+
+    def total_seconds(self) -> float:
+        """Wall time since the start of the iteration."""
+        return time.time() - self.start_time
@@ -1,2 +1,3 @@
 from .camera_parameters import CameraParameters
-from .label_parameters import LabelParameters
+from .label_parameters import LabelParameters, READ_BACK_FILE, READ_BACK_MEMORY, \
+    OUTPUT_DIRECTORY, OUTPUT_TAR
@@ -1,5 +1,10 @@
 from dataclasses import dataclass
 
+READ_BACK_FILE = 'file'
+READ_BACK_MEMORY = 'memory'
+OUTPUT_DIRECTORY = 'directory'
+OUTPUT_TAR = 'tar'
+
 
 @dataclass
 class LabelParameters:
@@ -15,3 +20,10 @@ class LabelParameters:
     base_output_directory: str
     image_output_directory: str
     label_output_directory: str
+
+    png_compression: int = 1  # PNG compression level of the patches from 0 to 9, higher is smaller but slower
+    writer_threads: int = 2  # Number of background threads encoding and writing patches
+    max_pending_patches: int = 64  # Number of patches that can wait to be written before rendering blocks
+    read_back: str = READ_BACK_FILE  # either 'file' to read the rendered PNG files or 'memory' to read the viewer image
+    output_format: str = OUTPUT_DIRECTORY  # either 'directory' for a file per image and label or 'tar' for tar shards
+    max_shard_megabytes: int = 1024  # Size after which a tar shard is finalized and a new shard is started
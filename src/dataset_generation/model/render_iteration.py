@@ -1,6 +1,7 @@
 import bpy
 
 from dataclasses import dataclass
+from typing import Union
 
 from crack_generation.model import Crack
 from .scene import Scene
@@ -18,3 +19,5 @@ class RenderIteration:
 
     camera_translation: tuple[float, float, float]
     camera_rotation: tuple[float, float, float]
+
+    seed: Union[int, None] = None  # Seed the iteration was generated from, if any
@@ -1,7 +1,9 @@
 from dataclasses import dataclass
+from typing import Union
 
 import bpy
 
+from crack_generation.crack_bank import CrackBank
 from crack_generation.model import Surface
 
 
@@ -13,3 +15,4 @@ class Scene:
     material: bpy.types.Material
     surface: Surface
     visible_objects: list[bpy.types.Object]
+    crack_bank: Union[CrackBank, None] = None  # Precomputed cracks of the surface to draw from instead of generating
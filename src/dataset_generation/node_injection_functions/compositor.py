@@ -1,6 +1,7 @@
 import bpy
 
-from dataset_generation.model.parameters import LabelParameters
+from dataset_generation.model.parameters import LabelParameters, READ_BACK_MEMORY
+from dataset_generation.read_back import check_view_settings
 
 IMAGE_OUTPUT_NAME = 'image-#'
 LABEL_OUTPUT_NAME = 'label-#'
@@ -93,6 +94,7 @@ def create_compositor_flow(parameters: LabelParameters):
     1. Set all compositor options.
     2. Clear the current compositor tree.
     3. Create the required compositor flow, consisting of a crack extraction and shadow extraction step.
+    4. Write the image and label to files, or to the viewer image when reading back in memory.
     """
     scene = bpy.context.scene
     tree = scene.node_tree
@@ -121,17 +123,25 @@ def create_compositor_flow(parameters: LabelParameters):
     tree.links.new(ao_threshold_output, intersect_node.inputs[0])
     tree.links.new(crack_threshold_output, intersect_node.inputs[1])
 
-    # Save output
-    output_node = tree.nodes.new('CompositorNodeOutputFile')
-    output_node.base_path = parameters.base_output_directory
-    output_node.format.file_format = 'PNG'
-    output_node.file_slots.new(LABEL_OUTPUT_NAME)
-
-    output_node.file_slots[0].path = IMAGE_OUTPUT_NAME
-    output_node.file_slots[1].path = LABEL_OUTPUT_NAME
-
-    tree.links.new(input_node.outputs['Image'], output_node.inputs[0])
-    tree.links.new(intersect_node.outputs['Value'], output_node.inputs[1])
+    # Output to the viewer image to read back in memory, or save the output to files
+    if parameters.read_back == READ_BACK_MEMORY:
+        check_view_settings(scene.view_settings)
+        viewer_node = tree.nodes.new('CompositorNodeViewer')
+        viewer_node.use_alpha = True
+        tree.links.new(input_node.outputs['Image'], viewer_node.inputs['Image'])
+        tree.links.new(intersect_node.outputs['Value'], viewer_node.inputs['Alpha'])
+        tree.nodes.active = viewer_node
+    else:
+        output_node = tree.nodes.new('CompositorNodeOutputFile')
+        output_node.base_path = parameters.base_output_directory
+        output_node.format.file_format = 'PNG'
+        output_node.file_slots.new(LABEL_OUTPUT_NAME)
+
+        output_node.file_slots[0].path = IMAGE_OUTPUT_NAME
+        output_node.file_slots[1].path = LABEL_OUTPUT_NAME
+
+        tree.links.new(input_node.outputs['Image'], output_node.inputs[0])
+        tree.links.new(intersect_node.outputs['Value'], output_node.inputs[1])
 
     composite_node = tree.nodes.new('CompositorNodeComposite')
     tree.links.new(input_node.outputs['Image'], composite_node.inputs['Image'])
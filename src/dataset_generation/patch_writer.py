@@ -0,0 +1,129 @@
+import threading
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor, wait
+from dataclasses import dataclass
+from typing import Callable, Union
+
+import cv2
+import numpy as np
+
+from dataset_generation.dataset_output import create_dataset_output
+from dataset_generation.model.parameters import LabelParameters
+
+
+@dataclass
+class WriteBatch:
+    """Patches submitted between two commits of the writer."""
+
+    pending: int = 0  # Number of patches of the batch that are not stored yet
+    on_stored: Union[Callable[[], None], None] = None  # Called once all patches are stored, set when committed
+
+
+class PatchWriter:
+    """
+    Bounded pool of background threads encoding and writing patches to the dataset output, such that rendering can
+    continue while patches are written. OpenCV releases the GIL while encoding, so the threads run in parallel to
+    Blender. Submitting blocks while max_pending_patches patches are waiting, which bounds the memory held by the queue.
+    Errors of the background writes are raised on the next submit or when closing the writer.
+    """
+
+    def __init__(self, parameters: LabelParameters):
+        self._output = create_dataset_output(parameters)
+        self._executor = ThreadPoolExecutor(max_workers=parameters.writer_threads, thread_name_prefix='patch-writer')
+        self._slots = threading.BoundedSemaphore(parameters.max_pending_patches)
+        self._encode_parameters = [cv2.IMWRITE_PNG_COMPRESSION, parameters.png_compression]
+        self._error: Union[BaseException, None] = None
+
+        self._batch_lock = threading.Lock()
+        self._notifying = False  # Whether a thread is calling stored callbacks, which keeps them in commit order
+        self._batch = WriteBatch()
+        self._committed_batches = deque()
+        self._futures: set[Future] = set()
+
+    def _encode(self, image: np.array) -> bytes:
+        """Encode a single image as PNG."""
+        success, encoded = cv2.imencode('.png', image, self._encode_parameters)
+        if not success:
+            raise ValueError('Could not encode patch as PNG')
+        return encoded.tobytes()
+
+    def _write(self, name: str, image: np.array, label: np.array, batch: WriteBatch) -> None:
+        """Encode and write the image and label of a single patch."""
+        self._output.write(name, self._encode(image), self._encode(label), lambda: self._stored(batch))
+
+    def _stored(self, batch: WriteBatch) -> None:
+        """Mark a patch of a batch as stored."""
+        with self._batch_lock:
+            batch.pending -= 1
+        self._notify_stored()
+
+    def _notify_stored(self) -> None:
+        """
+        Notify the committed batches that are fully stored, in commit order. The callbacks run without the batch lock,
+        such that slow callbacks do not block submitting and storing other patches.
+        """
+        while True:
+            with self._batch_lock:
+                # Only one thread notifies at a time, which picks up the batches stored in the meantime by the others
+                if self._notifying or len(self._committed_batches) == 0 or self._committed_batches[0].pending > 0:
+                    return
+                self._notifying = True
+                batch = self._committed_batches.popleft()
+            try:
+                batch.on_stored()
+            finally:
+                with self._batch_lock:
+                    self._notifying = False
+
+    def _done(self, future: Future) -> None:
+        """Free the slot of a written patch and keep the first error."""
+        with self._batch_lock:
+            self._futures.discard(future)
+        self._slots.release()
+        if self._error is None and future.exception() is not None:
+            self._error = future.exception()
+
+    def _raise_error(self) -> None:
+        """Raise the first error of the background writes, if any."""
+        if self._error is not None:
+            error, self._error = self._error, None
+            raise error
+
+    def submit(self, name: str, image: np.array, label: np.array) -> None:
+        """Queue the image and label of a patch to be written. The arrays should not be modified afterwards."""
+        self._raise_error()
+        self._slots.acquire()
+        with self._batch_lock:
+            batch = self._batch
+            batch.pending += 1
+            future = self._executor.submit(self._write, name, image, label, batch)
+            self._futures.add(future)
+        future.add_done_callback(self._done)
+
+    def commit(self, on_stored: Callable[[], None]) -> None:
+        """
+        Close the batch of patches submitted since the last commit. on_stored is called once all of them are stored,
+        usually from a background thread, but never before the batches committed earlier, such that the stored batches
+        always form a prefix of the committed batches. A batch with a failed write is never reported as stored.
+        """
+        with self._batch_lock:
+            self._batch.on_stored = on_stored
+            self._committed_batches.append(self._batch)
+            self._batch = WriteBatch()
+        self._notify_stored()
+
+    def flush(self) -> None:
+        """
+        Wait until all queued patches are written and store them, such that the committed batches are reported as
+        stored without waiting for a tar shard to fill up.
+        """
+        with self._batch_lock:
+            futures = list(self._futures)
+        wait(futures)
+        self._output.flush()
+
+    def close(self) -> None:
+        """Wait until all queued patches are written, stop the threads and finish the output."""
+        self._executor.shutdown(wait=True)
+        self._output.close()
+        self._raise_error()
@@ -0,0 +1,111 @@
+import json
+import os
+import sys
+import time
+from datetime import timedelta
+from typing import Union
+
+try:
+    import resource
+except ImportError:  # Not available on Windows
+    resource = None
+
+from dataset_generation.model.iteration_metrics import IterationMetrics
+from dataset_generation.dataset_layout import METRICS_FILE
+
+SUMMARY_INTERVAL_SECONDS = 300  # Time between two printed summaries of the pipeline
+
+
+def process_rss_bytes() -> Union[int, None]:
+    """
+    Get the resident memory of the current process in bytes. Where the current resident memory cannot be read, the
+    peak resident memory is used instead. Returns None when neither is available.
+    """
+    try:
+        with open('/proc/self/statm', 'r') as statm_file:
+            return int(statm_file.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError, AttributeError):
+        pass
+
+    if resource is None:
+        return None
+    max_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return max_rss if sys.platform == 'darwin' else max_rss * 1024  # Bytes on macOS, kilobytes elsewhere
+
+
+class PipelineMetrics:
+    """
+    Log of the rendering pipeline. Every iteration is appended to a JSONL file as soon as it is done, such that the log
+    survives interrupted runs, and a summary of the throughput is printed periodically.
+    """
+
+    path: str
+    dataset_size: int
+    summary_interval: float
+
+    def __init__(self, path: str, dataset_size: int, summary_interval: float = SUMMARY_INTERVAL_SECONDS):
+        self.path = path
+        self.dataset_size = dataset_size
+        self.summary_interval = summary_interval
+
+        self.start_time = self.last_summary_time = time.time()
+        self.iterations = 0
+        self.retries = 0
+        self.patches_kept = 0
+        self.patches_discarded = 0
+        self.stage_seconds = {}
+        self._file = open(path, 'a')
+
+    def record(self, metrics: IterationMetrics) -> None:
+        """Log a finished iteration and print a summary if it is due."""
+        metrics.rss_bytes = process_rss_bytes()
+        self._file.write(json.dumps({
+            'index': metrics.index,
+            'attempt': metrics.attempt,
+            'start_time': metrics.start_time,
+            'total_seconds': metrics.total_seconds(),
+            'seconds': metrics.seconds,
+            'retry_reason': metrics.retry_reason,
+            'patches_kept': metrics.patches_kept,
+            'patches_discarded': metrics.patches_discarded,
+            'rss_bytes': metrics.rss_bytes,
+        }) + '\n')
+        self._file.flush()
+
+        self.iterations += 1
+        self.retries += metrics.retry_reason is not None
+        self.patches_kept += metrics.patches_kept
+        self.patches_discarded += metrics.patches_discarded
+        for name, seconds in metrics.seconds.items():
+            self.stage_seconds[name] = self.stage_seconds.get(name, 0.) + seconds
+
+        if time.time() - self.last_summary_time >= self.summary_interval:
+            self.print_summary()
+
+    def summary(self) -> str:
+        """Describe the throughput, the expected time until the dataset is done and where the time is spent."""
+        elapsed_seconds = time.time() - self.start_time
+        images_per_hour = self.patches_kept / elapsed_seconds * 3600 if elapsed_seconds > 0 else 0.
+        remaining = max(self.dataset_size - self.patches_kept, 0)
+        eta = str(timedelta(seconds=round(remaining / images_per_hour * 3600))) if images_per_hour > 0 else 'unknown'
+        num_patches = self.patches_kept + self.patches_discarded
+        patch_yield = self.patches_kept / num_patches if num_patches > 0 else 0.
+        stage_seconds = sum(self.stage_seconds.values())
+        stage_shares = ', '.join(
+            f'{name} {round(seconds / stage_seconds * 100)}%' for name, seconds in self.stage_seconds.items()
+        ) if stage_seconds > 0 else 'none'
+
+        return (
+            f'{self.patches_kept}/{self.dataset_size} images, {round(images_per_hour, 1)} images/hour, ETA {eta}, '
+            f'yield {round(patch_yield * 100, 1)}%, {self.retries}/{self.iterations} iterations retried, '
+            f'time spent: {stage_shares}'
+        )
+
+    def print_summary(self) -> None:
+        """Print the summary of the pipeline so far."""
+        print(f'-- {self.summary()} --')
+        self.last_summary_time = time.time()
+
+    def close(self) -> None:
+        """Close the log file."""
+        self._file.close()
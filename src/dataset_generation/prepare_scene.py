@@ -10,8 +10,9 @@ from dataset_generation.model import RenderIteration, Configuration, AssetCollec
 def align_camera(camera: bpy.types.Camera, render_iteration: RenderIteration) -> None:
     """Align a camera to a crack and move it using a rotation and translation factor."""
     # Move the camera to the crack and point to it. Take into account that image origin is top-left and X is inverse along Y+
-    crack_height_map = np.flip(np.flip(render_iteration.crack.crack_height_map, axis=0), axis=1)
-    center_factor = np.average((crack_height_map > 0).nonzero(), axis=1) / np.array(crack_height_map.shape)
+    crack_height_map = render_iteration.crack.crack_height_map
+    crack_center = np.average((crack_height_map.values > 0).nonzero(), axis=1) + np.flip(crack_height_map.offset)
+    center_factor = (np.array(crack_height_map.shape) - 1 - crack_center) / np.array(crack_height_map.shape)
     center_factor = mathutils.Vector(
         [center_factor[1], np.average(center_factor), center_factor[0]]
     )  # width, depth, height
@@ -52,7 +53,8 @@ def make_all_invisible(exceptions: list[bpy.types.Object]) -> None:
 
 def apply_crack_texture(asset_collection: AssetCollection, crack: Crack) -> None:
     """Apply the crack displacement texture by modifying the set Blender images."""
-    height_map = np.flip(crack.crack_height_map, axis=0)
+    dense_height_map = crack.crack_height_map.to_dense()
+    height_map = np.flip(dense_height_map, axis=0)
     height_map = np.tile(np.expand_dims(height_map, axis=-1), [1, 1, 4])
     height_map[:, :, 3] = 1.
     height, width, _ = height_map.shape
@@ -60,7 +62,7 @@ def apply_crack_texture(asset_collection: AssetCollection, crack: Crack) -> None
     asset_collection.crack_displacement_texture.pixels = height_map.flatten()
     asset_collection.crack_displacement_texture.update()
 
-    mask_arr = np.flip(crack.crack_height_map, axis=0)
+    mask_arr = np.flip(dense_height_map, axis=0)
     mask = mask_arr > 0
     mask_arr[mask] = 1.
     mask_arr[~mask] = 0.
@@ -0,0 +1,53 @@
+import bpy
+import numpy as np
+
+VIEWER_IMAGE_NAME = 'Viewer Node'
+SUPPORTED_VIEW_TRANSFORM = 'Standard'
+
+
+def check_view_settings(view_settings: bpy.types.ColorManagedViewSettings) -> None:
+    """
+    Check that the view transform of the scene can be applied to the read back pixels. Only the standard view
+    transform without a look is supported, as the other transforms are not available outside of Blender.
+    """
+    if view_settings.view_transform != SUPPORTED_VIEW_TRANSFORM or view_settings.look not in ('None', ''):
+        raise ValueError(
+            f'In-memory read back requires the {SUPPORTED_VIEW_TRANSFORM} view transform without a look, '
+            f'got {view_settings.view_transform} with look {view_settings.look}'
+        )
+
+
+def linear_to_display(values: np.array, exposure: float = 0., gamma: float = 1.) -> np.array:
+    """
+    Convert linear values to 8-bit display values with the standard sRGB view transform, including the exposure and
+    gamma of the scene, as Blender does when saving a render.
+    """
+    values = np.clip(values * np.float32(2. ** exposure), 0., 1.)
+    values = np.where(values <= 0.0031308, values * 12.92, 1.055 * np.power(values, 1 / 2.4) - 0.055)
+    if gamma != 1.:
+        values = np.power(values, np.float32(1 / gamma))
+    return np.rint(values * 255).astype(np.uint8)
+
+
+def read_viewer_image(
+    image: bpy.types.Image,
+    view_settings: bpy.types.ColorManagedViewSettings
+) -> tuple[np.array, np.array]:
+    """
+    Read the rendered image and label from the viewer image, which holds the image in its colour channels and the
+    label in its alpha channel. Returns the image as 8-bit BGR and the label as 8-bit 3-channel binary mask, the same
+    as reading the rendered PNG files with OpenCV.
+    """
+    width, height = image.size
+    pixels = np.empty(width * height * 4, dtype=np.float32)
+    image.pixels.foreach_get(pixels)
+    pixels = pixels.reshape(height, width, 4)[::-1]  # Blender stores the rows bottom to top
+
+    rendered_image = linear_to_display(pixels[:, :, 2::-1], view_settings.exposure, view_settings.gamma)
+    label = np.repeat(np.where(pixels[:, :, 3:] >= 0.5, np.uint8(255), np.uint8(0)), 3, axis=2)
+    return np.ascontiguousarray(rendered_image), label
+
+
+def read_back_render() -> tuple[np.array, np.array]:
+    """Read the rendered image and label of the last render from Blender's viewer image."""
+    return read_viewer_image(bpy.data.images[VIEWER_IMAGE_NAME], bpy.context.scene.view_settings)
@@ -5,51 +5,104 @@ import bpy
 import cv2
 import numpy as np
 
-from dataset_generation.model.parameters import LabelParameters
+from dataset_generation.model import IterationMetrics
+from dataset_generation.model.parameters import LabelParameters, READ_BACK_MEMORY, OUTPUT_DIRECTORY
+from dataset_generation.patch_writer import PatchWriter
+from dataset_generation.read_back import read_back_render
+
+
+def patch_activity(label: np.array, num_patches: int) -> np.array:
+    """Sum the label values of every patch in the num_patches x num_patches grid at once."""
+    step_y, step_x = label.shape[0] // num_patches, label.shape[1] // num_patches
+    grid = label[:step_y * num_patches, :step_x * num_patches].reshape(num_patches, step_y, num_patches, step_x, -1)
+    return grid.sum(axis=(1, 3, 4), dtype=np.int64)
 
 
 def generate_patches(
     parameters: LabelParameters,
     iteration_index: int,
     image: np.array,
-    label: np.array
+    label: np.array,
+    metrics: IterationMetrics,
+    writer: PatchWriter
+) -> int:
+    """
+    Split the provided image and labels into patches based on the parameters and queue the active ones for writing.
+    Returns the number of patches created.
+    """
+    step_y, step_x = label.shape[0] // parameters.num_patches, label.shape[1] // parameters.num_patches
+    active_patches = np.flatnonzero(patch_activity(label, parameters.num_patches) > parameters.min_active_pixels)
+    metrics.patches_discarded += parameters.num_patches ** 2 - active_patches.size
+
+    for count, patch_idx in enumerate(active_patches):
+        row_idx, col_idx = divmod(int(patch_idx), parameters.num_patches)
+        patch = (slice(row_idx * step_y, (row_idx + 1) * step_y), slice(col_idx * step_x, (col_idx + 1) * step_x))
+        writer.submit(f'crack-{iteration_index + count}.png', image[patch], label[patch])
+    return active_patches.size
+
+
+def write_render(
+    parameters: LabelParameters,
+    iteration_index: int,
+    image: np.array,
+    label: np.array,
+    metrics: IterationMetrics,
+    writer: PatchWriter
 ) -> int:
-    """Split the provided image and labels into patches based on the parameters. Returns the number of patches created."""
-    idx = iteration_index
-    count = 0
-
-    step_size = image.shape[0] // parameters.num_patches
-    for row_idx in range(parameters.num_patches):
-        start_y, end_y = row_idx * step_size, (row_idx + 1) * step_size
-        for col_idx in range(parameters.num_patches):
-            start_x, end_x = col_idx * step_size, (col_idx + 1) * step_size
-            label_patch = label[start_y:end_y, start_x:end_x]
-
-            if np.sum(label_patch) > parameters.min_active_pixels:
-                img_patch = image[start_y:end_y, start_x:end_x]
-                cv2.imwrite(os.path.join(parameters.image_output_directory, f'crack-{idx + count}.png'), img_patch)
-                cv2.imwrite(os.path.join(parameters.label_output_directory, f'crack-{idx + count}.png'), label_patch)
-                count += 1
+    """Queue a render with a non-empty label for writing, split into patches if needed. Returns the number of images."""
+    with metrics.stage('patch_writing'):
+        if parameters.num_patches > 1:
+            count = generate_patches(parameters, iteration_index, image, label, metrics, writer)
+        else:
+            writer.submit(f'crack-{iteration_index}.png', image, label)
+            count = 1
+    metrics.patches_kept += count
     return count
 
 
-def render_crack(parameters: LabelParameters, iteration_index: int) -> int:
-    """Given the prepared scene, render and process the crack image and label. Returns the number of output images."""
-    bpy.ops.render.render(write_still=False, animation=False)
+def render_crack(
+    parameters: LabelParameters,
+    iteration_index: int,
+    metrics: IterationMetrics,
+    writer: PatchWriter
+) -> int:
+    """
+    Given the prepared scene, render and process the crack image and label. Returns the number of output images.
+    The render is read back from the rendered PNG files, or straight from Blender's viewer image when reading back in
+    memory, in which case the images are only encoded once when writing the output.
+    Patches are written in the background by the writer, so they may not be on disk yet when this returns.
+    The time spent on each stage and the number of kept and discarded patches are added to the metrics.
+    """
+    with metrics.stage('render'):
+        bpy.ops.render.render(write_still=False, animation=False)
+
+    if parameters.read_back == READ_BACK_MEMORY:
+        with metrics.stage('read_back'):
+            img, label = read_back_render()
+        if np.sum(label) < parameters.min_active_pixels:
+            metrics.patches_discarded += max(parameters.num_patches, 1) ** 2
+            return 0
+        return write_render(parameters, iteration_index, img, label, metrics, writer)
+
     rendered_image_path = os.path.join(parameters.base_output_directory, f'image-{bpy.context.scene.frame_current}.png')
     rendered_label_path = os.path.join(parameters.base_output_directory, f'label-{bpy.context.scene.frame_current}.png')
 
     # Check if the label is 'empty'
-    label = cv2.imread(rendered_label_path)
+    with metrics.stage('read_back'):
+        label = cv2.imread(rendered_label_path)
     if np.sum(label) < parameters.min_active_pixels:
+        metrics.patches_discarded += max(parameters.num_patches, 1) ** 2
         return 0
 
-    # All is okay, we split into patches or move and rename the files
-    if parameters.num_patches > 1:
-        img = cv2.imread(rendered_image_path)
-        return generate_patches(parameters, iteration_index, img, label)
+    # All is okay, we split into patches or move and rename the files if they can be used as is
+    if parameters.num_patches > 1 or parameters.output_format != OUTPUT_DIRECTORY:
+        with metrics.stage('read_back'):
+            img = cv2.imread(rendered_image_path)
+        return write_render(parameters, iteration_index, img, label, metrics, writer)
 
     file_name = f'crack-{iteration_index}.png'
-    shutil.move(rendered_image_path, os.path.join(parameters.image_output_directory, file_name))
-    shutil.move(rendered_label_path, os.path.join(parameters.label_output_directory, file_name))
+    with metrics.stage('patch_writing'):
+        shutil.move(rendered_image_path, os.path.join(parameters.image_output_directory, file_name))
+        shutil.move(rendered_label_path, os.path.join(parameters.label_output_directory, file_name))
+    metrics.patches_kept += 1
     return 1
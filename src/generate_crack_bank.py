@@ -0,0 +1,55 @@
+import os
+from argparse import ArgumentParser
+
+import cv2
+import yaml
+
+from crack_generation import produce_cracks, parameters_key
+from crack_generation.crack_bank import crack_bank_directory, fill_crack_bank, DEFAULT_SHARD_SIZE
+from crack_generation.parameter_loading import load_crack_parameters
+from crack_generation.surface_cache import cached_surface_keys, load_surface, load_or_create_surface, \
+    surface_cache_key
+
+
+def main():
+    """Fill a crack bank with cracks for every given surface. This only needs the CPU and no Blender."""
+    parser = ArgumentParser()
+    parser.add_argument('-b', '--bank', type=str, required=True, help='Directory of the crack bank to fill.')
+    parser.add_argument('-n', '--num-cracks', type=int, required=True, help='Number of cracks to add per surface.')
+    parser.add_argument(
+        '-c', '--config', type=str, required=False, default='resources/configuration.yaml',
+        help='The path to the configuration file with the crack generation parameters.'
+    )
+    parser.add_argument(
+        '-s', '--surface-cache', type=str, required=False,
+        help='Surface cache directory. All cached surfaces are filled, such as those of the scenes of earlier renders.'
+    )
+    parser.add_argument(
+        '-f', '--file', type=str, required=False, action='append', default=[],
+        help='Path to an additional surface height map to fill. Can be given multiple times.'
+    )
+    parser.add_argument('-w', '--workers', type=int, required=False, help='Number of worker processes.')
+    parser.add_argument('--seed', type=int, required=False, help='Seed to draw the crack seeds from.')
+    parser.add_argument('--shard-size', type=int, required=False, default=DEFAULT_SHARD_SIZE, help='Cracks per shard.')
+    args = parser.parse_args()
+
+    with open(args.config, 'r') as yaml_file:
+        parameters = load_crack_parameters(yaml.safe_load(yaml_file)['crack_generation'])
+
+    surfaces = []
+    if args.surface_cache is not None:
+        for surface_key in cached_surface_keys(args.surface_cache):
+            surfaces.append(load_surface(None, os.path.join(args.surface_cache, surface_key)))
+    for file in args.file:
+        surfaces.append(load_or_create_surface(cv2.imread(file, cv2.IMREAD_GRAYSCALE), args.surface_cache))
+
+    # Banks are identified by the texture of the surface, like the surfaces in the scenes during rendering
+    for surface in surfaces:
+        directory = crack_bank_directory(args.bank, surface_cache_key(surface.height_map), parameters_key(parameters))
+        cracks = produce_cracks(surface, parameters, args.num_cracks, args.workers, seed=args.seed)
+        num_written = fill_crack_bank(cracks, directory, surface.height_map.shape, args.shard_size)
+        print(f'-- Added {num_written} cracks to {directory} --')
+
+
+if __name__ == "__main__":
+    main()
@@ -1,19 +1,60 @@
 import os
+import socket
 import traceback
+from functools import partial
 from pathlib import Path
+from typing import Union
 
 import bpy
+import cv2
+import numpy as np
 import time
 
-from crack_generation import CrackGenerator
-from dataset_generation import generate_render_iteration, prepare_scene, render_crack
+from crack_generation import CrackGenerator, parameters_key
+from crack_generation.crack_bank import CrackBank, crack_bank_directory
+from crack_generation.surface_cache import surface_cache_key
+from dataset_generation import generate_render_iteration, prepare_scene, render_crack, PipelineMetrics, METRICS_FILE, \
+    PatchWriter, DatasetManifest, MANIFEST_FILE, ITERATION_SEED_LIMIT
 from dataset_generation.load_functions import load_config_from_yaml
+from dataset_generation.model import IterationMetrics, RenderIteration
 from dataset_generation.node_injection_functions import create_compositor_flow
+from render_workers import WorkQueue, Lease
 
 
-def run(dataset_size: int, max_retries: int, config_file_path: str, output_dir: str):
+def store_iteration(
+    manifest: DatasetManifest,
+    work_queue: Union[WorkQueue, None],
+    lease: Union[Lease, None],
+    render_iteration: RenderIteration,
+    num_rendered: int
+) -> None:
+    """Record an iteration of which all images are stored and complete its lease, if it came from a work queue."""
+    manifest.record(render_iteration, num_rendered)
+    if work_queue is not None:
+        work_queue.complete(lease, num_rendered)
+
+
+def run(
+    dataset_size: int,
+    max_retries: int,
+    config_file_path: str,
+    output_dir: str,
+    crack_bank: Union[str, None] = None,
+    resume: bool = False,
+    start_index: int = 0,
+    threads: Union[int, None] = None,
+    queue: Union[str, None] = None
+):
     """
     Main entrypoint. Starts the dataset generation using a specific config, dataset size and maximum number of retries.
+    If a crack bank directory is given, cracks are drawn from the bank instead of being generated during rendering.
+    The metrics of every iteration are appended to a JSONL file in the output directory.
+    Completed iterations are recorded in the manifest of the output directory. When resuming, the run continues after
+    the last completed iteration of the manifest instead of starting over.
+    The images are numbered from the start index on, such that separate runs can render disjoint parts of a dataset.
+    If a number of threads is given, rendering and OpenCV are limited to it.
+    If a work queue database is given, iterations and their indices are leased from the queue shared with other
+    workers instead, until the queue holds the dataset size. The dataset size of the first worker of a queue is used.
     """
 
     start_time = time.time()
@@ -21,14 +62,26 @@ def run(dataset_size: int, max_retries: int, config_file_path: str, output_dir:
     print('-- Preloading Blender data... --')
     # Load config and create output directories
     config = load_config_from_yaml(config_file_path, output_dir)
-    Path(os.path.join(config.label_parameters.image_output_directory)).mkdir(exist_ok=True, parents=True)
-    Path(os.path.join(config.label_parameters.label_output_directory)).mkdir(exist_ok=True, parents=True)
+    Path(config.label_parameters.base_output_directory).mkdir(exist_ok=True, parents=True)
 
     # Set render settings
     resolution_width, resolution_height = config.label_parameters.resolution
     bpy.context.scene.render.resolution_x = max(config.label_parameters.num_patches, 1) * resolution_width
     bpy.context.scene.render.resolution_y = max(config.label_parameters.num_patches, 1) * resolution_height
     create_compositor_flow(config.label_parameters)
+    if threads is not None:
+        bpy.context.scene.render.threads_mode = 'FIXED'
+        bpy.context.scene.render.threads = threads
+        cv2.setNumThreads(threads)
+
+    # Open the precomputed cracks of every scene surface
+    if crack_bank is not None:
+        for scene in config.asset_collection.scenes:
+            scene.crack_bank = CrackBank(crack_bank_directory(
+                crack_bank,
+                surface_cache_key(scene.surface.height_map),
+                parameters_key(config.crack_parameters)
+            ))
 
     """
     Main generation loop:
@@ -37,29 +90,85 @@ def run(dataset_size: int, max_retries: int, config_file_path: str, output_dir:
         - Apply iteration settings.
         - Render and divide into patches if needed.
     """
+    manifest = DatasetManifest(
+        os.path.join(config.label_parameters.base_output_directory, MANIFEST_FILE),
+        parameters_key(config.crack_parameters),
+        config.label_parameters,
+        resume or queue is not None
+    )
+    work_queue = None
+    if queue is not None:
+        work_queue = WorkQueue(queue, dataset_size, max(config.label_parameters.num_patches, 1) ** 2)
+        print(f'-- Joining work queue with {work_queue.completed_images()}/{work_queue.dataset_size} images done --')
+    worker = f'{socket.gethostname()}-{os.getpid()}'
+
+    end_index = start_index + dataset_size
+    idx = max(manifest.next_index, start_index)
+    if manifest.next_index > 0 and work_queue is None:
+        print(f'-- Resuming at index {idx} --')
+
     print('-- Starting rendering pipeline... --')
-    idx = 0
     retry_count = 0
     crack_generator = CrackGenerator(config.crack_parameters)
-    while idx < dataset_size and retry_count <= max_retries:
+    pipeline_metrics = PipelineMetrics(
+        os.path.join(config.label_parameters.base_output_directory, METRICS_FILE),
+        max(end_index - idx, 0)
+    )
+    patch_writer = PatchWriter(config.label_parameters)
+    seed_rng = np.random.default_rng()
+    lease = None
+    while retry_count <= max_retries:
+        if work_queue is not None:
+            # Leases stay renewed until their images are stored, which for tar shards may take many iterations.
+            # Before waiting for the leases of other workers, the open shard is stored to complete those of this worker
+            lease = work_queue.lease(worker, on_wait=patch_writer.flush)
+            if lease is None:
+                break
+            idx = lease.start_index
+        elif idx >= end_index:
+            break
+
+        metrics = IterationMetrics(idx, retry_count)
         try:
-            render_iteration = generate_render_iteration(config, crack_generator, idx)
-            prepare_scene(config, render_iteration)
+            seed = int(seed_rng.integers(ITERATION_SEED_LIMIT))
+            render_iteration = generate_render_iteration(config, crack_generator, idx, metrics, seed)
+            with metrics.stage('prepare_scene'):
+                prepare_scene(config, render_iteration)
 
-            num_rendered = render_crack(config.label_parameters, render_iteration.index)
+            num_rendered = render_crack(config.label_parameters, render_iteration.index, metrics, patch_writer)
             if num_rendered == 0:
                 print('- Warning: Label was empty, retrying...  -')
+                metrics.retry_reason = 'empty_label'
                 retry_count += 1
             else:
+                patch_writer.commit(
+                    partial(store_iteration, manifest, work_queue, lease, render_iteration, num_rendered)
+                )
                 idx += num_rendered
                 retry_count = 0
+                lease = None
         except Exception as e:
             print(f'- Error: {e} -')
             print(traceback.format_exc())
             print('- Warning: Something went wrong, retrying... -')
+            metrics.retry_reason = f'{type(e).__name__}: {e}'
             retry_count += 1
 
+        # A failed iteration is given back to the queue, such that any worker can retry it
+        if lease is not None:
+            work_queue.release(lease)
+        pipeline_metrics.record(metrics)
+
     if retry_count > max_retries:
         print('- Rendering aborted, out of retries -')
 
+    print('-- Writing remaining patches... --')
+    patch_writer.close()
+    manifest.close()
+    if work_queue is not None:
+        work_queue.close()
+
+    pipeline_metrics.print_summary()
+    pipeline_metrics.close()
+
     print(f'-- Rendering done after {round((time.time() - start_time) / 60, 2)} minutes --')
@@ -0,0 +1,90 @@
+import os
+import sys
+from argparse import ArgumentParser
+
+import yaml
+
+from render_workers import worker_directory, worker_index_ranges, worker_command, launch_workers, \
+    merge_worker_outputs, WorkQueue
+
+QUEUE_FILE = 'queue.sqlite'
+
+
+def main():
+    """
+    Render a dataset with multiple headless Blender workers on one machine. Every worker renders a disjoint range of
+    indices, or the iterations it leases from a shared work queue, into its own directory with its own share of the CPU
+    threads, after which the outputs are merged.
+    """
+    parser = ArgumentParser()
+    parser.add_argument('-n', '--workers', type=int, required=True, help='Number of Blender workers to start.')
+    parser.add_argument('-s', '--size', type=int, required=True, help='The dataset size.')
+    parser.add_argument(
+        '-c', '--config', type=str, required=False, default='resources/configuration.yaml',
+        help='The path to the configuration file.'
+    )
+    parser.add_argument('-o', '--output', type=str, required=True, help='The output directory for the new dataset.')
+    parser.add_argument(
+        '-t', '--threads', type=int, required=False,
+        help='Number of threads per worker. Divides the CPU cores over the workers by default.'
+    )
+    parser.add_argument('-r', '--retries', type=int, required=False, default=5, help='Maximum number of retries.')
+    parser.add_argument('-b', '--bank', type=str, required=False, help='The crack bank directory to draw cracks from.')
+    parser.add_argument('--blender', type=str, required=False, default='blender', help='The Blender executable.')
+    parser.add_argument(
+        '--scene', type=str, required=False, default='resources/scene.blend', help='The Blender scene to render.'
+    )
+    parser.add_argument('--cycles-device', type=str, required=False, default='CPU', help='The Cycles render device.')
+    parser.add_argument('--resume', action='store_true', help='Resume the workers of an earlier run.')
+    parser.add_argument(
+        '--queue', action='store_true',
+        help='Let the workers lease iterations from a shared work queue instead of rendering fixed index ranges.'
+    )
+    args = parser.parse_args()
+
+    with open(args.config, 'r') as yaml_file:
+        num_patches = yaml.safe_load(yaml_file)['dataset_generation']['label']['patches']
+
+    threads = args.threads if args.threads is not None else max(os.cpu_count() // args.workers, 1)
+    output_directory = os.path.abspath(args.output)
+    directories = [worker_directory(output_directory, worker) for worker in range(args.workers)]
+    images_per_render = max(num_patches, 1) ** 2
+    queue = None
+    if args.queue:
+        os.makedirs(output_directory, exist_ok=True)
+        queue = os.path.join(output_directory, QUEUE_FILE)
+        WorkQueue(queue, args.size, images_per_render)  # Create the queue with the dataset size for all workers
+        index_ranges = [(0, args.size)] * args.workers
+    else:
+        index_ranges = worker_index_ranges(args.size, args.workers, images_per_render)
+    commands = [
+        worker_command(
+            args.blender,
+            os.path.abspath(args.scene),
+            start_index,
+            size,
+            os.path.abspath(args.config),
+            directory,
+            threads,
+            args.cycles_device,
+            args.retries,
+            os.path.abspath(args.bank) if args.bank is not None else None,
+            args.resume,
+            queue
+        )
+        for (start_index, size), directory in zip(index_ranges, directories)
+    ]
+
+    print(f'-- Starting {args.workers} workers with {threads} threads each... --')
+    exit_codes = launch_workers(commands, directories, threads)
+    num_images = merge_worker_outputs(directories, output_directory)
+    print(f'-- Merged {num_images} images into {output_directory} --')
+
+    failed_workers = [worker for worker, exit_code in enumerate(exit_codes) if exit_code != 0]
+    if len(failed_workers) > 0:
+        print(f'- Workers {failed_workers} failed, see their logs. Run again with --resume to continue. -')
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,3 @@
+from .launcher import worker_directory, worker_index_ranges, worker_command, launch_workers
+from .merge import merge_worker_outputs
+from .work_queue import WorkQueue, Lease
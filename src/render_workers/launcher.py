@@ -0,0 +1,76 @@
+import os
+import subprocess
+from typing import Union
+
+WORKERS_OUTPUT_DIR = 'workers'
+WORKER_DIR_FORMAT = 'worker-{}'
+WORKER_LOG_FILE = 'log.txt'
+RENDER_SCRIPT = 'blender_start_render_script.py'
+
+
+def worker_directory(output_directory: str, worker: int) -> str:
+    """Output directory of a single worker within the output directory of the dataset."""
+    return os.path.join(output_directory, WORKERS_OUTPUT_DIR, WORKER_DIR_FORMAT.format(worker))
+
+
+def worker_index_ranges(dataset_size: int, num_workers: int, max_images_per_render: int) -> list[tuple[int, int]]:
+    """
+    Split the dataset into the start index and number of images of every worker. A worker can overshoot its number of
+    images by less than the images of a single render, so the ranges are spaced by that much to stay disjoint.
+    """
+    base_size, remainder = divmod(dataset_size, num_workers)
+    worker_sizes = [base_size + (worker < remainder) for worker in range(num_workers)]
+    starts = [sum(worker_sizes[:worker]) + worker * (max_images_per_render - 1) for worker in range(num_workers)]
+    return list(zip(starts, worker_sizes))
+
+
+def worker_command(
+    blender: str,
+    scene: str,
+    start_index: int,
+    size: int,
+    config: str,
+    output_directory: str,
+    threads: int,
+    cycles_device: str,
+    max_retries: int,
+    crack_bank: Union[str, None] = None,
+    resume: bool = False,
+    queue: Union[str, None] = None
+) -> list[str]:
+    """
+    Create the command that starts a headless Blender worker rendering its part of the dataset, or leasing its
+    iterations from a work queue if given.
+    """
+    script = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), RENDER_SCRIPT)
+    command = [
+        blender, scene, '-b', '-P', script, '--',
+        '--cycles-device', cycles_device,
+        '-s', str(size),
+        '-i', str(start_index),
+        '-c', config,
+        '-o', output_directory,
+        '-r', str(max_retries),
+        '-t', str(threads),
+    ]
+    if crack_bank is not None:
+        command += ['-b', crack_bank]
+    if resume:
+        command.append('--resume')
+    if queue is not None:
+        command += ['-q', queue]
+    return command
+
+
+def launch_workers(commands: list[list[str]], directories: list[str], threads: int) -> list[int]:
+    """
+    Run the worker commands in parallel and wait for all of them to finish. The output of every worker is logged in
+    its directory, and the numerical libraries of every worker are limited to its threads. Returns the exit codes.
+    """
+    environment = {**os.environ, 'OMP_NUM_THREADS': str(threads), 'OPENBLAS_NUM_THREADS': str(threads)}
+    processes = []
+    for command, directory in zip(commands, directories):
+        os.makedirs(directory, exist_ok=True)
+        with open(os.path.join(directory, WORKER_LOG_FILE), 'a') as log_file:
+            processes.append(subprocess.Popen(command, stdout=log_file, stderr=subprocess.STDOUT, env=environment))
+    return [process.wait() for process in processes]
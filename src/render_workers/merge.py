@@ -0,0 +1,89 @@
+import json
+import os
+from pathlib import Path
+
+from dataset_generation.dataset_layout import IMAGES_OUTPUT_DIR, LABELS_OUTPUT_DIR, SHARDS_OUTPUT_DIR, \
+    SHARD_INDEX_FILE, METRICS_FILE, MANIFEST_FILE, read_manifest
+
+WORKER_SHARD_FORMAT = 'worker-{}-{}'
+
+
+def move_files(source_directory: str, target_directory: str) -> int:
+    """Move all files of a directory into another directory, keeping their names. Returns the number of moved files."""
+    if not os.path.isdir(source_directory):
+        return 0
+
+    Path(target_directory).mkdir(exist_ok=True, parents=True)
+    names = os.listdir(source_directory)
+    for name in names:
+        os.replace(os.path.join(source_directory, name), os.path.join(target_directory, name))
+    return len(names)
+
+
+def move_shards(source_directory: str, target_directory: str, worker: int) -> int:
+    """
+    Move the finished shards of a worker into another directory, prefixed with the worker to keep their names unique.
+    Unfinished shards are left behind. Returns the number of moved shards.
+    """
+    if not os.path.isdir(source_directory):
+        return 0
+
+    Path(target_directory).mkdir(exist_ok=True, parents=True)
+    names = [name for name in os.listdir(source_directory) if name.endswith('.tar')]
+    for name in names:
+        os.replace(
+            os.path.join(source_directory, name),
+            os.path.join(target_directory, WORKER_SHARD_FORMAT.format(worker, name))
+        )
+    return len(names)
+
+
+def read_jsonl(path: str) -> list[dict]:
+    """Read all complete records of a JSONL file, or none if it does not exist."""
+    if not os.path.exists(path):
+        return []
+    with open(path, 'r') as jsonl_file:
+        return [json.loads(line) for line in jsonl_file if line.endswith('\n')]
+
+
+def write_jsonl(path: str, records: list[dict]) -> None:
+    """Write the records to a JSONL file through a temporary file, such that it is replaced at once."""
+    with open(path + '.tmp', 'w') as jsonl_file:
+        jsonl_file.writelines(json.dumps(record) + '\n' for record in records)
+    os.replace(path + '.tmp', path)
+
+
+def merge_worker_outputs(worker_directories: list[str], output_directory: str) -> int:
+    """
+    Merge the outputs of workers into a single dataset in the output directory. The images, labels and shards are
+    moved, as their names are already unique, while the manifests, shard indices and metrics are rebuilt from those of
+    the workers, which remain in place. Merging again after resuming the workers therefore adds the new images without
+    duplicating any records. An iteration rendered by multiple workers of a work queue is recorded once, from the last
+    worker, whose images are moved last. Likewise, its samples are indexed once, in the shard of the last worker, while
+    the copies in the shards of earlier workers remain in those shards without an index entry. Returns the number of
+    images in the merged manifest.
+    """
+    run_records, iteration_records, shard_index, metrics = [], {}, {}, []
+    for worker, directory in enumerate(worker_directories):
+        move_files(os.path.join(directory, IMAGES_OUTPUT_DIR), os.path.join(output_directory, IMAGES_OUTPUT_DIR))
+        move_files(os.path.join(directory, LABELS_OUTPUT_DIR), os.path.join(output_directory, LABELS_OUTPUT_DIR))
+        shards_directory = os.path.join(directory, SHARDS_OUTPUT_DIR)
+        move_shards(shards_directory, os.path.join(output_directory, SHARDS_OUTPUT_DIR), worker)
+
+        shard_index.update(
+            (entry['name'], {**entry, 'shard': WORKER_SHARD_FORMAT.format(worker, entry['shard'])})
+            for entry in read_jsonl(os.path.join(shards_directory, SHARD_INDEX_FILE))
+        )
+        metrics += [{**record, 'worker': worker} for record in read_jsonl(os.path.join(directory, METRICS_FILE))]
+        if os.path.exists(os.path.join(directory, MANIFEST_FILE)):
+            runs, iterations, _ = read_manifest(os.path.join(directory, MANIFEST_FILE))
+            run_records += [{**record, 'worker': worker} for record in runs]
+            iteration_records.update((record['index'], {**record, 'worker': worker}) for record in iterations)
+
+    Path(output_directory).mkdir(exist_ok=True, parents=True)
+    iteration_records = [iteration_records[index] for index in sorted(iteration_records)]
+    write_jsonl(os.path.join(output_directory, MANIFEST_FILE), run_records + iteration_records)
+    write_jsonl(os.path.join(output_directory, METRICS_FILE), metrics)
+    if len(shard_index) > 0:
+        write_jsonl(os.path.join(output_directory, SHARDS_OUTPUT_DIR, SHARD_INDEX_FILE), list(shard_index.values()))
+    return sum(record['patches'] for record in iteration_records)
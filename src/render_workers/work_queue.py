@@ -0,0 +1,187 @@
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass
+from typing import Callable, Iterator, Union
+
+DEFAULT_LEASE_SECONDS = 1800  # Time after which the iteration of a silent worker is handed out again
+DEFAULT_POLL_SECONDS = 10  # Time between leasing attempts while all remaining iterations are leased to other workers
+CONNECTION_TIMEOUT_SECONDS = 60  # Time to wait for other workers holding the database lock
+
+PENDING = 'pending'
+LEASED = 'leased'
+DONE = 'done'
+
+
+@dataclass
+class Lease:
+    """An iteration of the queue handed out to a worker until it expires."""
+
+    job: int
+    start_index: int  # First dataset index reserved for the images of the iteration
+    worker: str
+
+
+class WorkQueue:
+    """
+    Queue of render iterations shared by workers through a SQLite database, such that workers can join or leave at any
+    time. Workers lease iterations, and a lease that is neither completed nor renewed in time is handed out again,
+    which re-queues the work of crashed workers. Every iteration owns a fixed block of images_per_job dataset indices,
+    so the names of the images never collide, even when an iteration is rendered again. Iterations are created on
+    demand until the completed iterations and the leased ones, counted as full, hold the dataset size.
+    A queue instance belongs to a single worker process and renews the leases it holds whenever it leases. It keeps one
+    connection to the database, which is safe to use from multiple threads.
+    """
+
+    path: str
+    dataset_size: int
+    images_per_job: int
+    lease_seconds: float
+    poll_seconds: float
+
+    def __init__(
+        self,
+        path: str,
+        dataset_size: int,
+        images_per_job: int,
+        lease_seconds: float = DEFAULT_LEASE_SECONDS,
+        poll_seconds: float = DEFAULT_POLL_SECONDS
+    ):
+        """
+        Open the queue, creating it if it does not exist yet. The dataset size and images per job of the first worker
+        are kept, later workers have to use the same images per job.
+        """
+        self.path = path
+        self.lease_seconds = lease_seconds
+        self.poll_seconds = poll_seconds
+        self._lock = threading.Lock()
+        self._leases: dict[int, Lease] = {}  # Leases of this instance that are not completed or released yet
+        self._connection = sqlite3.connect(
+            path, timeout=CONNECTION_TIMEOUT_SECONDS, isolation_level=None, check_same_thread=False
+        )
+        self._connection.execute('PRAGMA journal_mode=WAL')  # Lets workers read the queue while another one writes
+        with self._transaction() as connection:
+            connection.execute('CREATE TABLE IF NOT EXISTS settings (name TEXT PRIMARY KEY, value INTEGER NOT NULL)')
+            connection.execute(
+                'CREATE TABLE IF NOT EXISTS jobs ('
+                'id INTEGER PRIMARY KEY, state TEXT NOT NULL, worker TEXT, lease_expires REAL, '
+                'attempts INTEGER NOT NULL DEFAULT 0, images INTEGER)'
+            )
+            connection.executemany(
+                'INSERT OR IGNORE INTO settings (name, value) VALUES (?, ?)',
+                [('dataset_size', dataset_size), ('images_per_job', images_per_job)]
+            )
+            settings = dict(connection.execute('SELECT name, value FROM settings'))
+
+        if settings['images_per_job'] != images_per_job:
+            self.close()
+            raise ValueError(
+                f'The queue {path} uses {settings["images_per_job"]} images per iteration instead of {images_per_job}'
+            )
+        self.dataset_size = settings['dataset_size']
+        self.images_per_job = settings['images_per_job']
+
+    @contextmanager
+    def _transaction(self) -> Iterator[sqlite3.Connection]:
+        """Run statements in a write transaction, which is rolled back if they fail."""
+        with self._lock:
+            self._connection.execute('BEGIN IMMEDIATE')
+            try:
+                yield self._connection
+            except BaseException:
+                self._connection.execute('ROLLBACK')
+                raise
+            self._connection.execute('COMMIT')
+
+    def lease(self, worker: str, on_wait: Union[Callable[[], None], None] = None) -> Union[Lease, None]:
+        """
+        Lease the oldest pending or expired iteration to the worker, or a new one if there are none. While the remaining
+        images are all leased, waits for the leases to complete or expire. on_wait is called once before waiting, such
+        that the worker can store its own leased iterations first. The leases held by this instance are renewed before,
+        but not while waiting, such that those that failed to store expire. Returns None when the completed iterations
+        hold the dataset size.
+        """
+        self.renew()
+        while True:
+            lease = self._try_lease(worker)
+            if lease is not None:
+                return lease
+            if self.completed_images() >= self.dataset_size:
+                return None
+            if on_wait is not None:
+                on_wait()
+                on_wait = None
+                continue
+            time.sleep(self.poll_seconds)
+
+    def _try_lease(self, worker: str) -> Union[Lease, None]:
+        """Lease an iteration to the worker if one is available."""
+        now = time.time()
+        with self._transaction() as connection:
+            row = connection.execute(
+                'SELECT id FROM jobs WHERE state = ? OR (state = ? AND lease_expires < ?) ORDER BY id LIMIT 1',
+                (PENDING, LEASED, now)
+            ).fetchone()
+            leased_jobs = connection.execute('SELECT COUNT(*) FROM jobs WHERE state = ?', (LEASED,)).fetchone()[0]
+            if row is not None:
+                job = row[0]
+            elif self._completed_images(connection) + leased_jobs * self.images_per_job < self.dataset_size:
+                job = connection.execute('INSERT INTO jobs (state) VALUES (?)', (PENDING,)).lastrowid
+            else:
+                return None
+
+            connection.execute(
+                'UPDATE jobs SET state = ?, worker = ?, lease_expires = ?, attempts = attempts + 1 WHERE id = ?',
+                (LEASED, worker, now + self.lease_seconds, job)
+            )
+            lease = self._leases[job] = Lease(job, (job - 1) * self.images_per_job, worker)
+        return lease
+
+    def renew(self) -> None:
+        """Extend the leases held by this instance, such that they do not expire while their images are stored."""
+        if len(self._leases) == 0:
+            return
+        with self._transaction() as connection:
+            connection.executemany(
+                'UPDATE jobs SET lease_expires = ? WHERE id = ? AND state = ? AND worker = ?',
+                [(time.time() + self.lease_seconds, lease.job, LEASED, lease.worker) for lease in self._leases.values()]
+            )
+
+    def release(self, lease: Lease) -> None:
+        """Give a leased iteration back to the queue, such that it is handed out again right away."""
+        with self._transaction() as connection:
+            connection.execute(
+                'UPDATE jobs SET state = ?, worker = NULL, lease_expires = NULL '
+                'WHERE id = ? AND state = ? AND worker = ?',
+                (PENDING, lease.job, LEASED, lease.worker)
+            )
+            self._leases.pop(lease.job, None)
+
+    def complete(self, lease: Lease, num_images: int) -> bool:
+        """
+        Mark a leased iteration as completed with the number of images it produced, which should only happen once they
+        are stored. An expired lease can still be completed as long as no other worker completed the iteration first.
+        Returns whether the iteration was marked.
+        """
+        with self._transaction() as connection:
+            cursor = connection.execute(
+                'UPDATE jobs SET state = ?, worker = ?, lease_expires = NULL, images = ? WHERE id = ? AND state != ?',
+                (DONE, lease.worker, num_images, lease.job, DONE)
+            )
+            self._leases.pop(lease.job, None)
+            return cursor.rowcount > 0
+
+    @staticmethod
+    def _completed_images(connection: sqlite3.Connection) -> int:
+        """Number of images of the completed iterations, within an open connection."""
+        return connection.execute('SELECT COALESCE(SUM(images), 0) FROM jobs WHERE state = ?', (DONE,)).fetchone()[0]
+
+    def completed_images(self) -> int:
+        """Number of images of the completed iterations."""
+        with self._lock:
+            return self._completed_images(self._connection)
+
+    def close(self) -> None:
+        """Close the connection to the queue."""
+        self._connection.close()
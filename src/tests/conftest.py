@@ -0,0 +1,45 @@
+import os
+import sys
+from unittest.mock import MagicMock
+
+import pytest
+import yaml
+
+SOURCE_DIRECTORY = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+CONFIGURATION_FILE = os.path.join(SOURCE_DIRECTORY, 'resources', 'configuration.yaml')
+
+# Run the tests against the sources, as the scripts do
+sys.path.insert(0, SOURCE_DIRECTORY)
+
+# Stub the Blender modules when neither Blender nor fake-bpy-module provide them, such that the Blender-free parts of
+# the dataset generation can be tested
+for module in ('bpy', 'mathutils'):
+    try:
+        __import__(module)
+    except ImportError:
+        sys.modules[module] = MagicMock()
+
+from benchmark.brick_image import create_brick_image
+from crack_generation import create_procedural_surface, create_surface_from_image
+from crack_generation.model import Surface
+from crack_generation.model.parameters import CrackGenerationParameters
+from crack_generation.parameter_loading import load_crack_parameters
+
+
+@pytest.fixture
+def crack_parameters() -> CrackGenerationParameters:
+    """The crack parameters of the default configuration."""
+    with open(CONFIGURATION_FILE, 'r') as configuration_file:
+        return load_crack_parameters(yaml.safe_load(configuration_file)['crack_generation'])
+
+
+@pytest.fixture(scope='session')
+def surface() -> Surface:
+    """A small procedural brick surface, such that cracks generate quickly."""
+    return create_procedural_surface(256, 256, 60, 20, 4, seed=0)
+
+
+@pytest.fixture(scope='session')
+def image_surface() -> Surface:
+    """A surface analysed from a small synthetic brick image, which has fewer ties in its distance transform."""
+    return create_surface_from_image(create_brick_image(512, 512, 64, 24, 6))
@@ -0,0 +1,157 @@
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import replace
+
+import numpy as np
+import pytest
+
+from benchmark.brick_image import create_brick_image
+from crack_generation import CrackGenerator, create_surface_pyramid
+from crack_generation.model import GenerationStats, WorkBudget, BudgetExceeded
+
+
+def assert_same_crack(crack, other) -> None:
+    assert np.array_equal(crack.path.centers, other.path.centers)
+    assert np.array_equal(crack.path.width, other.path.width)
+    assert crack.crack_height_map.offset == other.crack_height_map.offset
+    assert np.array_equal(crack.crack_height_map.values, other.crack_height_map.values)
+
+
+def stage_runs(stats: GenerationStats) -> dict[str, int]:
+    return {name: len(seconds) for name, seconds in stats.seconds.items()}
+
+
+def engine_generator(crack_parameters, engine: str) -> CrackGenerator:
+    path_parameters = replace(crack_parameters.path_parameters, engine=engine)
+    return CrackGenerator(replace(crack_parameters, path_parameters=path_parameters))
+
+
+@pytest.mark.parametrize('engine', ['reference', 'fast'])
+def test_cracks_are_identified_by_their_seed(crack_parameters, surface, engine):
+    generator = engine_generator(crack_parameters, engine)
+    cracks = [generator(surface, seed) for seed in range(8)]
+
+    np.random.seed(0)
+    for seed, crack in enumerate(cracks):
+        assert crack.seed == seed
+        assert_same_crack(crack, generator(surface, seed))
+        assert_same_crack(crack, generator(surface, np.random.default_rng(seed)))
+
+    # Generating concurrently draws from independent generators
+    with ThreadPoolExecutor(4) as executor:
+        for crack, concurrent_crack in zip(cracks, executor.map(lambda seed: generator(surface, seed), range(8))):
+            assert_same_crack(crack, concurrent_crack)
+
+
+def test_batches_and_pyramid_cracks_are_reproducible(crack_parameters, image_surface):
+    generator = CrackGenerator(crack_parameters)
+    batch = generator.generate_batch(image_surface, 8, seed=0)
+    for crack, other in zip(batch, generator.generate_batch(image_surface, 8, seed=0)):
+        assert_same_crack(crack, other)
+
+    pyramid = create_surface_pyramid(create_brick_image(512, 512, 64, 24, 6), 2)
+    crack = generator.generate_from_pyramid(pyramid, seed=0)
+    assert_same_crack(crack, generator.generate_from_pyramid(pyramid, seed=0))
+
+
+def test_every_crack_gets_its_own_stats(crack_parameters, surface):
+    generator = CrackGenerator(crack_parameters)
+    stats = GenerationStats()
+    cracks = [generator(surface, seed, stats=stats) for seed in range(5)]
+    cracks.append(generator.generate_with_coverage(surface, 200, seed=5, stats=stats))
+
+    assert all(crack.stats.cracks == 1 for crack in cracks)
+    assert len({id(crack.stats) for crack in cracks}) == len(cracks)
+    assert stats.cracks == len(cracks)
+    assert sum(len(crack.stats.segment_steps) for crack in cracks) == len(stats.segment_steps)
+
+    # The aggregate is the sum of the stats of the cracks
+    total = GenerationStats()
+    for crack in cracks:
+        total.add(crack.stats)
+    assert stage_runs(total) == stage_runs(stats)
+
+
+def test_layout_merges_the_stats_of_cracks_and_branches(crack_parameters, surface):
+    layout_parameters = replace(crack_parameters.layout_parameters, num_cracks=3, branch_chance=1.)
+    generator = CrackGenerator(replace(crack_parameters, layout_parameters=layout_parameters))
+    stats = GenerationStats()
+    crack = generator.generate_layout(surface, 200, seed=0, stats=stats)
+
+    # Rejected placements only count in the aggregate
+    assert 1 <= crack.stats.cracks <= stats.cracks
+    assert 0 < len(crack.stats.segment_steps) <= len(stats.segment_steps)
+    assert stage_runs(crack.stats)['rasterization'] > crack.stats.cracks
+
+
+def test_branches_propagate_an_exceeded_budget(crack_parameters, surface):
+    layout_parameters = replace(crack_parameters.layout_parameters, branch_chance=1.)
+    generator = CrackGenerator(replace(crack_parameters, layout_parameters=layout_parameters))
+    crack = generator.generate_with_coverage(surface, 200, seed=0)
+
+    result = generator.add_branches(crack, surface, np.random.default_rng(0), WorkBudget(max_steps=0))
+    assert isinstance(result, BudgetExceeded)
+    assert result.paths == 1
+
+
+@pytest.mark.parametrize('rasterizer', ['distance_transform', 'capsule'])
+def test_coverage_accepts_the_first_crack_that_reaches_the_target(crack_parameters, surface, rasterizer):
+    dimension_parameters = replace(crack_parameters.dimension_parameters, rasterizer=rasterizer)
+    generator = CrackGenerator(replace(crack_parameters, dimension_parameters=dimension_parameters))
+    for seed in range(5):
+        crack = generator.generate_with_coverage(surface, 1000, seed=seed)
+
+        # Early rejection skips the same cracks as rasterizing every crack of the seed sequence
+        rng = np.random.default_rng(seed)
+        while True:
+            expected = generator(surface, int(rng.integers(np.iinfo(np.int64).max)))
+            if expected.crack_height_map.values.sum() >= 1000:
+                break
+        assert crack.seed == expected.seed
+        assert_same_crack(crack, expected)
+
+
+def test_targeted_coverage_reaches_the_target(crack_parameters, surface):
+    generator = CrackGenerator(crack_parameters)
+    for seed in range(5):
+        # Few cracks of the small surface reach this target without extending their trajectory
+        crack = generator.generate_with_coverage(
+            surface, 1500, targeted=True, seed=seed, budget=WorkBudget(max_seconds=30)
+        )
+        assert crack.crack_height_map.values.sum() >= 1500
+        assert crack.seed is None
+
+
+def budgeted_calls(generator: CrackGenerator, surface, pyramid) -> dict:
+    """Every way of generating cracks, each taking a work budget."""
+    return {
+        'call': lambda budget: generator(surface, 0, budget=budget),
+        'coverage': lambda budget: generator.generate_with_coverage(surface, 1000, seed=0, budget=budget),
+        'targeted': lambda budget: generator.generate_with_coverage(
+            surface, 1000, targeted=True, seed=0, budget=budget
+        ),
+        'layout': lambda budget: generator.generate_layout(surface, 1000, seed=0, budget=budget),
+        'batch': lambda budget: generator.generate_batch(surface, 8, seed=0, budget=budget),
+        'pyramid': lambda budget: generator.generate_from_pyramid(pyramid, seed=0, budget=budget)
+    }
+
+
+@pytest.mark.parametrize('engine', ['reference', 'fast'])
+@pytest.mark.parametrize('method', ['call', 'coverage', 'targeted', 'layout', 'batch', 'pyramid'])
+def test_exceeded_budgets_report_their_progress(crack_parameters, engine, method):
+    pyramid = create_surface_pyramid(create_brick_image(512, 512, 64, 24, 6), 2)
+    generate = budgeted_calls(engine_generator(crack_parameters, engine), pyramid.levels[0], pyramid)[method]
+
+    # Generation stops at the step limit, or after its first step once out of time. A batch spends a step for each of
+    # its eight walkers at once.
+    for budget in [WorkBudget(max_steps=5), WorkBudget(max_seconds=0.)]:
+        result = generate(budget)
+        assert isinstance(result, BudgetExceeded)
+        assert 0 < result.steps <= 8
+        assert (result.steps, result.paths, result.attempts) == (budget.steps, budget.paths, budget.attempts)
+        assert result.attempts >= 1
+        assert result.elapsed_seconds >= 0.
+
+    # A sufficient budget counts the work of the generated cracks
+    budget = WorkBudget(max_steps=10 ** 6)
+    assert not isinstance(generate(budget), BudgetExceeded)
+    assert budget.steps > 0 and budget.paths > 0 and budget.attempts >= 1
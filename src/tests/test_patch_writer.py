@@ -0,0 +1,61 @@
+import os
+import threading
+
+import numpy as np
+
+from dataset_generation.dataset_layout import SHARDS_OUTPUT_DIR, SHARD_INDEX_FILE
+from dataset_generation.model.parameters import LabelParameters, OUTPUT_TAR
+from dataset_generation.patch_writer import PatchWriter
+
+
+def create_tar_writer(tmp_path) -> PatchWriter:
+    return PatchWriter(LabelParameters(
+        1, (8, 8), 0, 0.5, 0.5, str(tmp_path), str(tmp_path / 'images'), str(tmp_path / 'labels'),
+        output_format=OUTPUT_TAR
+    ))
+
+
+def test_tar_batches_are_stored_once_flushed(tmp_path):
+    writer = create_tar_writer(tmp_path)
+    events = []
+    patch = np.zeros((8, 8), dtype=np.uint8)
+
+    writer.submit('crack-0.png', patch, patch)
+    writer.submit('crack-1.png', patch, patch)
+    writer.commit(lambda: events.append('first'))
+    writer.submit('crack-2.png', patch, patch)
+    writer.commit(lambda: events.append('second'))
+    writer.commit(lambda: events.append('empty'))
+
+    # The shard is far from full, so nothing is stored until the writer is flushed
+    assert events == []
+    assert not os.path.exists(os.path.join(tmp_path, SHARDS_OUTPUT_DIR, SHARD_INDEX_FILE))
+
+    writer.flush()
+    assert events == ['first', 'second', 'empty']
+    with open(os.path.join(tmp_path, SHARDS_OUTPUT_DIR, SHARD_INDEX_FILE)) as index_file:
+        assert len(index_file.readlines()) == 3
+    writer.close()
+
+
+def test_stored_callbacks_do_not_block_writes(tmp_path):
+    writer = create_tar_writer(tmp_path)
+    patch = np.zeros((8, 8), dtype=np.uint8)
+    in_callback, release_callback = threading.Event(), threading.Event()
+
+    def slow_callback():
+        in_callback.set()
+        release_callback.wait(timeout=5)
+
+    writer.submit('crack-0.png', patch, patch)
+    writer.commit(slow_callback)
+    flushing = threading.Thread(target=writer.flush)
+    flushing.start()
+    assert in_callback.wait(timeout=5)
+
+    # Submitting and committing another batch does not wait for the callback of the first one
+    writer.submit('crack-1.png', patch, patch)
+    writer.commit(lambda: None)
+    release_callback.set()
+    flushing.join(timeout=5)
+    writer.close()
@@ -0,0 +1,58 @@
+from dataclasses import replace
+
+import numpy as np
+import pytest
+from scipy.stats import ks_2samp
+
+from crack_generation import CrackGenerator
+
+NUM_CRACKS = 200
+
+
+def mean_turning_angle(centers: np.array) -> float:
+    """Mean absolute angle between consecutive segments of a path."""
+    if len(centers) < 3:
+        return 0.
+    segments = np.diff(centers.astype(np.float64), axis=0)
+    turns = np.diff(np.arctan2(segments[:, 1], segments[:, 0]))
+    return float(np.mean(np.abs(np.angle(np.exp(1j * turns)))))
+
+
+def crack_features(cracks) -> dict[str, np.array]:
+    """
+    The number of points, mean width, width variation, turning angle and height sum of every crack. The width
+    variation and turning angle also tell apart engines that differ in how often they change the width, break through
+    the gradient or follow it.
+    """
+    return {
+        'length': np.array([len(crack.path) for crack in cracks]),
+        'width': np.array([np.mean(crack.path.width) for crack in cracks]),
+        'width_variation': np.array([np.std(crack.path.width) for crack in cracks]),
+        'turning_angle': np.array([mean_turning_angle(crack.path.centers) for crack in cracks]),
+        'height_sum': np.array([crack.crack_height_map.sum() for crack in cracks])
+    }
+
+
+def assert_equivalent(features, reference_features) -> None:
+    for name, values in features.items():
+        assert ks_2samp(values, reference_features[name]).pvalue > 0.01, name
+        assert np.mean(values) == pytest.approx(np.mean(reference_features[name]), rel=0.1), name
+
+
+def reference_features(crack_parameters, surface) -> dict[str, np.array]:
+    """The features of cracks generated one by one by the reference engine, from other seeds than the tests use."""
+    generator = CrackGenerator(crack_parameters)
+    return crack_features([generator(surface, seed) for seed in range(NUM_CRACKS, 2 * NUM_CRACKS)])
+
+
+def test_batch_engine_matches_reference(crack_parameters, image_surface):
+    generator = CrackGenerator(crack_parameters)
+    features = crack_features(generator.generate_batch(image_surface, NUM_CRACKS, seed=0))
+    assert_equivalent(features, reference_features(crack_parameters, image_surface))
+
+
+def test_fast_engine_matches_reference(crack_parameters, image_surface):
+    path_parameters = replace(crack_parameters.path_parameters, engine='fast')
+    generator = CrackGenerator(replace(crack_parameters, path_parameters=path_parameters))
+    features = crack_features([generator(image_surface, seed) for seed in range(NUM_CRACKS)])
+    assert_equivalent(features, reference_features(crack_parameters, image_surface))
@@ -0,0 +1,37 @@
+from types import SimpleNamespace
+
+import numpy as np
+import pytest
+
+from crack_generation.path_functions import determine_start_point, PIVOT_DIRECTION_LEFT, PIVOT_DIRECTION_RIGHT
+
+
+def sorted_start_points(surface, parameters, pivot_direction: int) -> list[tuple[int, int]]:
+    """The edge points of the search space sorted on height value, as they were selected before the mortar index."""
+    height, width = surface.height_map.shape
+    min_height, max_height = 0, int(np.rint(height * (1 - parameters.row_search_space_percent)))
+    if pivot_direction == PIVOT_DIRECTION_LEFT:
+        min_width, max_width = int(np.rint(width * (1 - parameters.column_search_space_percent))), width - 1
+    else:
+        min_width, max_width = 0, int(np.rint(width * parameters.column_search_space_percent))
+
+    side_x = min_width if pivot_direction == PIVOT_DIRECTION_RIGHT else max_width
+    points = [(side_x, y) for y in range(min_height, max_height)] + \
+        [(x, min_height) for x in range(min_width, max_width)]
+    points.sort(key=lambda point: -surface.distance_transform[point[1], point[0]])
+    return points
+
+
+@pytest.mark.parametrize('surface_name', ['surface', 'image_surface'])
+@pytest.mark.parametrize('pivot_direction', [PIVOT_DIRECTION_LEFT, PIVOT_DIRECTION_RIGHT])
+def test_start_point_matches_sorted_selection(crack_parameters, surface_name, pivot_direction, request):
+    surface = request.getfixturevalue(surface_name)
+    parameters = crack_parameters.trajectory_parameters
+    points = sorted_start_points(surface, parameters, pivot_direction)
+
+    # Every rank the random generator can draw selects the same point as the sorted list
+    for rank in range(len(points) // 2):
+        rng = SimpleNamespace(integers=lambda high: rank)
+        start_point = determine_start_point(surface, parameters, pivot_direction, 15., rng)
+        assert tuple(start_point.center) == points[rank]
+        assert start_point.width == min(15., surface.distance_transform[points[rank][1], points[rank][0]])
@@ -0,0 +1,32 @@
+from dataclasses import replace
+
+import numpy as np
+import pytest
+
+from crack_generation.model import CrackPath
+from crack_generation.path_functions import create_height_map_from_path
+
+
+def wandering_path(rng: np.random.Generator, width: float, num_points: int = 60, step: float = 3.) -> CrackPath:
+    """A path that wanders through the middle of the surface, such that neither rasterizer reaches its border."""
+    angles = np.cumsum(rng.normal(0., 0.15, num_points))
+    xs = 128. + np.cumsum(step * np.cos(angles)) - step * np.cos(angles).sum() / 2.
+    ys = 128. + np.cumsum(step * np.sin(angles)) - step * np.sin(angles).sum() / 2.
+    widths = np.clip(width + rng.normal(0., 0.5, num_points), 2., None)
+    return CrackPath(np.rint(xs).astype(np.int32), np.rint(ys).astype(np.int32), angles, widths)
+
+
+@pytest.mark.parametrize('width, min_overlap', [(3., 0.7), (6., 0.8), (10., 0.85)])
+def test_capsules_match_the_distance_transform(crack_parameters, surface, width, min_overlap):
+    capsule_parameters = replace(crack_parameters.dimension_parameters, rasterizer='capsule')
+    rng = np.random.default_rng(0)
+    for _ in range(10):
+        path = wandering_path(rng, width)
+        reference = create_height_map_from_path(path, surface, crack_parameters.dimension_parameters).to_dense()
+        capsules = create_height_map_from_path(path, surface, capsule_parameters).to_dense()
+
+        # The distance transform also fills the pixels on the edges of the rounded polygon, so its cracks are slightly
+        # wider, which matters most for thin cracks
+        overlap = np.sum((reference > 0) & (capsules > 0)) / np.sum((reference > 0) | (capsules > 0))
+        assert overlap > min_overlap
+        assert 0.7 < capsules.sum() / reference.sum() < 1.1
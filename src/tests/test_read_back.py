@@ -0,0 +1,82 @@
+from types import SimpleNamespace
+
+import cv2
+import numpy as np
+import pytest
+
+from dataset_generation.read_back import read_viewer_image, linear_to_display, check_view_settings
+
+
+class StubPixels:
+    """Stub of the pixels of a Blender image, which only supports reading them into a flat buffer."""
+
+    def __init__(self, values: np.array):
+        self.values = values
+
+    def foreach_get(self, buffer: np.array) -> None:
+        buffer[:] = self.values
+
+
+def stub_viewer_image(rgba: np.array) -> SimpleNamespace:
+    """Stub of the viewer image holding RGBA pixels given top to bottom, stored bottom to top like Blender."""
+    height, width, _ = rgba.shape
+    return SimpleNamespace(size=(width, height), pixels=StubPixels(rgba[::-1].ravel()))
+
+
+def view_settings(**settings) -> SimpleNamespace:
+    return SimpleNamespace(**{'view_transform': 'Standard', 'look': 'None', 'exposure': 0., 'gamma': 1., **settings})
+
+
+def srgb_reference(value: float) -> int:
+    """The sRGB transfer function of a single linear value, as applied when Blender saves a render to PNG."""
+    value = min(max(value, 0.), 1.)
+    display = value * 12.92 if value <= 0.0031308 else 1.055 * value ** (1 / 2.4) - 0.055
+    return int(round(display * 255))
+
+
+def png_round_trip(image: np.array) -> np.array:
+    """Encode and decode an image like writing and reading back a rendered PNG."""
+    _, encoded = cv2.imencode('.png', image)
+    return cv2.imdecode(encoded, cv2.IMREAD_COLOR)
+
+
+@pytest.fixture
+def rgba() -> np.array:
+    rng = np.random.default_rng(0)
+    rgba = rng.random((6, 5, 4), dtype=np.float32)
+    rgba[0, 0] = [0., 0.002, 0.5, 1.]  # Both sides of the linear segment of the sRGB curve
+    rgba[1, 0] = [1.5, -0.1, 1., 0.]  # Out of range values are clipped
+    rgba[:, :, 3] = rgba[:, :, 3] >= 0.5
+    return rgba
+
+
+def test_read_viewer_image_matches_png_round_trip(rgba):
+    image, label = read_viewer_image(stub_viewer_image(rgba), view_settings())
+
+    # The files written by the compositor hold the display values of the image and the binary label
+    expected_image = np.vectorize(srgb_reference)(rgba[:, :, 2::-1]).astype(np.uint8)
+    expected_label = np.repeat((rgba[:, :, 3:] * 255).astype(np.uint8), 3, axis=2)
+
+    assert image.dtype == label.dtype == np.uint8
+    assert np.array_equal(image, png_round_trip(expected_image))
+    assert np.array_equal(label, png_round_trip(expected_label))
+    assert np.array_equal(png_round_trip(image), image)
+    assert image[0, 0].tolist() == [188, 7, 0]  # BGR of the first pixel, top left
+    assert image[1, 0].tolist() == [255, 0, 255]
+
+
+def test_linear_to_display_exposure_and_gamma():
+    values = np.array([0.1, 0.25, 0.5], dtype=np.float32)
+
+    assert np.array_equal(linear_to_display(values, exposure=1.), linear_to_display(values * 2))
+    gamma_values = linear_to_display(values, gamma=2.)
+    expected = [round((srgb_reference(value) / 255) ** 0.5 * 255) for value in values]
+    assert np.all(np.abs(gamma_values.astype(int) - expected) <= 1)
+
+
+def test_check_view_settings():
+    check_view_settings(view_settings())
+    with pytest.raises(ValueError):
+        check_view_settings(view_settings(view_transform='AgX'))
+    with pytest.raises(ValueError):
+        check_view_settings(view_settings(look='High Contrast'))
@@ -0,0 +1,39 @@
+from types import SimpleNamespace
+
+import numpy as np
+
+from crack_generation import CrackGenerator
+from dataset_generation import generate_render_iteration
+from dataset_generation.model import IterationMetrics
+
+
+def stub_config(surface) -> SimpleNamespace:
+    """Configuration with the camera bounds, assets and label parameters used to generate an iteration."""
+    return SimpleNamespace(
+        camera_parameters=SimpleNamespace(
+            translation_min=(-1., -1., -1.), translation_max=(1., 1., 1.),
+            rotation_min=(-0.2, 0., -0.2), rotation_max=(0.2, 0., 0.2)
+        ),
+        asset_collection=SimpleNamespace(
+            scenes=[SimpleNamespace(name=f'wall-{index}', surface=surface, crack_bank=None) for index in range(3)],
+            world_textures=['pond', 'garden', 'street']
+        ),
+        label_parameters=SimpleNamespace(min_active_pixels=200)
+    )
+
+
+def test_iterations_are_reproducible_without_global_state(crack_parameters, surface):
+    config = stub_config(surface)
+    generator = CrackGenerator(crack_parameters)
+
+    np.random.seed(0)
+    global_state = np.random.get_state()[1].copy()
+    first = generate_render_iteration(config, generator, 0, IterationMetrics(0, 0), seed=42)
+    assert np.array_equal(np.random.get_state()[1], global_state)
+
+    np.random.seed(1)
+    second = generate_render_iteration(config, generator, 0, IterationMetrics(0, 0), seed=42)
+    assert (first.scene, first.world_texture) == (second.scene, second.world_texture)
+    assert (first.camera_translation, first.camera_rotation) == (second.camera_translation, second.camera_rotation)
+    assert np.array_equal(first.crack.path.x, second.crack.path.x)
+    assert np.array_equal(first.crack.crack_height_map.values, second.crack.crack_height_map.values)
@@ -0,0 +1,159 @@
+import json
+import os
+import stat
+import sys
+
+from dataset_generation.dataset_layout import IMAGES_OUTPUT_DIR, LABELS_OUTPUT_DIR, SHARDS_OUTPUT_DIR, \
+    SHARD_INDEX_FILE, MANIFEST_FILE, read_manifest
+from render_workers import worker_directory, worker_index_ranges, worker_command, launch_workers, merge_worker_outputs
+
+# Stub Blender executable, rendering the iterations of its index range as empty files with a manifest like a worker
+STUB_BLENDER = f'''#!{sys.executable}
+import json, os, sys
+arguments = sys.argv[sys.argv.index('--') + 1:]
+options = dict(zip(arguments[::2], arguments[1::2]))
+output, start, size = options['-o'], int(options['-i']), int(options['-s'])
+for directory in ('{IMAGES_OUTPUT_DIR}', '{LABELS_OUTPUT_DIR}'):
+    os.makedirs(os.path.join(output, directory), exist_ok=True)
+
+manifest_path = os.path.join(output, '{MANIFEST_FILE}')
+index = start
+if '--resume' in arguments and os.path.exists(manifest_path):
+    with open(manifest_path) as manifest_file:
+        iterations = [json.loads(line) for line in manifest_file if '"iteration"' in line]
+    index = max((iteration['index'] + iteration['patches'] for iteration in iterations), default=start)
+end = min(start + size, index + int(os.environ.get('STUB_MAX_IMAGES', size)))
+
+with open(manifest_path, 'a') as manifest_file:
+    manifest_file.write(json.dumps({{'type': 'run', 'start_index': index, 'threads': options['-t']}}) + '\\n')
+    while index < end:
+        for patch in range(4):
+            for directory in ('{IMAGES_OUTPUT_DIR}', '{LABELS_OUTPUT_DIR}'):
+                open(os.path.join(output, directory, f'crack-{{index + patch}}.png'), 'w').close()
+        manifest_file.write(json.dumps({{'type': 'iteration', 'index': index, 'patches': 4}}) + '\\n')
+        index += 4
+sys.exit(int(os.environ.get('STUB_EXIT_CODE', 0)))
+'''
+
+
+def create_stub_blender(directory) -> str:
+    path = os.path.join(directory, 'blender')
+    with open(path, 'w') as stub_file:
+        stub_file.write(STUB_BLENDER)
+    os.chmod(path, os.stat(path).st_mode | stat.S_IEXEC)
+    return path
+
+
+def run_workers(blender: str, output: str, dataset_size: int, num_workers: int, resume: bool = False) -> list[int]:
+    directories = [worker_directory(output, worker) for worker in range(num_workers)]
+    commands = [
+        worker_command(blender, 'scene.blend', start, size, 'config.yaml', directory, 2, 'CPU', 5, resume=resume)
+        for (start, size), directory in zip(worker_index_ranges(dataset_size, num_workers, 4), directories)
+    ]
+    exit_codes = launch_workers(commands, directories, 2)
+    merge_worker_outputs(directories, output)
+    return exit_codes
+
+
+def dataset_names(output: str) -> tuple[list[str], list[str]]:
+    return (
+        sorted(os.listdir(os.path.join(output, IMAGES_OUTPUT_DIR))),
+        sorted(os.listdir(os.path.join(output, LABELS_OUTPUT_DIR)))
+    )
+
+
+def test_worker_index_ranges_are_disjoint_with_overshoot():
+    for dataset_size, num_workers, images_per_render in [(100, 3, 9), (10, 4, 1), (7, 7, 4), (1000, 8, 16)]:
+        ranges = worker_index_ranges(dataset_size, num_workers, images_per_render)
+
+        assert len(ranges) == num_workers
+        assert sum(size for _, size in ranges) == dataset_size
+        for (start, size), (next_start, _) in zip(ranges, ranges[1:]):
+            # The last render of a worker starts before its end and can write all of its images
+            assert start + size - 1 + images_per_render <= next_start
+
+
+def test_worker_command():
+    command = worker_command(
+        'blender', 'scene.blend', 10, 5, 'config.yaml', 'out', 3, 'CUDA', 2, crack_bank='bank', resume=True, queue='q'
+    )
+
+    assert command[:4] == ['blender', 'scene.blend', '-b', '-P']
+    assert command[4].endswith('blender_start_render_script.py')
+    options = command[command.index('--') + 1:]
+    for option, value in [('-s', '5'), ('-i', '10'), ('-c', 'config.yaml'), ('-o', 'out'), ('-t', '3'),
+                          ('-r', '2'), ('--cycles-device', 'CUDA'), ('-b', 'bank'), ('-q', 'q')]:
+        assert options[options.index(option) + 1] == value
+    assert '--resume' in options
+    assert '--resume' not in worker_command('blender', 'scene.blend', 0, 5, 'config.yaml', 'out', 3, 'CPU', 2)
+
+
+def test_launch_workers_logs_and_exit_codes(tmp_path, monkeypatch):
+    blender = create_stub_blender(tmp_path)
+    directories = [str(tmp_path / 'a'), str(tmp_path / 'b')]
+    commands = [[blender, '--', '-o', directory, '-i', '0', '-s', '4', '-t', '3'] for directory in directories]
+
+    monkeypatch.setenv('STUB_EXIT_CODE', '3')
+    assert launch_workers(commands, directories, 3) == [3, 3]
+    for directory in directories:
+        assert os.path.exists(os.path.join(directory, 'log.txt'))
+        assert os.path.exists(os.path.join(directory, MANIFEST_FILE))
+
+
+def test_merge_is_idempotent_after_resume(tmp_path, monkeypatch):
+    blender = create_stub_blender(tmp_path)
+    output = str(tmp_path / 'dataset')
+
+    # The workers stop after 8 of their images, as if they crashed
+    monkeypatch.setenv('STUB_MAX_IMAGES', '8')
+    run_workers(blender, output, 40, 2)
+    _, iterations, _ = read_manifest(os.path.join(output, MANIFEST_FILE))
+    assert sum(iteration['patches'] for iteration in iterations) == 16
+
+    monkeypatch.delenv('STUB_MAX_IMAGES')
+    run_workers(blender, output, 40, 2, resume=True)
+    images, labels = dataset_names(output)
+    with open(os.path.join(output, MANIFEST_FILE)) as manifest_file:
+        manifest = manifest_file.read()
+    _, iterations, _ = read_manifest(os.path.join(output, MANIFEST_FILE))
+    indices = [iteration['index'] for iteration in iterations]
+
+    assert indices == sorted(set(indices))
+    assert sum(iteration['patches'] for iteration in iterations) == len(images) == 40
+    assert images == labels
+    assert images == sorted(
+        f'crack-{iteration["index"] + patch}.png' for iteration in iterations for patch in range(iteration['patches'])
+    )
+
+    # Merging again without new images changes nothing
+    directories = [worker_directory(output, worker) for worker in range(2)]
+    assert merge_worker_outputs(directories, output) == 40
+    assert dataset_names(output) == (images, labels)
+    with open(os.path.join(output, MANIFEST_FILE)) as manifest_file:
+        assert manifest_file.read() == manifest
+    assert all(json.loads(line)['worker'] in (0, 1) for line in manifest.splitlines())
+
+
+def test_merge_indexes_duplicate_samples_once(tmp_path):
+    # Both workers rendered the iteration of crack-0.png, as the lease of the first one expired
+    directories = [str(tmp_path / 'worker-0'), str(tmp_path / 'worker-1')]
+    for worker, (directory, names) in enumerate(zip(directories, [['crack-0.png', 'crack-1.png'], ['crack-0.png']])):
+        os.makedirs(os.path.join(directory, SHARDS_OUTPUT_DIR))
+        open(os.path.join(directory, SHARDS_OUTPUT_DIR, 'shard-000000.tar'), 'w').close()
+        with open(os.path.join(directory, SHARDS_OUTPUT_DIR, SHARD_INDEX_FILE), 'w') as index_file:
+            index_file.writelines(
+                json.dumps({'name': name, 'shard': 'shard-000000.tar', 'image_offset': worker}) + '\n' for name in names
+            )
+
+    output = str(tmp_path / 'dataset')
+    for _ in range(2):
+        merge_worker_outputs(directories, output)
+        with open(os.path.join(output, SHARDS_OUTPUT_DIR, SHARD_INDEX_FILE)) as index_file:
+            entries = {entry['name']: entry for entry in map(json.loads, index_file)}
+        assert len(entries) == 2
+        assert entries['crack-0.png']['shard'] == 'worker-1-shard-000000.tar'
+        assert entries['crack-0.png']['image_offset'] == 1
+        assert entries['crack-1.png']['shard'] == 'worker-0-shard-000000.tar'
+    assert sorted(os.listdir(os.path.join(output, SHARDS_OUTPUT_DIR))) == [
+        SHARD_INDEX_FILE, 'worker-0-shard-000000.tar', 'worker-1-shard-000000.tar'
+    ]
@@ -0,0 +1,119 @@
+import threading
+import time
+
+import pytest
+
+from render_workers import WorkQueue
+
+
+def create_queue(tmp_path, dataset_size: int = 8, images_per_job: int = 4, **kwargs) -> WorkQueue:
+    """Open the queue for a single worker, as every worker process opens its own queue."""
+    return WorkQueue(str(tmp_path / 'queue.sqlite'), dataset_size, images_per_job, poll_seconds=0.01, **kwargs)
+
+
+def test_jobs_reserve_disjoint_indices(tmp_path):
+    queue = create_queue(tmp_path)
+    first, second = queue.lease('a'), queue.lease('a')
+
+    assert (first.start_index, second.start_index) == (0, 4)
+    assert queue.complete(first, 4) and queue.complete(second, 3)
+    assert queue.completed_images() == 7
+
+    # The last job produced fewer images than reserved, so one more job is needed
+    third = queue.lease('a')
+    assert third.start_index == 8
+    assert queue.complete(third, 4)
+    assert queue.lease('a') is None
+
+
+def test_lease_waits_for_leased_jobs(tmp_path):
+    queue = create_queue(tmp_path)
+    first, second = queue.lease('a'), queue.lease('a')
+
+    leases = []
+    waiting = threading.Thread(target=lambda: leases.append(create_queue(tmp_path).lease('b')))
+    waiting.start()
+    time.sleep(0.1)
+    assert waiting.is_alive()
+
+    queue.complete(first, 4)
+    queue.complete(second, 4)
+    waiting.join(timeout=5)
+    assert leases == [None]
+
+
+def test_lease_stores_own_jobs_before_waiting(tmp_path):
+    queue = create_queue(tmp_path)
+    leases = [queue.lease('a'), queue.lease('a')]
+
+    def store():
+        for lease in leases:
+            queue.complete(lease, 4)
+
+    assert queue.lease('a', on_wait=store) is None
+    assert queue.completed_images() == 8
+
+
+def test_lease_creation_is_bounded(tmp_path):
+    queues = [create_queue(tmp_path, lease_seconds=0.05) for _ in range(10)]
+    leases = [queue.lease(f'worker-{worker}') for worker, queue in enumerate(queues)]
+
+    # Only two jobs fit the dataset, the other workers take over their leases once expired
+    assert {lease.job for lease in leases} == {1, 2}
+    assert queues[-1].complete(leases[-1], 4) and queues[-2].complete(leases[-2], 4)
+    assert queues[0].lease('worker-0') is None
+
+
+def test_held_leases_are_renewed(tmp_path):
+    holder = create_queue(tmp_path, dataset_size=100, lease_seconds=0.2)
+    held = holder.lease('a')
+    for _ in range(3):
+        time.sleep(0.1)
+        holder.lease('a')
+
+    # The first lease is still renewed after more than its lease time, so the other worker gets a new job
+    assert create_queue(tmp_path).lease('b').job != held.job
+
+
+def test_expired_lease_is_handed_out_again(tmp_path):
+    first, second = create_queue(tmp_path, lease_seconds=0.05), create_queue(tmp_path)
+    expired = first.lease('a')
+    time.sleep(0.1)
+
+    lease = second.lease('b')
+    assert (lease.job, lease.start_index, lease.worker) == (expired.job, expired.start_index, 'b')
+
+    # The first worker to complete the iteration counts, the other one is rejected
+    assert first.complete(expired, 4)
+    assert not second.complete(lease, 4)
+    assert first.completed_images() == 4
+
+
+def test_release(tmp_path):
+    first, second = create_queue(tmp_path), create_queue(tmp_path)
+    released = first.lease('a')
+    first.release(released)
+
+    lease = second.lease('b')
+    assert (lease.job, lease.start_index) == (released.job, released.start_index)
+
+    # Releasing a lease that was handed out again does not affect the new lease
+    first.release(released)
+    assert first.lease('a').job != lease.job
+
+
+def test_double_complete(tmp_path):
+    queue = create_queue(tmp_path)
+    lease = queue.lease('a')
+
+    assert queue.complete(lease, 4)
+    assert not queue.complete(lease, 4)
+    assert queue.completed_images() == 4
+
+
+def test_joining_workers_use_the_queue_settings(tmp_path):
+    create_queue(tmp_path)
+
+    assert create_queue(tmp_path, dataset_size=100).dataset_size == 8
+    with pytest.raises(ValueError):
+        create_queue(tmp_path, images_per_job=9)
@@ -6,7 +6,8 @@ DEFAULT_PARAMETERS = CrackGenerationParameters(
         width=15.,
         depth=5.,
         sigma=5.,
-        width_stds_offset=1.5
+        width_stds_offset=1.5,
+        rasterizer='distance_transform'
     ),
     CrackPathParameters(
         step_size=15.,
@@ -18,7 +19,8 @@ DEFAULT_PARAMETERS = CrackGenerationParameters(
         max_width_grow=2,
         smoothing_type='gaussian',
         smoothing=1,
-        distance_improvement_threshold=0.1
+        distance_improvement_threshold=0.1,
+        engine='reference'
     ),
     CrackTrajectoryParameters(
         along_bottom_chance=2 / 12,
@@ -17,8 +17,8 @@ from sys import platform as sys_pf
 from crack_generation import CrackGenerator
 from crack_generation.model.parameters import CrackGenerationParameters, CrackDimensionParameters, \
     CrackPathParameters, CrackTrajectoryParameters
-from crack_generation.model import Surface, Crack, Point
-from crack_generation.path_functions import point_to_coords, create_height_map_from_path
+from crack_generation.model import Surface, Crack
+from crack_generation.path_functions import path_to_coords, create_height_map_from_path
 
 # Fix for MacOS
 if sys_pf == 'darwin':
@@ -153,8 +153,8 @@ class PlaygroundInterface:
 
         crack_generator = CrackGenerator(self.parameters)
         self.crack = crack_generator(self.surface)
-        coords = np.array([point_to_coords(point) for point in self.crack.path], dtype=np.int32)
-        flattened = np.concatenate([coords[:, 0, :], np.flip(coords[:, 1, :], axis=0)], axis=0)
+        top_coords, bottom_coords = path_to_coords(self.crack.path)
+        flattened = np.concatenate([top_coords, np.flip(bottom_coords, axis=0)], axis=0)
 
         self.path_ax.plot(flattened[:, 0], flattened[:, 1], color='red', zorder=1)
         pivot_points = np.array(self.crack.trajectory)
@@ -179,11 +179,11 @@ class PlaygroundInterface:
                 self.parameters.dimension_parameters
             )
             self.crack.crack_height_map = height_map
-            self.height_ax.imshow(height_map)
+            self.height_ax.imshow(height_map.to_dense())
             self.fig.canvas.draw_idle()
             self.fig.canvas.flush_events()
         else:
-            self.height_ax.imshow(self.crack.crack_height_map)
+            self.height_ax.imshow(self.crack.crack_height_map.to_dense())
 
     def add_widgets(self) -> None:
         """Add sliders and draw buttons."""